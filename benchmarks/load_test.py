@@ -0,0 +1,259 @@
+"""
+Нагрузочный тест обработчиков бота.
+
+Прогоняет через обработчики маршрутизаторов из main.py (bot_commands, reg_router, menu_router,
+task_router) синтетические обновления от множества одновременных пользователей: регистрация,
+создание задач (без срока), просмотр списков, карточка задачи, пометка выполненной и удаление.
+Вместо Telegram используется поддельный клиент, вместо PostgreSQL по умолчанию - SQLite-файл
+(нужен пакет aiosqlite из requirements-dev.txt); другую базу можно указать через переменную DB_URL.
+
+Ограничение: тест сам выбирает обработчик для каждого обновления (колбэки - через callback_routes)
+и вызывает его напрямую, поэтому фильтры, маршрутизаторы и middleware pyrogram_patch, а также
+диспетчер Pyrogram и очередь обновлений пользователей в измерения не входят. Задержки отражают
+работу обработчиков, базы данных и очереди исходящих вызовов, а не путь маршрутизации обновлений.
+
+Запуск:
+    python -m benchmarks.load_test --users 1000 --tasks 5 --concurrency 200
+
+Отчет содержит p50/p95/p99 задержки каждого обработчика, среднее число SQL-запросов
+на обновление и пропускную способность в обновлениях в секунду.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from functools import partial
+from types import SimpleNamespace
+
+os.environ.setdefault('API_ID', '0')
+os.environ.setdefault('API_HASH', 'bench')
+os.environ.setdefault('TG_TOKEN', '0:bench')
+for _name in ('POSTGRES_USER', 'POSTGRES_PASSWORD', 'POSTGRES_DATABASE', 'POSTGRES_HOST', 'POSTGRES_PORT'):
+    os.environ.setdefault(_name, '')
+os.environ.setdefault('DB_URL', f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}")
+# Поддельный клиент не ограничен Telegram, поэтому лимиты очереди исходящих вызовов снимаются
+os.environ.setdefault('OUTBOX_GLOBAL_RATE', '1e9')
+os.environ.setdefault('OUTBOX_CHAT_RATE', '1e9')
+
+import main  # noqa: E402
+from src.database.conn import engine, read_engine  # noqa: E402
+from src.database.migrations import apply_migrations  # noqa: E402
+from src.database.models import create_bd_tables  # noqa: E402
+from src.database.profiling import capture_queries, check_query_budget, query_summary  # noqa: E402
+from src.database.requests import get_user_id_by_tg_id  # noqa: E402
+from src.handlers import menu, registration, tasks  # noqa: E402
+from src.handlers.callbacks import callback_query_handler  # noqa: E402
+from src.tools.callbacks import callback_routes  # noqa: E402
+from src.tools.outbox import outbox  # noqa: E402
+
+
+class FakeClient:
+    """
+    Поддельный клиент Pyrogram, считающий исходящие вызовы API вместо отправки в Telegram.
+    """
+
+    def __init__(self) -> None:
+        self.me = SimpleNamespace(id=0, username='bench_bot')
+        self.api_calls = 0
+
+    async def send_message(self, chat_id: int, text: str, **kwargs) -> None:
+        self.api_calls += 1
+
+
+class FakeMessage:
+    def __init__(self, client: FakeClient, tg_id: int, text: str) -> None:
+        self._client = client
+        self.text = text
+        self.chat = SimpleNamespace(id=tg_id)
+        self.from_user = SimpleNamespace(id=tg_id)
+
+    async def reply(self, text: str, **kwargs) -> None:
+        self._client.api_calls += 1
+
+
+class FakeCallback:
+    def __init__(self, client: FakeClient, tg_id: int, data: str) -> None:
+        self._client = client
+        self.data = data
+        self.from_user = SimpleNamespace(id=tg_id)
+        self.message = SimpleNamespace(chat=SimpleNamespace(id=tg_id))
+        self.reply_markup = None
+
+    async def answer(self, text: str = None, **kwargs) -> None:
+        self._client.api_calls += 1
+
+    async def edit_message_text(self, text: str, reply_markup=None, **kwargs) -> None:
+        self._client.api_calls += 1
+        self.reply_markup = reply_markup
+
+
+class LoadTest:
+    """
+    Сценарий нагрузочного теста и собранная статистика.
+
+    Атрибуты:
+        latencies (dict[str, list[float]]): Задержки обновлений по именам обработчиков.
+        queries (dict[str, list[int]]): Количество SQL-запросов на обновление по именам обработчиков.
+        over_budget (int): Количество обновлений, превысивших бюджет SQL-запросов.
+    """
+
+    def __init__(self, tasks_per_user: int) -> None:
+        self.client = FakeClient()
+        self.storage = main.get_storage()
+        self.tasks_per_user = tasks_per_user
+        self.latencies: dict[str, list[float]] = {}
+        self.queries: dict[str, list[int]] = {}
+        self.over_budget = 0
+
+    async def update(self, handler, update, state=None, name: str | None = None):
+        """
+        Обрабатывает одно синтетическое обновление так же, как это делает диспетчер:
+        определяет пользователя (UserContextMiddleware), подставляет state и user_id
+        в аргументы обработчика и замеряет задержку и число запросов.
+
+        Исходящие вызовы обработчик только ставит в очередь outbox, поэтому они не входят
+        в задержку; после замера очередь пользователя дожидается, чтобы сценарий видел
+        результат (например, клавиатуру отредактированного сообщения).
+
+        Колбэки передаются в единый обработчик callback_query_handler, а статистика
+        записывается под именем обработчика найденного маршрута.
+        """
+        target = handler
+        if handler is callback_query_handler:
+            parsed = callback_routes.parse(update.data)
+            target = parsed[0].handler if parsed else handler
+        name = name or target.__name__
+        start = time.perf_counter()
+        with capture_queries() as stats:
+            stats.set_handler(target)
+            try:
+                arguments = handler.__code__.co_varnames[:handler.__code__.co_argcount]
+                kwargs = {}
+                if 'user_id' in arguments:
+                    kwargs['user_id'] = await get_user_id_by_tg_id(update.from_user.id)
+                if 'state' in arguments:
+                    kwargs['state'] = state
+                return await handler(self.client, update, **kwargs)
+            finally:
+                self.latencies.setdefault(name, []).append(time.perf_counter() - start)
+                self.queries.setdefault(name, []).append(stats.db_queries)
+                if check_query_budget(stats):
+                    self.over_budget += 1
+                await outbox.flush(update.from_user.id)
+
+    async def user_session(self, tg_id: int) -> None:
+        """
+        Полный сценарий одного пользователя: регистрация, создание задач и работа со списками.
+        """
+        state = await self.storage.checkup(f'{tg_id}_{tg_id}')
+        message = partial(FakeMessage, self.client, tg_id)
+        callback = partial(FakeCallback, self.client, tg_id)
+
+        await self.update(registration.start_reg_handler, message('/start'), state)
+        await self.update(registration.process_name, message(f'User {tg_id}'), state)
+        await self.update(registration.process_login, message(f'user_{tg_id}'), state)
+
+        for number in range(self.tasks_per_user):
+            await self.update(callback_query_handler, callback(callback_routes.pack('create_new_task')), state)
+            await self.update(tasks.process_task_name, message(f'Задача {number}'), state)
+            await self.update(tasks.process_task_description, message(f'Описание задачи {number}'), state)
+            await self.update(tasks.process_task_due_at, message('-'), state)
+
+        await self.update(menu.main_menu_handler, message('/start'))
+        for _ in range(self.tasks_per_user):
+            screen = callback(callback_routes.pack('actual_user_tasks'))
+            await self.update(callback_query_handler, screen, state)
+            task_data = screen.reply_markup.inline_keyboard[0][0].callback_data
+
+            card = callback(task_data)
+            await self.update(callback_query_handler, card, state)
+            mark_data, delete_data = (row[0].callback_data for row in card.reply_markup.inline_keyboard[:2])
+            await self.update(callback_query_handler, callback(mark_data), state)
+
+        await self.update(callback_query_handler, callback(callback_routes.pack('all_user_tasks')), state)
+        await self.update(callback_query_handler, callback(callback_routes.pack('completed_user_tasks')), state)
+        if self.tasks_per_user:
+            # Удаляется последняя открытая карточка задачи; без задач карточек не было
+            await self.update(callback_query_handler, callback(delete_data), state)
+        await self.update(callback_query_handler, callback(callback_routes.pack('delete_completed_tasks')), state)
+
+    async def run(self, users: int, concurrency: int, first_tg_id: int) -> float:
+        """
+        Запускает сценарии пользователей с ограничением числа одновременных сессий.
+
+        Возвращает:
+            float: Общее время прогона в секундах.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def limited(tg_id: int) -> None:
+            async with semaphore:
+                await self.user_session(tg_id)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(limited(first_tg_id + number) for number in range(users)))
+        return time.perf_counter() - start
+
+    def report(self, elapsed: float) -> str:
+        """
+        Формирует текстовый отчет по собранной статистике.
+        """
+        def percentile(values: list[float], q: float) -> float:
+            ordered = sorted(values)
+            return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+        lines = [f'{"handler":<36}{"count":>8}{"p50 ms":>10}{"p95 ms":>10}{"p99 ms":>10}{"queries":>10}']
+        total_updates = total_queries = 0
+        for name, values in sorted(self.latencies.items()):
+            queries = self.queries[name]
+            total_updates += len(values)
+            total_queries += sum(queries)
+            lines.append(f'{name:<36}{len(values):>8}'
+                         f'{percentile(values, 0.50) * 1000:>10.2f}'
+                         f'{percentile(values, 0.95) * 1000:>10.2f}'
+                         f'{percentile(values, 0.99) * 1000:>10.2f}'
+                         f'{statistics.mean(queries):>10.2f}')
+        all_latencies = [value for values in self.latencies.values() for value in values]
+        lines.append('')
+        lines.append(f'updates: {total_updates}, elapsed: {elapsed:.2f} s, '
+                     f'throughput: {total_updates / elapsed:.1f} updates/s')
+        lines.append(f'latency p50/p95/p99: {percentile(all_latencies, 0.50) * 1000:.2f}/'
+                     f'{percentile(all_latencies, 0.95) * 1000:.2f}/'
+                     f'{percentile(all_latencies, 0.99) * 1000:.2f} ms, '
+                     f'queries per update: {total_queries / total_updates:.2f}, '
+                     f'api calls: {self.client.api_calls}, over query budget: {self.over_budget}')
+
+        lines.append('')
+        lines.append('slowest queries (total ms, count, handler, statement):')
+        for item in query_summary()[:10]:
+            lines.append(f'{item["total_time"] * 1000:>10.1f}{item["count"]:>8}  {item["handler"]}  '
+                         f'{item["statement"][:120]}')
+        return '\n'.join(lines)
+
+
+async def run_load_test(users: int, tasks_per_user: int, concurrency: int, first_tg_id: int) -> str:
+    await create_bd_tables()
+    await apply_migrations()
+    await outbox.start()
+    load_test = LoadTest(tasks_per_user)
+    elapsed = await load_test.run(users, concurrency, first_tg_id)
+    await outbox.stop()
+    await engine.dispose()
+    await read_engine.dispose()
+    return load_test.report(elapsed)
+
+
+def main_cli() -> None:
+    parser = argparse.ArgumentParser(description='Нагрузочный тест обработчиков бота')
+    parser.add_argument('--users', type=int, default=1000, help='Количество синтетических пользователей')
+    parser.add_argument('--tasks', type=int, default=5, help='Количество задач на пользователя')
+    parser.add_argument('--concurrency', type=int, default=100, help='Количество одновременных пользователей')
+    parser.add_argument('--first-tg-id', type=int, default=10_000_000, help='tg_id первого пользователя')
+    args = parser.parse_args()
+    print(asyncio.run(run_load_test(args.users, args.tasks, args.concurrency, args.first_tg_id)))
+
+
+if __name__ == '__main__':
+    main_cli()
@@ -0,0 +1,119 @@
+"""
+Микро-бенчмарк чтения списка задач.
+
+Сравнивает три способа получить задачи пользователя:
+    orm - объекты Task (select(Task)), как читались списки раньше;
+    row - строки Row только с нужными столбцами (id, name, is_done);
+    dto - те же столбцы, преобразованные в TaskSummary (как в requests.py).
+
+Для каждого способа измеряется скорость чтения в строках в секунду (с открытием сессии) и объем памяти,
+который занимает полученный список, в байтах на строку (tracemalloc). По умолчанию используется временная
+база SQLite (нужен пакет aiosqlite из requirements-dev.txt), другую базу можно указать через переменную DB_URL.
+
+Запуск:
+    python -m benchmarks.task_dto --tasks 10000 --repeat 20
+"""
+import argparse
+import asyncio
+import gc
+import os
+import tempfile
+import time
+import tracemalloc
+
+os.environ.setdefault('API_ID', '0')
+os.environ.setdefault('API_HASH', 'bench')
+os.environ.setdefault('TG_TOKEN', '0:bench')
+for _name in ('POSTGRES_USER', 'POSTGRES_PASSWORD', 'POSTGRES_DATABASE', 'POSTGRES_HOST', 'POSTGRES_PORT'):
+    os.environ.setdefault(_name, '')
+os.environ.setdefault('DB_URL', f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}")
+
+from sqlalchemy import select  # noqa: E402
+
+from src.database.conn import async_session, engine  # noqa: E402
+from src.database.models import Task, create_bd_tables  # noqa: E402
+from src.database.requests import TaskSummary, add_user, add_tasks, get_user_id_by_tg_id  # noqa: E402
+
+
+async def fetch_orm(user_id: int) -> list:
+    async with async_session() as session:
+        return list(await session.scalars(select(Task).where(Task.owner_id == user_id)))
+
+
+async def fetch_rows(user_id: int) -> list:
+    async with async_session() as session:
+        return list(await session.execute(
+            select(Task.id, Task.name, Task.is_done).where(Task.owner_id == user_id)
+        ))
+
+
+async def fetch_dto(user_id: int) -> list:
+    async with async_session() as session:
+        return list(map(TaskSummary._make, await session.execute(
+            select(Task.id, Task.name, Task.is_done).where(Task.owner_id == user_id)
+        )))
+
+
+FETCHERS = {
+    'orm': fetch_orm,
+    'row': fetch_rows,
+    'dto': fetch_dto,
+}
+
+
+async def measure_speed(fetch, user_id: int, repeat: int) -> float:
+    """
+    Возвращает скорость чтения в строках в секунду.
+    """
+    await fetch(user_id)
+    rows = 0
+    start = time.perf_counter()
+    for _ in range(repeat):
+        rows += len(await fetch(user_id))
+    return rows / (time.perf_counter() - start)
+
+
+async def measure_memory(fetch, user_id: int) -> float:
+    """
+    Возвращает объем памяти, занятый полученным списком, в байтах на строку.
+    """
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    tasks = await fetch(user_id)
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (after - before) / max(len(tasks), 1)
+
+
+async def run_benchmark(tasks: int, repeat: int, tg_id: int) -> str:
+    await create_bd_tables()
+    user_id = await get_user_id_by_tg_id(tg_id)
+    if user_id is None:
+        await add_user({'tg_id': tg_id, 'name': 'bench', 'login': f'bench{tg_id}'})
+        user_id = await get_user_id_by_tg_id(tg_id)
+        for start in range(0, tasks, 1000):
+            await add_tasks(user_id, [{'name': f'Задача {number}', 'description': 'Описание задачи ' * 10}
+                                      for number in range(start, min(start + 1000, tasks))])
+
+    lines = [f'Задач: {tasks}, повторов: {repeat}', f'{"способ":<8}{"строк/с":>14}{"байт/строку":>14}']
+    for name, fetch in FETCHERS.items():
+        speed = await measure_speed(fetch, user_id, repeat)
+        memory = await measure_memory(fetch, user_id)
+        lines.append(f'{name:<8}{speed:>14,.0f}{memory:>14,.0f}')
+    await engine.dispose()
+    return '\n'.join(lines)
+
+
+def main_cli() -> None:
+    parser = argparse.ArgumentParser(description='Микро-бенчмарк чтения списка задач')
+    parser.add_argument('--tasks', type=int, default=10000, help='Количество задач пользователя')
+    parser.add_argument('--repeat', type=int, default=20, help='Количество повторов чтения')
+    parser.add_argument('--tg-id', type=int, default=20_000_000, help='tg_id пользователя бенчмарка')
+    args = parser.parse_args()
+    print(asyncio.run(run_benchmark(args.tasks, args.repeat, args.tg_id)))
+
+
+if __name__ == '__main__':
+    main_cli()
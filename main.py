@@ -1,64 +1,231 @@
 import asyncio
 import logging
+import multiprocessing
+import socket
 from pyrogram import Client
 from pyrogram.types import BotCommand
 from pyrogram_patch import patch
 from pyrogram_patch.fsm.storages import MemoryStorage
 
-from src.config import API_ID, API_HASH, TG_TOKEN
+from src.config import (API_ID, API_HASH, TG_TOKEN, FSM_STORAGE, REDIS_URL, FSM_STATE_TTL, METRICS_HOST,
+                        METRICS_PORT, UPDATE_WORKERS, BOT_SHARDS, OUTBOX_GLOBAL_RATE)
 from src.handlers.registration import reg_router
 from src.handlers.menu import menu_router
 from src.handlers.tasks import task_router
 from src.handlers.bot_commands import bot_commands
+from src.handlers.callbacks import callback_router
+from src.handlers.inline import inline_router
+from src.database.conn import engine
 from src.database.models import create_bd_tables
+from src.database.migrations import apply_migrations
+from src.tools.metrics import start_metrics_server
+from src.tools.middlewares import MetricsMiddleware, UserContextMiddleware, instrument_handlers
+from src.tools.outbox import outbox
+from src.tools.reminders import reminder_scheduler
+from src.tools.update_queue import update_queue
+from src.tools.sharding import UpdateForwarder, receive_updates, start_handler_workers
 
 
 async def set_bot_commands(client: Client):
     await client.set_bot_commands([
         BotCommand("start", "Запустить менеджер задач"),
+        BotCommand("find", "Найти задачу"),
+        BotCommand("import", "Добавить задачи списком"),
+        BotCommand("export", "Выгрузить задачи в файл"),
         BotCommand("about", "Информация о боте"),
         BotCommand("code", "Ссылка на GitHub")
     ])
 
 
+def get_storage():
+    """
+    Возвращает хранилище состояний FSM, выбранное в конфигурации.
+
+    Возвращает:
+        RedisStorage, если FSM_STORAGE=redis, иначе MemoryStorage.
+    """
+    if FSM_STORAGE == 'redis':
+        from src.tools.storages import RedisStorage
+        return RedisStorage.from_url(REDIS_URL, ttl=FSM_STATE_TTL)
+    return MemoryStorage()
+
+
 def include_routers(patch_manager, *routers):
     for router in routers:
         patch_manager.include_router(router)
 
 
+def create_app(name: str, **kwargs) -> Client:
+    """
+    Создает клиент Pyrogram, обрабатывающий обновления.
+
+    Аргументы:
+        name (str): Имя сессии клиента.
+        **kwargs: Дополнительные параметры Client.
+
+    Возвращает:
+        Client: Клиент с хранилищем состояний, middleware, маршрутизаторами и очередью обновлений.
+    """
+    app = Client(name=name, api_id=API_ID, api_hash=API_HASH, bot_token=TG_TOKEN, workers=UPDATE_WORKERS, **kwargs)
+    patch_manager = patch(app)
+    patch_manager.set_storage(get_storage())
+    patch_manager.include_middleware(MetricsMiddleware())
+    patch_manager.include_middleware(UserContextMiddleware())
+    include_routers(patch_manager, bot_commands, reg_router, menu_router, task_router, callback_router,
+                    inline_router)
+    update_queue.install(app)
+    return app
+
+
+async def prepare_database():
+    await create_bd_tables()
+    await apply_migrations()
+
+
 async def main():
     """
-    Главная асинхронная функция для запуска бота.
+    Главная асинхронная функция для запуска бота в одном процессе.
 
     Операции:
         - Создает таблицы базы данных, если они еще не существуют.
+        - Применяет новые миграции схемы базы данных.
         - Инициализирует клиент Pyrogram с заданными параметрами.
         - Патчит клиент для работы с состояниями.
-        - Устанавливает хранилище для состояний в памяти.
-        - Подключает маршрутизаторы для регистрации, меню и задач.
-        - Запускает клиент Pyrogram.
+        - Устанавливает хранилище для состояний (в памяти или в Redis).
+        - Подключает middleware статистики обновлений и middleware, определяющий пользователя обновления.
+        - Подключает маршрутизаторы для регистрации, меню, задач и inline-режима.
+        - Подключает очередь обновлений, обрабатывающую обновления одного пользователя по порядку.
+        - Запускает очередь исходящих вызовов и клиент Pyrogram.
+        - Оборачивает обработчики сбором метрик и запускает HTTP-сервер метрик /metrics.
+        - Запускает планировщик напоминаний о сроках задач.
 
     Примечание:
         Убедитесь, что переменные API_ID, API_HASH и TG_TOKEN заданы корректно и доступны в контексте выполнения.
     """
-    await create_bd_tables()
-    app = Client(name="ToDO_bot", api_id=API_ID, api_hash=API_HASH, bot_token=TG_TOKEN)
-    patch_manager = patch(app)
-    patch_manager.set_storage(MemoryStorage())
-    include_routers(patch_manager, bot_commands, reg_router, menu_router, task_router)
+    await prepare_database()
+    app = create_app("ToDO_bot")
+    await outbox.start()
     await app.start()
+    instrument_handlers(app)
+    if METRICS_PORT:
+        await start_metrics_server(METRICS_HOST, METRICS_PORT)
+    reminder_scheduler.start(app)
     await set_bot_commands(app)
 
 
+async def run_shard(shard: int, shards: int, sock: socket.socket) -> None:
+    """
+    Запускает процесс-обработчик, которому принадлежат пользователи с tg_id % shards == shard.
+
+    Клиент процесса создается с no_updates=True: обновления приходят по каналу от принимающего процесса,
+    а клиент только отправляет ответы. Кэши, префиксные индексы и состояния FSM в памяти относятся только
+    к пользователям процесса, поэтому синхронизировать их между процессами не нужно. Общий лимит исходящих
+    вызовов делится между процессами, сервер метрик слушает порт METRICS_PORT + 1 + shard.
+
+    Аргументы:
+        shard (int): Номер процесса.
+        shards (int): Количество процессов.
+        sock (socket.socket): Канал от принимающего процесса.
+    """
+    app = create_app(f"ToDO_bot_shard{shard}", no_updates=True)
+    outbox.set_global_rate(OUTBOX_GLOBAL_RATE / shards)
+    await outbox.start()
+    await app.start()
+    start_handler_workers(app)
+    instrument_handlers(app)
+    if METRICS_PORT:
+        await start_metrics_server(METRICS_HOST, METRICS_PORT + 1 + shard)
+    reminder_scheduler.start(app, shard=(shard, shards))
+    reader, writer = await asyncio.open_unix_connection(sock=sock)
+    try:
+        await receive_updates(app, reader)
+    finally:
+        writer.close()
+    logging.info("Канал процесса %s закрыт, процесс останавливается", shard)
+
+
+def shard_process(shard: int, shards: int, sock: socket.socket, inherited: list[socket.socket]) -> None:
+    # Концы чужих каналов, унаследованные при fork, закрываются, чтобы процессы замечали закрытие своих каналов
+    for other in inherited:
+        other.close()
+    asyncio.run(run_shard(shard, shards, sock))
+
+
+async def run_receiver(socks: list[socket.socket], processes: list[multiprocessing.Process]) -> None:
+    """
+    Запускает принимающий процесс: единственный клиент, получающий обновления от Telegram,
+    передает их процессам-обработчикам и останавливается, если какой-либо из них завершился.
+
+    Аргументы:
+        socks (list[socket.socket]): Каналы процессов-обработчиков в порядке номеров.
+        processes (list[multiprocessing.Process]): Процессы-обработчики.
+    """
+    writers = []
+    for sock in socks:
+        _, writer = await asyncio.open_unix_connection(sock=sock)
+        writers.append(writer)
+    app = Client(name="ToDO_bot", api_id=API_ID, api_hash=API_HASH, bot_token=TG_TOKEN, workers=1)
+    UpdateForwarder(writers).install(app)
+    await app.start()
+    if METRICS_PORT:
+        await start_metrics_server(METRICS_HOST, METRICS_PORT)
+    await set_bot_commands(app)
+    while all(process.is_alive() for process in processes):
+        await asyncio.sleep(1)
+    logging.error("Процесс-обработчик завершился, бот останавливается")
+    await app.stop()
+
+
+def run_supervisor(shards: int) -> None:
+    """
+    Запускает бота в нескольких процессах.
+
+    Операции:
+        - Создает таблицы и применяет миграции, затем закрывает соединения пула, чтобы они не перешли
+          в дочерние процессы.
+        - Создает процессы-обработчики (fork), соединенные с текущим процессом парами Unix socket.
+        - Запускает в текущем процессе прием обновлений (run_receiver).
+
+    Аргументы:
+        shards (int): Количество процессов-обработчиков.
+    """
+    async def prepare():
+        await prepare_database()
+        await engine.dispose()
+
+    asyncio.run(prepare())
+
+    context = multiprocessing.get_context('fork')
+    pairs = [socket.socketpair() for _ in range(shards)]
+    processes = []
+    for shard, (_, child_sock) in enumerate(pairs):
+        inherited = [sock for pair in pairs for sock in pair if sock is not child_sock]
+        process = context.Process(target=shard_process, args=(shard, shards, child_sock, inherited),
+                                  name=f"shard-{shard}", daemon=True)
+        process.start()
+        processes.append(process)
+    for _, child_sock in pairs:
+        child_sock.close()
+
+    try:
+        asyncio.run(run_receiver([parent_sock for parent_sock, _ in pairs], processes))
+    finally:
+        for process in processes:
+            process.terminate()
+            process.join()
+
+
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO)
-    loop = asyncio.get_event_loop()
     try:
         print('Бот запускается. Пожалуйста, подождите...')
-        loop.create_task(main())
-        loop.run_forever()
+        if BOT_SHARDS > 1:
+            run_supervisor(BOT_SHARDS)
+        else:
+            loop = asyncio.get_event_loop()
+            loop.create_task(main())
+            loop.run_forever()
     except KeyboardInterrupt:
         print("Остановка бота. Завершаем все текущие задачи...")
-        loop.stop()
     finally:
         print("Бот успешно остановлен. До новых встреч!")
@@ -1,6 +1,9 @@
+import os
+
 from dotenv import dotenv_values
 
-config = dotenv_values(".env.docker")
+# Переменные окружения имеют приоритет над .env.docker
+config = {**dotenv_values(".env.docker"), **os.environ}
 
 API_ID = config['API_ID']
 API_HASH = config['API_HASH']
@@ -12,3 +15,94 @@ POSTGRES_PASSWORD = config['POSTGRES_PASSWORD']
 POSTGRES_DATABASE = config['POSTGRES_DATABASE']
 POSTGRES_HOST = config['POSTGRES_HOST']
 POSTGRES_PORT = config['POSTGRES_PORT']
+
+# Полный URL подключения SQLAlchemy; если не задан, собирается из POSTGRES_*
+DB_URL = config.get('DB_URL')
+
+USER_CACHE_SIZE = int(config.get('USER_CACHE_SIZE', 10000))
+USER_CACHE_TTL = float(config.get('USER_CACHE_TTL', 600))
+USER_CACHE_NEGATIVE_TTL = float(config.get('USER_CACHE_NEGATIVE_TTL', 30))
+
+FSM_STORAGE = config.get('FSM_STORAGE', 'memory')
+REDIS_URL = config.get('REDIS_URL', 'redis://localhost:6379/0')
+FSM_STATE_TTL = int(config.get('FSM_STATE_TTL', 86400))
+
+TASKS_PAGE_SIZE = int(config.get('TASKS_PAGE_SIZE', 10))
+
+MIGRATIONS_LOCK_TIMEOUT = config.get('MIGRATIONS_LOCK_TIMEOUT', '5s')
+
+TASK_CACHE_SIZE = int(config.get('TASK_CACHE_SIZE', 5000))
+TASK_CACHE_PAGES = int(config.get('TASK_CACHE_PAGES', 16))
+TASK_CACHE_TTL = float(config.get('TASK_CACHE_TTL', 300))
+
+DB_POOL_SIZE = int(config.get('DB_POOL_SIZE', 10))
+DB_MAX_OVERFLOW = int(config.get('DB_MAX_OVERFLOW', 20))
+DB_POOL_TIMEOUT = float(config.get('DB_POOL_TIMEOUT', 30))
+DB_POOL_RECYCLE = int(config.get('DB_POOL_RECYCLE', 1800))
+DB_POOL_PRE_PING = config.get('DB_POOL_PRE_PING', 'true').lower() in ('1', 'true', 'yes')
+DB_STATEMENT_CACHE_SIZE = int(config.get('DB_STATEMENT_CACHE_SIZE', 500))
+
+# Ключ подписи callback_data; по умолчанию выводится из токена бота
+CALLBACK_SECRET = config.get('CALLBACK_SECRET') or f'callback:{TG_TOKEN}'
+
+OUTBOX_WORKERS = int(config.get('OUTBOX_WORKERS', 8))
+OUTBOX_GLOBAL_RATE = float(config.get('OUTBOX_GLOBAL_RATE', 30))
+OUTBOX_CHAT_RATE = float(config.get('OUTBOX_CHAT_RATE', 1))
+OUTBOX_CHAT_BURST = int(config.get('OUTBOX_CHAT_BURST', 3))
+OUTBOX_MAX_RETRIES = int(config.get('OUTBOX_MAX_RETRIES', 3))
+
+# Напоминания: окно предзагрузки (секунды), размер предзагрузки и размер пачки отправки
+REMINDER_WINDOW = int(config.get('REMINDER_WINDOW', 600))
+REMINDER_PREFETCH = int(config.get('REMINDER_PREFETCH', 1000))
+REMINDER_BATCH_SIZE = int(config.get('REMINDER_BATCH_SIZE', 100))
+
+# Адрес HTTP-сервера метрик Prometheus; METRICS_PORT=0 отключает сервер
+METRICS_HOST = config.get('METRICS_HOST', '127.0.0.1')
+METRICS_PORT = int(config.get('METRICS_PORT', 9100))
+
+# Порог медленного SQL-запроса в миллисекундах и допустимое количество запросов на одно обновление
+DB_SLOW_QUERY_MS = float(config.get('DB_SLOW_QUERY_MS', 100))
+DB_QUERY_BUDGET = int(config.get('DB_QUERY_BUDGET', 10))
+
+# Inline-режим: размер и время жизни кэша префиксных индексов, задержка обработки запроса (секунды),
+# время кэширования ответа в Telegram и максимальное количество результатов
+INLINE_INDEX_SIZE = int(config.get('INLINE_INDEX_SIZE', 10000))
+INLINE_INDEX_TTL = int(config.get('INLINE_INDEX_TTL', 600))
+INLINE_DEBOUNCE = float(config.get('INLINE_DEBOUNCE', 0.3))
+INLINE_CACHE_TIME = int(config.get('INLINE_CACHE_TIME', 10))
+INLINE_RESULTS_LIMIT = int(config.get('INLINE_RESULTS_LIMIT', 50))
+
+# Импорт задач: размер пачки вставки, максимальное количество задач и размер файла в байтах
+IMPORT_CHUNK_SIZE = int(config.get('IMPORT_CHUNK_SIZE', 1000))
+IMPORT_MAX_TASKS = int(config.get('IMPORT_MAX_TASKS', 10000))
+IMPORT_MAX_FILE_SIZE = int(config.get('IMPORT_MAX_FILE_SIZE', 5 * 1024 * 1024))
+
+# Экспорт задач: количество строк, читаемых из курсора за раз, и размер файла в байтах,
+# после которого файл переносится из памяти на диск
+EXPORT_BATCH_SIZE = int(config.get('EXPORT_BATCH_SIZE', 1000))
+EXPORT_SPOOL_SIZE = int(config.get('EXPORT_SPOOL_SIZE', 1024 * 1024))
+
+# Telegram-идентификаторы администраторов через запятую
+ADMIN_IDS = frozenset(int(tg_id) for tg_id in config.get('ADMIN_IDS', '').split(',') if tg_id.strip())
+
+# Обработка входящих обновлений: количество воркеров диспетчера и максимальное количество
+# ожидающих обновлений одного пользователя, сверх которого обновления отбрасываются
+UPDATE_WORKERS = int(config.get('UPDATE_WORKERS', 16))
+UPDATE_QUEUE_SIZE = int(config.get('UPDATE_QUEUE_SIZE', 10))
+
+# Количество процессов-обработчиков; при значении больше 1 main.py запускает процесс, принимающий обновления,
+# и распределяет пользователей между процессами по tg_id. SHARD_IPC_BUFFER - размер буфера канала до процесса
+# в байтах, при переполнении которого обновления отбрасываются
+BOT_SHARDS = int(config.get('BOT_SHARDS', 1))
+SHARD_IPC_BUFFER = int(config.get('SHARD_IPC_BUFFER', 16 * 1024 * 1024))
+
+# URL реплики для запросов на чтение (списки, поиск, экспорт); если не задан, чтение идет в основную базу.
+# После изменения своих задач пользователь DB_READ_AFTER_WRITE секунд читает из основной базы
+DB_READ_URL = config.get('DB_READ_URL')
+DB_READ_AFTER_WRITE = float(config.get('DB_READ_AFTER_WRITE', 5))
+
+# Групповой коммит создания, выполнения и удаления задач: максимальная задержка изменения в ожидании пачки
+# (секунды, 0 - отключен), размер пачки и ожидание записи журнала на диск (false - synchronous_commit = off)
+WRITE_BATCH_DELAY = float(config.get('WRITE_BATCH_DELAY', 0))
+WRITE_BATCH_MAX_SIZE = int(config.get('WRITE_BATCH_MAX_SIZE', 100))
+WRITE_BATCH_SYNC_COMMIT = config.get('WRITE_BATCH_SYNC_COMMIT', 'true').lower() in ('1', 'true', 'yes')
@@ -1,9 +1,89 @@
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+import time
 
-from src.config import (POSTGRES_USER, POSTGRES_PASSWORD, POSTGRES_HOST, POSTGRES_PORT, POSTGRES_DATABASE)
+from sqlalchemy import event, make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
-DATABASE_URL = (f"postgresql+asyncpg://{POSTGRES_USER}:{POSTGRES_PASSWORD}@"
-                f"{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DATABASE}")
+from src.config import (DB_URL, POSTGRES_USER, POSTGRES_PASSWORD, POSTGRES_HOST, POSTGRES_PORT, POSTGRES_DATABASE,
+                        DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE, DB_POOL_PRE_PING,
+                        DB_STATEMENT_CACHE_SIZE, DB_READ_URL)
+from src.database.profiling import record_query
+from src.tools.metrics import Histogram, Gauge
 
-engine = create_async_engine(DATABASE_URL)
+DATABASE_URL = DB_URL or (f"postgresql+asyncpg://{POSTGRES_USER}:{POSTGRES_PASSWORD}@"
+                          f"{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DATABASE}")
+
+DB_POOL_WAIT = Histogram('db_pool_checkout_wait_seconds', 'Время ожидания соединения из пула',
+                         buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0, 30.0))
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """
+    Пул соединений, замеряющий время ожидания свободного соединения.
+    """
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_WAIT.observe(time.perf_counter() - start)
+
+
+def create_engine(url: str) -> AsyncEngine:
+    """
+    Создает асинхронный движок с пулом соединений из конфигурации и учетом выполненных запросов
+    в статистике обновления (record_query). Для asyncpg задается размер кэша подготовленных выражений
+    DB_STATEMENT_CACHE_SIZE, если он не указан в самом URL.
+
+    Аргументы:
+        url (str): URL подключения SQLAlchemy.
+
+    Возвращает:
+        AsyncEngine: Движок базы данных.
+    """
+    connect_args = {}
+    parsed_url = make_url(url)
+    if (parsed_url.get_driver_name() == 'asyncpg'
+            and 'prepared_statement_cache_size' not in parsed_url.query):
+        connect_args['prepared_statement_cache_size'] = DB_STATEMENT_CACHE_SIZE
+
+    new_engine = create_async_engine(
+        url,
+        connect_args=connect_args,
+        poolclass=InstrumentedPool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING,
+    )
+    event.listen(new_engine.sync_engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(new_engine.sync_engine, 'after_cursor_execute', _after_cursor_execute)
+    return new_engine
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    context.query_started_at = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    # Запрос учитывается в статистике обновления, во время обработки которого он выполнен
+    rows = cursor.rowcount if cursor.rowcount is not None and cursor.rowcount >= 0 else None
+    record_query(statement, time.perf_counter() - context.query_started_at, rows)
+
+
+# Основная база данных: все изменения и чтения, которым нужны самые свежие данные
+engine = create_engine(DATABASE_URL)
 async_session = async_sessionmaker(engine)
+
+# Реплика для запросов только на чтение; если DB_READ_URL не задан, чтение идет в основную базу
+read_engine = create_engine(DB_READ_URL) if DB_READ_URL else engine
+read_session = async_sessionmaker(read_engine)
+
+Gauge('db_pool_checked_out', 'Количество выданных соединений пула',
+      func=lambda: engine.pool.checkedout())
+Gauge('db_pool_saturation', 'Доля занятых соединений пула с учетом переполнения',
+      func=lambda: engine.pool.checkedout() / max(DB_POOL_SIZE + DB_MAX_OVERFLOW, 1))
+Gauge('db_read_pool_checked_out', 'Количество выданных соединений пула реплики',
+      func=lambda: read_engine.pool.checkedout() if read_engine is not engine else 0)
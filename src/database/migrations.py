@@ -0,0 +1,190 @@
+import logging
+from datetime import datetime
+from typing import NamedTuple
+
+from sqlalchemy import Table, Column, Integer, String, DateTime, MetaData, select, insert, text
+
+from src.config import MIGRATIONS_LOCK_TIMEOUT
+from src.database.conn import engine
+from src.database.models import TASK_SEARCH_VECTOR
+
+logger = logging.getLogger(__name__)
+
+# Произвольный ключ advisory lock, под которым миграции применяет только одна копия бота
+MIGRATIONS_LOCK_KEY = 7_141_592
+
+schema_migrations = Table(
+    'schema_migrations', MetaData(),
+    Column('version', Integer, primary_key=True),
+    Column('description', String(250)),
+    Column('applied_at', DateTime, default=datetime.now),
+)
+
+
+class Migration(NamedTuple):
+    """
+    Описание миграции схемы базы данных.
+
+    Атрибуты:
+        version (int): Номер миграции; миграции применяются по возрастанию номера.
+        description (str): Краткое описание изменений.
+        statements (dict[str, tuple[str, ...]]): SQL-выражения для каждого диалекта ('postgresql', 'sqlite').
+        transactional (bool): Выполнять ли выражения в транзакции. Для CREATE INDEX CONCURRENTLY
+            и других выражений, запрещенных внутри транзакции, должно быть False.
+        concurrent_indexes (tuple[str, ...]): Имена индексов, которые миграция создает в PostgreSQL
+            через CREATE INDEX CONCURRENTLY. Невалидный индекс, оставшийся после прерванного построения,
+            удаляется перед миграцией, а после неё проверяется, что индексы валидны.
+    """
+    version: int
+    description: str
+    statements: dict[str, tuple[str, ...]]
+    transactional: bool = True
+    concurrent_indexes: tuple[str, ...] = ()
+
+
+MIGRATIONS: list[Migration] = [
+    Migration(
+        version=1,
+        description='Составной индекс tasks(owner_id, is_done, id) для списков задач',
+        statements={
+            'postgresql': (
+                'CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tasks_owner_done_id '
+                'ON tasks (owner_id, is_done, id) INCLUDE (name)',
+            ),
+            'sqlite': (
+                'CREATE INDEX IF NOT EXISTS idx_tasks_owner_done_id ON tasks (owner_id, is_done, id)',
+            ),
+        },
+        transactional=False,
+        concurrent_indexes=('idx_tasks_owner_done_id',),
+    ),
+    Migration(
+        version=2,
+        description='Поля tasks.due_at и tasks.reminded_at для напоминаний о сроках задач',
+        statements={
+            'postgresql': (
+                'ALTER TABLE tasks ADD COLUMN IF NOT EXISTS due_at TIMESTAMP WITHOUT TIME ZONE',
+                'ALTER TABLE tasks ADD COLUMN IF NOT EXISTS reminded_at TIMESTAMP WITHOUT TIME ZONE',
+            ),
+            # SQLite используется только для нагрузочного теста на новой базе,
+            # где поля уже созданы create_bd_tables
+            'sqlite': (),
+        },
+    ),
+    Migration(
+        version=3,
+        description='Частичный индекс tasks(due_at) по неотправленным напоминаниям',
+        statements={
+            'postgresql': (
+                'CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tasks_due_reminder '
+                'ON tasks (due_at) WHERE reminded_at IS NULL',
+            ),
+            'sqlite': (
+                'CREATE INDEX IF NOT EXISTS idx_tasks_due_reminder ON tasks (due_at) WHERE reminded_at IS NULL',
+            ),
+        },
+        transactional=False,
+        concurrent_indexes=('idx_tasks_due_reminder',),
+    ),
+    Migration(
+        version=4,
+        description='Расширение btree_gin для составного GIN-индекса поиска по задачам',
+        statements={
+            'postgresql': (
+                'CREATE EXTENSION IF NOT EXISTS btree_gin',
+            ),
+            # В SQLite поиск выполняется через LIKE
+            'sqlite': (),
+        },
+    ),
+    Migration(
+        version=5,
+        description='GIN-индекс tasks(owner_id, tsvector) для поиска по задачам пользователя',
+        statements={
+            # Индекс по выражению вместо хранимого столбца: добавление генерируемого столбца переписывает
+            # всю таблицу под ACCESS EXCLUSIVE, а индекс строится CONCURRENTLY без блокировки записи
+            'postgresql': (
+                f'CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tasks_owner_search '
+                f'ON tasks USING gin (owner_id, {TASK_SEARCH_VECTOR})',
+            ),
+            'sqlite': (),
+        },
+        transactional=False,
+        concurrent_indexes=('idx_tasks_owner_search',),
+    ),
+]
+
+
+async def _index_valid(conn, name: str) -> bool | None:
+    # Валидность индекса по pg_index.indisvalid; None, если индекса нет
+    return await conn.scalar(text(
+        'SELECT i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid '
+        'WHERE c.relname = :name AND pg_catalog.pg_table_is_visible(c.oid)'
+    ), {'name': name})
+
+
+async def _drop_invalid_indexes(conn, names: tuple[str, ...]) -> None:
+    # CREATE INDEX CONCURRENTLY, завершившийся ошибкой или отмененный, оставляет невалидный индекс,
+    # который IF NOT EXISTS при повторном запуске пропустил бы
+    for name in names:
+        if await _index_valid(conn, name) is False:
+            logger.warning('Удаление невалидного индекса %s, оставшегося после прерванного построения', name)
+            await conn.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS {name}'))
+
+
+async def _check_indexes_valid(conn, migration: Migration) -> None:
+    for name in migration.concurrent_indexes:
+        if not await _index_valid(conn, name):
+            raise RuntimeError(f'Миграция {migration.version}: индекс {name} не создан или невалиден')
+
+
+async def apply_migrations() -> None:
+    """
+    Применяет к базе данных еще не примененные миграции из MIGRATIONS.
+
+    Операции:
+        - Создает таблицу schema_migrations, если её нет.
+        - В PostgreSQL берет advisory lock, чтобы миграции не применялись параллельно
+          несколькими копиями бота, и ограничивает ожидание блокировок lock_timeout.
+        - Выполняет выражения каждой новой миграции в транзакции или, для нетранзакционных
+          миграций, в режиме autocommit, и записывает номер миграции в schema_migrations.
+        - Перед построением индексов CONCURRENTLY удаляет их невалидные остатки, а перед записью
+          номера миграции проверяет, что индексы валидны.
+
+    Исключения:
+        RuntimeError: Если индекс, созданный миграцией CONCURRENTLY, невалиден.
+    """
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level='AUTOCOMMIT')
+        dialect = conn.dialect.name
+        if dialect == 'postgresql':
+            await conn.execute(text('SELECT pg_advisory_lock(:key)'), {'key': MIGRATIONS_LOCK_KEY})
+            await conn.execute(text(f"SET lock_timeout = '{MIGRATIONS_LOCK_TIMEOUT}'"))
+        try:
+            await conn.run_sync(schema_migrations.create, checkfirst=True)
+            applied = set(await conn.scalars(select(schema_migrations.c.version)))
+
+            for migration in sorted(MIGRATIONS, key=lambda m: m.version):
+                if migration.version in applied:
+                    continue
+                logger.info('Применение миграции %s: %s', migration.version, migration.description)
+                statements = migration.statements.get(dialect, ())
+                if migration.transactional:
+                    async with engine.begin() as tx_conn:
+                        if dialect == 'postgresql':
+                            await tx_conn.execute(text(f"SET LOCAL lock_timeout = '{MIGRATIONS_LOCK_TIMEOUT}'"))
+                        for statement in statements:
+                            await tx_conn.execute(text(statement))
+                else:
+                    if dialect == 'postgresql':
+                        await _drop_invalid_indexes(conn, migration.concurrent_indexes)
+                    for statement in statements:
+                        await conn.execute(text(statement))
+                    if dialect == 'postgresql':
+                        await _check_indexes_valid(conn, migration)
+                await conn.execute(insert(schema_migrations).values(
+                    version=migration.version, description=migration.description
+                ))
+        finally:
+            if dialect == 'postgresql':
+                await conn.execute(text('SELECT pg_advisory_unlock(:key)'), {'key': MIGRATIONS_LOCK_KEY})
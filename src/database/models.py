@@ -1,11 +1,20 @@
 from typing import List
 from datetime import datetime
-from sqlalchemy import BigInteger, String, ForeignKey, Boolean, DateTime, Index
+from sqlalchemy import BigInteger, String, ForeignKey, Boolean, DateTime, Index, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship, DeclarativeBase
 from sqlalchemy.ext.asyncio import AsyncAttrs
 
 from src.database.conn import engine
 
+# Конфигурация полнотекстового поиска PostgreSQL. Входит в выражение GIN-индекса idx_tasks_owner_search,
+# поэтому изменить её можно только новой миграцией.
+TASK_SEARCH_CONFIG = 'russian'
+
+# Выражение tsvector задачи (совпадения в названии важнее). Запрос поиска должен использовать то же выражение,
+# что и индекс, иначе индекс не применяется.
+TASK_SEARCH_VECTOR = (f"(setweight(to_tsvector('{TASK_SEARCH_CONFIG}', coalesce(name, '')), 'A') || "
+                      f"setweight(to_tsvector('{TASK_SEARCH_CONFIG}', coalesce(description, '')), 'B'))")
+
 
 class Base(AsyncAttrs, DeclarativeBase):
     """
@@ -66,11 +75,18 @@ class Task(Base):
         name (str): Название задачи, максимум 50 символов.
         description (str): Описание задачи, максимум 250 символов.
         owner_id (int): Идентификатор владельца задачи.
+        due_at (datetime | None): Срок выполнения задачи, о котором бот напоминает владельцу.
+        reminded_at (datetime | None): Дата и время отправки напоминания; None, пока напоминание не отправлено.
         created_at (datetime): Дата и время создания задачи.
         update_at (datetime): Дата и время последнего обновления данных задачи.
 
     Связи:
         owner: Задача принадлежит одному пользователю.
+
+    Примечание:
+        В PostgreSQL для поиска по задачам миграцией создается GIN-индекс по выражению TASK_SEARCH_VECTOR
+        (tsvector по полям name и description). Он не описан в модели, чтобы схема оставалась
+        совместимой с SQLite.
     """
     __tablename__ = 'tasks'
 
@@ -79,6 +95,8 @@ class Task(Base):
     name: Mapped[str] = mapped_column(String(50))
     description: Mapped[str] = mapped_column(String(250))
     owner_id: Mapped[int] = mapped_column(ForeignKey('users.id'))
+    due_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    reminded_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now())
     update_at: Mapped[datetime] = mapped_column(DateTime,
                                                 default=datetime.now(),
@@ -86,6 +104,12 @@ class Task(Base):
 
     owner: Mapped["User"] = relationship("User", back_populates="tasks")
 
+    __table_args__ = (
+        Index('idx_tasks_owner_done_id', 'owner_id', 'is_done', 'id', postgresql_include=['name']),
+        Index('idx_tasks_due_reminder', 'due_at',
+              postgresql_where=text('reminded_at IS NULL'), sqlite_where=text('reminded_at IS NULL')),
+    )
+
 
 async def create_bd_tables() -> None:
     """
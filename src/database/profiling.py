@@ -0,0 +1,183 @@
+import logging
+import re
+from collections import Counter as Occurrences
+from contextlib import contextmanager
+from typing import Iterator, NamedTuple
+
+from src.config import DB_SLOW_QUERY_MS, DB_QUERY_BUDGET
+from src.tools.metrics import Counter, Histogram, UpdateStats, current_update
+
+logger = logging.getLogger(__name__)
+
+# Максимальное количество различных запросов в сводке query_summary
+SUMMARY_LIMIT = 1000
+
+DB_QUERY_TIME = Histogram('db_query_seconds', 'Время выполнения SQL-запросов')
+DB_SLOW_QUERIES = Counter('db_slow_queries_total', 'Количество медленных SQL-запросов', ('router', 'handler'))
+DB_QUERY_BUDGET_EXCEEDED = Counter('db_query_budget_exceeded_total',
+                                   'Количество обновлений, превысивших бюджет SQL-запросов', ('router', 'handler'))
+
+_WHITESPACE = re.compile(r'\s+')
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER = re.compile(r'\$\d+|\?|%\(\w+\)s|:\w+')
+_PLACEHOLDER_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+
+
+class QueryRecord(NamedTuple):
+    """
+    Выполненный SQL-запрос.
+
+    Атрибуты:
+        statement (str): Нормализованный текст запроса.
+        duration (float): Время выполнения в секундах.
+        rows (int | None): Количество строк, если драйвер его сообщает.
+    """
+    statement: str
+    duration: float
+    rows: int | None
+
+
+class QueryTotals:
+    """
+    Накопленная статистика одного нормализованного запроса одного обработчика.
+    """
+    __slots__ = ('count', 'total_time', 'max_time', 'rows')
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.rows = 0
+
+
+# (обработчик, нормализованный запрос) -> накопленная статистика
+_query_totals: dict[tuple[str, str], QueryTotals] = {}
+
+
+def normalize_statement(statement: str) -> str:
+    """
+    Приводит текст SQL-запроса к виду, не зависящему от параметров.
+
+    Литералы и параметры заменяются на "?", списки параметров IN (?, ?, ...) сворачиваются в "(...)",
+    пробельные символы схлопываются.
+
+    Аргументы:
+        statement (str): Текст запроса.
+
+    Возвращает:
+        str: Нормализованный текст запроса.
+    """
+    statement = _STRING_LITERAL.sub('?', statement)
+    statement = _PLACEHOLDER.sub('?', statement)
+    statement = _NUMBER_LITERAL.sub('?', statement)
+    statement = _PLACEHOLDER_LIST.sub('(...)', statement)
+    return _WHITESPACE.sub(' ', statement).strip()
+
+
+def _handler_name(stats: UpdateStats | None) -> str:
+    if stats is None or not stats.handler:
+        return '-'
+    return f'{stats.router}.{stats.handler}'
+
+
+def record_query(statement: str, duration: float, rows: int | None) -> None:
+    """
+    Учитывает выполненный SQL-запрос в статистике текущего обновления и в сводке по обработчикам.
+    Медленные запросы записываются в лог вместе с обработчиком, который их выполнил.
+
+    Аргументы:
+        statement (str): Текст запроса.
+        duration (float): Время выполнения в секундах.
+        rows (int | None): Количество строк, если драйвер его сообщает.
+    """
+    DB_QUERY_TIME.observe(duration)
+    stats = current_update.get()
+    normalized = normalize_statement(statement)
+    if stats is not None:
+        stats.db_queries += 1
+        stats.db_time += duration
+        stats.queries.append(QueryRecord(normalized, duration, rows))
+
+    handler = _handler_name(stats)
+    if duration * 1000 >= DB_SLOW_QUERY_MS:
+        DB_SLOW_QUERIES.inc(router=stats.router if stats else '', handler=stats.handler if stats else '')
+        logger.warning('Медленный SQL-запрос (%.1f мс) в обработчике %s: %s', duration * 1000, handler, normalized)
+
+    key = (handler, normalized)
+    totals = _query_totals.get(key)
+    if totals is None:
+        if len(_query_totals) >= SUMMARY_LIMIT:
+            return
+        totals = _query_totals[key] = QueryTotals()
+    totals.count += 1
+    totals.total_time += duration
+    totals.max_time = max(totals.max_time, duration)
+    totals.rows += max(rows or 0, 0)
+
+
+def check_query_budget(stats: UpdateStats, budget: int = DB_QUERY_BUDGET) -> bool:
+    """
+    Проверяет, не превысило ли обновление бюджет SQL-запросов (признак проблемы N+1).
+
+    Превышение записывается в лог вместе с чаще всего повторявшимся запросом.
+
+    Аргументы:
+        stats (UpdateStats): Статистика обновления.
+        budget (int): Допустимое количество запросов на обновление.
+
+    Возвращает:
+        bool: True, если бюджет превышен.
+    """
+    if stats.db_queries <= budget:
+        return False
+    DB_QUERY_BUDGET_EXCEEDED.inc(router=stats.router, handler=stats.handler)
+    statement, repeats = Occurrences(query.statement for query in stats.queries).most_common(1)[0]
+    logger.warning('Обработчик %s выполнил %s SQL-запросов за одно обновление (бюджет %s); '
+                   'запрос повторен %s раз: %s', _handler_name(stats), stats.db_queries, budget, repeats, statement)
+    return True
+
+
+def query_summary() -> list[dict]:
+    """
+    Возвращает накопленную статистику запросов по обработчикам.
+
+    Возвращает:
+        list[dict]: Записи с ключами handler, statement, count, total_time, max_time и rows,
+        отсортированные по убыванию суммарного времени.
+    """
+    summary = [
+        {'handler': handler, 'statement': statement, 'count': totals.count, 'total_time': totals.total_time,
+         'max_time': totals.max_time, 'rows': totals.rows}
+        for (handler, statement), totals in _query_totals.items()
+    ]
+    return sorted(summary, key=lambda item: item['total_time'], reverse=True)
+
+
+def reset_query_summary() -> None:
+    """
+    Очищает накопленную статистику запросов.
+    """
+    _query_totals.clear()
+
+
+@contextmanager
+def capture_queries() -> Iterator[UpdateStats]:
+    """
+    Собирает SQL-запросы, выполненные внутри блока, в отдельную статистику обновления.
+
+    Используется в тестах и нагрузочном тесте, чтобы проверить бюджет запросов обработчика:
+
+        with capture_queries() as stats:
+            await handler(client, update)
+        assert stats.db_queries <= 2
+
+    Возвращает:
+        UpdateStats: Статистика, в которую записываются запросы блока.
+    """
+    stats = UpdateStats()
+    token = current_update.set(stats)
+    try:
+        yield stats
+    finally:
+        current_update.reset(token)
@@ -1,7 +1,90 @@
-from sqlalchemy import select, delete
+from datetime import datetime
+from typing import NamedTuple, AsyncIterator
 
-from src.database.conn import async_session
-from src.database.models import User, Task
+from sqlalchemy import select, delete, update, insert, tuple_, func, case, literal_column
+
+from src.config import (USER_CACHE_SIZE, USER_CACHE_TTL, USER_CACHE_NEGATIVE_TTL, TASKS_PAGE_SIZE,
+                        TASK_CACHE_SIZE, TASK_CACHE_PAGES, TASK_CACHE_TTL, INLINE_INDEX_SIZE, INLINE_INDEX_TTL,
+                        EXPORT_BATCH_SIZE, DB_READ_AFTER_WRITE, WRITE_BATCH_DELAY, WRITE_BATCH_MAX_SIZE,
+                        WRITE_BATCH_SYNC_COMMIT)
+from src.database.conn import async_session, read_session, engine
+from src.database.models import User, Task, TASK_SEARCH_CONFIG, TASK_SEARCH_VECTOR
+from src.database.write_batch import WriteBatcher
+from src.tools.cache import TTLCache, GroupedTTLCache, MISSING
+from src.tools.task_index import TaskPrefixIndex, UserTaskIndex, IndexedTask
+
+# tg_id -> users.id; None означает, что пользователь не зарегистрирован
+user_cache = TTLCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL)
+
+# users.id -> страницы списков задач пользователя; сбрасывается при любом изменении его задач
+task_list_cache = GroupedTTLCache(maxsize=TASK_CACHE_SIZE, ttl=TASK_CACHE_TTL, group_size=TASK_CACHE_PAGES)
+
+# users.id пользователей, недавно изменивших свои задачи; их запросы на чтение идут в основную базу
+recent_writers = TTLCache(maxsize=USER_CACHE_SIZE, ttl=DB_READ_AFTER_WRITE)
+
+# Групповой коммит add_task, mark_task_as_complete и delete_task
+write_batcher = WriteBatcher(async_session, delay=WRITE_BATCH_DELAY, max_size=WRITE_BATCH_MAX_SIZE,
+                             synchronous_commit=WRITE_BATCH_SYNC_COMMIT)
+
+# users.id -> префиксный индекс названий задач для inline-режима; обновляется функциями изменения задач
+task_index = TaskPrefixIndex(maxsize=INLINE_INDEX_SIZE, ttl=INLINE_INDEX_TTL)
+
+_TASK_STATUS_CRITERIA = {
+    'all': (),
+    'actual': (Task.is_done == False,),
+    'completed': (Task.is_done == True,),
+}
+
+
+class TaskSummary(NamedTuple):
+    """
+    Задача в списке задач и результатах поиска.
+
+    Атрибуты:
+        id (int): Идентификатор задачи.
+        name (str): Название задачи.
+        is_done (bool): Статус выполнения задачи.
+    """
+    id: int
+    name: str
+    is_done: bool
+
+
+class TaskDetail(NamedTuple):
+    """
+    Карточка задачи.
+
+    Атрибуты:
+        id (int): Идентификатор задачи.
+        name (str): Название задачи.
+        description (str): Описание задачи.
+        is_done (bool): Статус выполнения задачи.
+        due_at (datetime | None): Срок выполнения задачи.
+    """
+    id: int
+    name: str
+    description: str
+    is_done: bool
+    due_at: datetime | None
+
+
+# Столбцы, из которых строятся TaskSummary и TaskDetail: запросы читают только их, без загрузки объектов Task
+_SUMMARY_COLUMNS = (Task.id, Task.name, Task.is_done)
+_DETAIL_COLUMNS = (Task.id, Task.name, Task.description, Task.is_done, Task.due_at)
+
+
+class TasksPage(NamedTuple):
+    """
+    Страница списка задач.
+
+    Атрибуты:
+        tasks (list[TaskSummary]): Задачи страницы, отсортированные по полям 'is_done' и 'id'.
+        has_prev (bool): Есть ли задачи перед страницей.
+        has_next (bool): Есть ли задачи после страницы.
+    """
+    tasks: list[TaskSummary]
+    has_prev: bool
+    has_next: bool
 
 
 async def add_user(user_data: dict) -> None:
@@ -12,156 +95,508 @@ async def add_user(user_data: dict) -> None:
         user_data (dict): Словарь с данными пользователя. Должен содержать ключи 'tg_id', 'name' и 'login'.
     """
     async with async_session() as session:
-        session.add(User(
+        user = User(
             tg_id=user_data['tg_id'],
             name=user_data['name'],
             login=user_data['login']
-        ))
+        )
+        session.add(user)
+        await session.flush()
+        user_id = user.id
         await session.commit()
+    user_cache.set(user_data['tg_id'], user_id)
 
 
-async def get_user_id_by_tg_id(tg_id: int) -> int:
+async def get_user_id_by_tg_id(tg_id: int) -> int | None:
     """
     Получает идентификатор пользователя по его идентификатору в Telegram.
 
+    Результат, в том числе отсутствие пользователя, кэшируется в user_cache,
+    поэтому повторные проверки регистрации не обращаются к базе данных.
+
     Аргументы:
         tg_id (int): Идентификатор пользователя в Telegram.
 
     Возвращает:
-        int: Идентификатор пользователя в базе данных.
+        int | None: Идентификатор пользователя в базе данных или None, если пользователь не зарегистрирован.
     """
+    user_id = user_cache.get(tg_id)
+    if user_id is not MISSING:
+        return user_id
+
     async with async_session() as session:
-        return await session.scalar(select(User.id).where(User.tg_id == tg_id))
+        user_id = await session.scalar(select(User.id).where(User.tg_id == tg_id))
+    user_cache.set(tg_id, user_id, ttl=None if user_id is not None else USER_CACHE_NEGATIVE_TTL)
+    return user_id
+
+
+def invalidate_user_tasks(user_id: int) -> None:
+    """
+    Сбрасывает закэшированные списки задач пользователя. Вызывается после каждого изменения его задач.
+
+    Следующие DB_READ_AFTER_WRITE секунд запросы пользователя на чтение выполняются в основной базе,
+    чтобы он видел свои изменения, даже если реплика еще не получила их.
+
+    Аргументы:
+        user_id (int): Идентификатор пользователя в базе данных.
+    """
+    task_list_cache.invalidate(user_id)
+    recent_writers.set(user_id, True)
+
+
+def _read_session(user_id: int | None = None):
+    """
+    Открывает сессию для запроса только на чтение.
+
+    Аргументы:
+        user_id (int | None): Пользователь, данные которого читаются.
+
+    Возвращает:
+        AsyncSession: Сессия реплики или основной базы, если пользователь недавно изменял свои задачи.
+    """
+    if user_id is not None and recent_writers.get(user_id) is not MISSING:
+        return async_session()
+    return read_session()
+
 
+async def _insert_tasks(session, rows: list[dict]) -> list[int]:
+    # Операция группового коммита: одна многострочная вставка, идентификаторы в порядке строк
+    return list(await session.scalars(insert(Task).returning(Task.id, sort_by_parameter_order=True), rows))
 
-async def add_task(task_data: dict) -> None:
+
+async def add_task(task_data: dict) -> int:
     """
     Добавляет новую задачу в базу данных.
 
+    Вставка выполняется через write_batcher: при включенном групповом коммите задачи, созданные
+    одновременно разными пользователями, вставляются одним запросом в одной транзакции.
+
+    Аргументы:
+        task_data (dict): Словарь с данными задачи. Должен содержать ключи 'name', 'description' и 'owner_id'
+            и может содержать ключ 'due_at' со сроком выполнения задачи.
+
+    Возвращает:
+        int: Идентификатор созданной задачи.
+    """
+    task_id = await write_batcher.submit(_insert_tasks, {
+        'name': task_data['name'],
+        'description': task_data['description'],
+        'owner_id': task_data['owner_id'],
+        'due_at': task_data.get('due_at'),
+    })
+    invalidate_user_tasks(task_data['owner_id'])
+    task_index.add(task_data['owner_id'],
+                   IndexedTask(task_id, task_data['name'], task_data['description'], False))
+    return task_id
+
+
+async def add_tasks(owner_id: int, tasks: list[dict]) -> int:
+    """
+    Добавляет пачку задач пользователя одной транзакцией.
+
+    Задачи вставляются выражением INSERT ... RETURNING с набором параметров: для него SQLAlchemy
+    (insertmanyvalues) выполняет многострочные INSERT ... VALUES по insertmanyvalues_page_size строк,
+    а не отдельный запрос на каждую задачу. Без RETURNING набор параметров для asyncpg выполняется
+    через executemany - по запросу на строку.
+
     Аргументы:
-        task_data (dict): Словарь с данными задачи. Должен содержать ключи 'name', 'description' и 'owner_id'.
+        owner_id (int): Идентификатор владельца задач.
+        tasks (list[dict]): Задачи; каждая должна содержать ключи 'name' и 'description'.
+
+    Возвращает:
+        int: Количество добавленных задач.
     """
+    if not tasks:
+        return 0
     async with async_session() as session:
-        session.add(Task(
-            name=task_data['name'],
-            description=task_data['description'],
-            owner_id=task_data['owner_id']
-        ))
-        await session.commit()
+        async with session.begin():
+            task_ids = list(await session.scalars(insert(Task).returning(Task.id), [
+                {'name': task['name'], 'description': task['description'], 'owner_id': owner_id}
+                for task in tasks
+            ]))
+    invalidate_user_tasks(owner_id)
+    task_index.discard(owner_id)
+    return len(task_ids)
 
 
-async def get_all_tasks_list(tg_id: int) -> list[Task]:
+async def _get_tasks_page(user_id: int, status: str, after: tuple[bool, int] | None = None,
+                          before: tuple[bool, int] | None = None, limit: int = TASKS_PAGE_SIZE) -> TasksPage:
     """
-    Получает список всех задач пользователя по его идентификатору в Telegram.
+    Получает страницу задач пользователя с постраничной навигацией по ключу (is_done, id).
+
+    Страницы кэшируются в task_list_cache, поэтому повторное открытие того же списка
+    не обращается к базе данных, пока задачи пользователя не изменятся.
 
     Аргументы:
-        tg_id (int): Идентификатор пользователя в Telegram.
+        user_id (int): Идентификатор пользователя в базе данных.
+        status (str): Отбираемые задачи: 'all', 'actual' или 'completed'.
+        after (tuple[bool, int] | None): Курсор последней задачи предыдущей страницы.
+        before (tuple[bool, int] | None): Курсор первой задачи следующей страницы.
+        limit (int): Максимальное количество задач на странице.
 
     Возвращает:
-        list[Task]: Список всех задач пользователя, отсортированных по полю 'is_done'.
+        TasksPage: Страница задач.
     """
-    async with async_session() as session:
-        user_subquery = select(User.id).where(User.tg_id == tg_id).scalar_subquery()
-        result = await session.scalars(
-            select(Task).where(Task.owner_id == user_subquery).order_by(Task.is_done)
-        )
-        return result
+    page_key = (status, after, before, limit)
+    page = task_list_cache.get(user_id, page_key)
+    if page is not MISSING:
+        return page
+    # Страница, прочитанная до параллельного изменения задач, не сохраняется после его инвалидации
+    generation = task_list_cache.generation(user_id)
+
+    async with _read_session(user_id) as session:
+        query = (select(*_SUMMARY_COLUMNS)
+                 .where(Task.owner_id == user_id, *_TASK_STATUS_CRITERIA[status]))
+        key = tuple_(Task.is_done, Task.id)
+        if before is not None:
+            query = query.where(key < tuple_(*before)).order_by(Task.is_done.desc(), Task.id.desc())
+        else:
+            if after is not None:
+                query = query.where(key > tuple_(*after))
+            query = query.order_by(Task.is_done, Task.id)
+        tasks = list(map(TaskSummary._make, await session.execute(query.limit(limit + 1))))
+
+    has_more = len(tasks) > limit
+    tasks = tasks[:limit]
+    if before is not None:
+        tasks.reverse()
+        page = TasksPage(tasks, has_prev=has_more, has_next=True)
+    else:
+        page = TasksPage(tasks, has_prev=after is not None, has_next=has_more)
+    task_list_cache.set(user_id, page_key, page, generation)
+    return page
+
+
+async def get_all_tasks_list(user_id: int, after: tuple[bool, int] | None = None,
+                             before: tuple[bool, int] | None = None, limit: int = TASKS_PAGE_SIZE) -> TasksPage:
+    """
+    Получает страницу всех задач пользователя.
+
+    Аргументы:
+        user_id (int): Идентификатор пользователя в базе данных.
+        after (tuple[bool, int] | None): Курсор, после которого начинается страница.
+        before (tuple[bool, int] | None): Курсор, перед которым заканчивается страница.
+        limit (int): Максимальное количество задач на странице.
+
+    Возвращает:
+        TasksPage: Страница задач пользователя, отсортированных по полям 'is_done' и 'id'.
+    """
+    return await _get_tasks_page(user_id, 'all', after=after, before=before, limit=limit)
 
 
-async def get_completed_tasks_list(tg_id: int) -> list[Task]:
+async def get_completed_tasks_list(user_id: int, after: tuple[bool, int] | None = None,
+                                   before: tuple[bool, int] | None = None,
+                                   limit: int = TASKS_PAGE_SIZE) -> TasksPage:
     """
-    Получает список завершенных задач пользователя по его идентификатору в Telegram.
+    Получает страницу завершенных задач пользователя.
 
     Аргументы:
-        tg_id (int): Идентификатор пользователя в Telegram.
+        user_id (int): Идентификатор пользователя в базе данных.
+        after (tuple[bool, int] | None): Курсор, после которого начинается страница.
+        before (tuple[bool, int] | None): Курсор, перед которым заканчивается страница.
+        limit (int): Максимальное количество задач на странице.
 
     Возвращает:
-        list[Task]: Список завершенных задач пользователя.
+        TasksPage: Страница завершенных задач пользователя.
     """
-    async with async_session() as session:
-        user_subquery = select(User.id).where(User.tg_id == tg_id).scalar_subquery()
-        result = await session.scalars(
-            select(Task).where(Task.owner_id == user_subquery, Task.is_done == True)
-        )
-        return result
+    return await _get_tasks_page(user_id, 'completed', after=after, before=before, limit=limit)
 
 
-async def get_actual_tasks_list(tg_id: int) -> list[Task]:
+async def get_actual_tasks_list(user_id: int, after: tuple[bool, int] | None = None,
+                                before: tuple[bool, int] | None = None,
+                                limit: int = TASKS_PAGE_SIZE) -> TasksPage:
     """
-    Получает список актуальных (незавершенных) задач пользователя по его идентификатору в Telegram.
+    Получает страницу актуальных (незавершенных) задач пользователя.
 
     Аргументы:
-        tg_id (int): Идентификатор пользователя в Telegram.
+        user_id (int): Идентификатор пользователя в базе данных.
+        after (tuple[bool, int] | None): Курсор, после которого начинается страница.
+        before (tuple[bool, int] | None): Курсор, перед которым заканчивается страница.
+        limit (int): Максимальное количество задач на странице.
 
     Возвращает:
-        list[Task]: Список актуальных задач пользователя.
+        TasksPage: Страница актуальных задач пользователя.
     """
-    async with async_session() as session:
-        user_subquery = select(User.id).where(User.tg_id == tg_id).scalar_subquery()
-        result = await session.scalars(
-            select(Task).where(Task.owner_id == user_subquery, Task.is_done == False)
-        )
-        return result
+    return await _get_tasks_page(user_id, 'actual', after=after, before=before, limit=limit)
+
+
+async def search_tasks(user_id: int, query: str, offset: int = 0, limit: int = TASKS_PAGE_SIZE) -> TasksPage:
+    """
+    Ищет задачи пользователя по названию и описанию.
+
+    В PostgreSQL используется полнотекстовый поиск по выражению TASK_SEARCH_VECTOR с GIN-индексом
+    idx_tasks_owner_search; результаты упорядочены по релевантности (совпадения в названии важнее).
+    В SQLite (нагрузочный тест) выполняется поиск подстроки (регистр не учитывается только для латиницы):
+    сначала совпадения в названии, затем в описании. Страницы результатов кэшируются вместе со списками задач.
+
+    Аргументы:
+        user_id (int): Идентификатор пользователя в базе данных.
+        query (str): Поисковый запрос.
+        offset (int): Количество пропускаемых результатов.
+        limit (int): Максимальное количество задач на странице.
+
+    Возвращает:
+        TasksPage: Страница найденных задач.
+    """
+    page_key = ('search', query, offset, limit)
+    page = task_list_cache.get(user_id, page_key)
+    if page is not MISSING:
+        return page
+    # Страница, прочитанная до параллельного изменения задач, не сохраняется после его инвалидации
+    generation = task_list_cache.generation(user_id)
+
+    statement = select(*_SUMMARY_COLUMNS)
+    if engine.dialect.name == 'postgresql':
+        ts_query = func.websearch_to_tsquery(literal_column(f"'{TASK_SEARCH_CONFIG}'::regconfig"), query)
+        search_vector = literal_column(TASK_SEARCH_VECTOR)
+        statement = (statement
+                     .where(Task.owner_id == user_id, search_vector.op('@@')(ts_query))
+                     .order_by(func.ts_rank(search_vector, ts_query).desc(), Task.id))
+    else:
+        pattern = query.lower()
+        in_name = func.lower(Task.name).contains(pattern, autoescape=True)
+        statement = (statement
+                     .where(Task.owner_id == user_id,
+                            in_name | func.lower(Task.description).contains(pattern, autoescape=True))
+                     .order_by(case((in_name, 0), else_=1), Task.id))
+
+    async with _read_session(user_id) as session:
+        tasks = list(map(TaskSummary._make, await session.execute(statement.offset(offset).limit(limit + 1))))
+
+    page = TasksPage(tasks[:limit], has_prev=offset > 0, has_next=len(tasks) > limit)
+    task_list_cache.set(user_id, page_key, page, generation)
+    return page
+
+
+async def find_tasks_by_prefix(user_id: int, query: str, limit: int) -> list[IndexedTask]:
+    """
+    Ищет задачи пользователя по началу слов в названии для inline-режима.
+
+    Поиск выполняется по префиксному индексу task_index в памяти. Индекс пользователя загружается
+    одним запросом при первом обращении, а затем обновляется функциями изменения задач,
+    поэтому запросы, приходящие на каждое нажатие клавиши, не обращаются к базе данных.
+    Пока индекс загружается, изменения задач в него не попадают, поэтому индекс, во время загрузки
+    которого задачи пользователя изменились, используется только для текущего запроса и не сохраняется.
+
+    Аргументы:
+        user_id (int): Идентификатор пользователя в базе данных.
+        query (str): Текст inline-запроса.
+        limit (int): Максимальное количество задач.
+
+    Возвращает:
+        list[IndexedTask]: Найденные задачи: сначала невыполненные, внутри - от новых к старым.
+    """
+    index = task_index.get(user_id)
+    if index is None:
+        generation = task_list_cache.generation(user_id)
+        async with _read_session(user_id) as session:
+            rows = await session.execute(
+                select(Task.id, Task.name, Task.description, Task.is_done).where(Task.owner_id == user_id)
+            )
+        tasks = [IndexedTask(*row) for row in rows]
+        if generation == task_list_cache.generation(user_id):
+            index = task_index.load(user_id, tasks)
+        else:
+            index = UserTaskIndex(tasks)
+    return index.search(query, limit)
+
+
+async def stream_tasks(owner_id: int | None = None, batch_size: int = EXPORT_BATCH_SIZE) -> AsyncIterator[list]:
+    """
+    Читает задачи пачками из серверного курсора, не загружая результат запроса целиком.
+
+    Аргументы:
+        owner_id (int | None): Идентификатор владельца задач; None - задачи всех пользователей.
+        batch_size (int): Количество задач, читаемых из курсора за раз.
+
+    Возвращает:
+        AsyncIterator[list[Row]]: Пачки задач (поля name, description, is_done, due_at, created_at, id,
+        а для всех пользователей - еще owner_id), отсортированные по id.
+    """
+    columns = [Task.name, Task.description, Task.is_done, Task.due_at, Task.created_at, Task.id]
+    statement = select(*columns).order_by(Task.id).execution_options(yield_per=batch_size)
+    if owner_id is None:
+        statement = statement.add_columns(Task.owner_id)
+    else:
+        statement = statement.where(Task.owner_id == owner_id)
 
+    async with _read_session(owner_id) as session:
+        result = await session.stream(statement)
+        async for batch in result.partitions():
+            yield batch
 
-async def get_task_by_id(task_id: int) -> Task:
+
+async def get_task_by_id(task_id: int, user_id: int) -> TaskDetail | None:
     """
-    Получает задачу по её идентификатору.
+    Получает задачу пользователя по её идентификатору.
 
     Аргументы:
         task_id (int): Идентификатор задачи.
+        user_id (int): Идентификатор пользователя в базе данных.
 
     Возвращает:
-        Task: Объект задачи.
+        TaskDetail | None: Задача или None, если задача не найдена или принадлежит другому пользователю.
     """
-    async with async_session() as session:
-        return await session.scalar(select(Task).where(Task.id == task_id))
+    async with _read_session(user_id) as session:
+        row = (await session.execute(
+            select(*_DETAIL_COLUMNS).where(Task.id == task_id, Task.owner_id == user_id)
+        )).first()
+    return TaskDetail._make(row) if row is not None else None
+
+
+async def _complete_tasks(session, keys: list[tuple[int, int]]) -> list[TaskDetail | None]:
+    # Операция группового коммита: один UPDATE ... RETURNING для пар (id задачи, id владельца)
+    result = await session.execute(
+        update(Task)
+        .where(tuple_(Task.id, Task.owner_id).in_(keys))
+        .values(is_done=True)
+        .returning(Task.owner_id, *_DETAIL_COLUMNS)
+        .execution_options(synchronize_session=False)
+    )
+    # Результат ищется по паре (id, владелец): в пачке может быть запрос той же задачи от другого пользователя
+    tasks = {(row.id, row.owner_id): TaskDetail._make(row[1:]) for row in result}
+    return [tasks.get(key) for key in keys]
+
+
+async def mark_task_as_complete(task_id: int, user_id: int) -> TaskDetail | None:
+    """
+    Помечает задачу пользователя как выполненную.
+
+    Выполняется запросом UPDATE ... RETURNING, который одновременно проверяет,
+    что задача принадлежит пользователю, и возвращает обновленную задачу. При включенном
+    групповом коммите задачи разных пользователей обновляются одним запросом.
 
+    Аргументы:
+        task_id (int): Идентификатор задачи.
+        user_id (int): Идентификатор пользователя в базе данных.
 
-async def mark_task_as_complete(task_id: int) -> None:
+    Возвращает:
+        TaskDetail | None: Обновленная задача или None, если задача не найдена или принадлежит
+        другому пользователю.
+    """
+    task = await write_batcher.submit(_complete_tasks, (task_id, user_id))
+    if task is None:
+        return None
+    invalidate_user_tasks(user_id)
+    task_index.set_done(user_id, task_id)
+    return task
+
+
+async def _delete_tasks(session, keys: list[tuple[int, int]]) -> list[bool]:
+    # Операция группового коммита: один DELETE ... RETURNING для пар (id задачи, id владельца)
+    deleted = set(map(tuple, await session.execute(
+        delete(Task)
+        .where(tuple_(Task.id, Task.owner_id).in_(keys))
+        .returning(Task.id, Task.owner_id)
+        .execution_options(synchronize_session=False)
+    )))
+    return [key in deleted for key in keys]
+
+
+async def delete_task(task_id: int, user_id: int) -> bool:
     """
-    Помечает задачу как выполненную.
+    Удаляет задачу пользователя по её идентификатору.
+
+    Выполняется запросом DELETE ... RETURNING с проверкой владельца задачи. При включенном
+    групповом коммите задачи разных пользователей удаляются одним запросом.
 
     Аргументы:
         task_id (int): Идентификатор задачи.
+        user_id (int): Идентификатор пользователя в базе данных.
+
+    Возвращает:
+        bool: True, если задача удалена, False, если она не найдена или принадлежит другому пользователю.
+    """
+    deleted = await write_batcher.submit(_delete_tasks, (task_id, user_id))
+    if deleted:
+        invalidate_user_tasks(user_id)
+        task_index.remove(user_id, task_id)
+    return deleted
+
+
+async def delete_completed_tasks(user_id: int) -> int:
+    """
+    Удаляет все завершенные задачи пользователя.
+
+    Удаление выполняется одним запросом DELETE.
+
+    Аргументы:
+        user_id (int): Идентификатор пользователя в базе данных.
+
+    Возвращает:
+        int: Количество удаленных задач.
     """
     async with async_session() as session:
         async with session.begin():
-            task = await session.scalar(select(Task).where(Task.id == task_id))
-            if task:
-                task.is_done = True
-                await session.commit()
+            result = await session.execute(
+                delete(Task)
+                .where(Task.owner_id == user_id, Task.is_done == True)
+                .execution_options(synchronize_session=False)
+            )
+    invalidate_user_tasks(user_id)
+    task_index.remove_completed(user_id)
+    return result.rowcount
 
 
-async def delete_task(task_id: int) -> None:
+async def get_upcoming_reminders(until: datetime, limit: int, shard: tuple[int, int] | None = None) -> list:
     """
-    Удаляет задачу по её идентификатору.
+    Получает задачи с неотправленными напоминаниями, срок которых наступает не позже until.
+
+    Запрос использует частичный индекс idx_tasks_due_reminder и читает только ближайшие задачи,
+    а не все задачи со сроком.
 
     Аргументы:
-        task_id (int): Идентификатор задачи.
+        until (datetime): Граница окна предзагрузки.
+        limit (int): Максимальное количество задач.
+        shard (tuple[int, int] | None): Номер процесса и количество процессов бота; если указан,
+            возвращаются только задачи пользователей, tg_id которых относится к этому процессу.
+
+    Возвращает:
+        list[Row]: Задачи (поля id, due_at), отсортированные по сроку.
     """
+    statement = (
+        select(Task.id, Task.due_at)
+        .where(Task.due_at <= until, Task.reminded_at.is_(None), Task.is_done == False)
+        .order_by(Task.due_at)
+        .limit(limit)
+    )
+    if shard is not None:
+        index, shards = shard
+        statement = statement.join(User, Task.owner_id == User.id).where(User.tg_id % shards == index)
     async with async_session() as session:
-        async with session.begin():
-            task = await session.scalar(select(Task).where(Task.id == task_id))
-            if task:
-                await session.delete(task)
-                await session.commit()
+        return list(await session.execute(statement))
 
 
-async def delete_completed_tasks(tg_id: int) -> None:
+async def claim_reminders(task_ids: list[int], reminded_at: datetime) -> list:
     """
-    Удаляет все завершенные задачи пользователя по его идентификатору в Telegram.
+    Помечает напоминания задач отправленными и возвращает данные для их отправки.
+
+    Напоминания помечаются запросом UPDATE ... RETURNING до отправки сообщений: задача,
+    напоминание которой уже помечено (другой копией бота или до перезапуска), не возвращается,
+    поэтому одно напоминание не отправляется дважды. Данные помеченных задач и Telegram-идентификаторы
+    их владельцев читаются вторым запросом в той же транзакции.
 
     Аргументы:
-        tg_id (int): Идентификатор пользователя в Telegram.
+        task_ids (list[int]): Идентификаторы задач.
+        reminded_at (datetime): Время отправки напоминаний.
+
+    Возвращает:
+        list[Row]: Задачи (поля id, name, due_at, tg_id владельца), напоминания которых нужно отправить.
     """
     async with async_session() as session:
         async with session.begin():
-            completed_tasks = await get_completed_tasks_list(tg_id)
-            completed_tasks_id = [task.id for task in completed_tasks]
-
-            print(completed_tasks_id)
-            await session.execute(
-                delete(Task).where(Task.id.in_(completed_tasks_id))
-            )
-            await session.commit()
+            claimed = list(await session.scalars(
+                update(Task)
+                .where(Task.id.in_(task_ids), Task.reminded_at.is_(None), Task.is_done == False)
+                .values(reminded_at=reminded_at)
+                .returning(Task.id)
+                .execution_options(synchronize_session=False)
+            ))
+            if not claimed:
+                return []
+            return list(await session.execute(
+                select(Task.id, Task.name, Task.due_at, User.tg_id)
+                .join(User, Task.owner_id == User.id)
+                .where(Task.id.in_(claimed))
+                .order_by(Task.due_at)
+            ))
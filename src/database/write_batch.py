@@ -0,0 +1,161 @@
+import asyncio
+import contextvars
+import logging
+from typing import Any, Awaitable, Callable
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.tools.metrics import Counter, Histogram
+
+logger = logging.getLogger(__name__)
+
+# Операция записи: применяет пачку параметров в открытой транзакции и возвращает результат
+# для каждого параметра в том же порядке
+Operation = Callable[[AsyncSession, list], Awaitable[list]]
+
+WRITE_BATCH_SIZE = Histogram('db_write_batch_size', 'Количество изменений в одной транзакции группового коммита',
+                             buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500))
+WRITE_BATCH_FALLBACKS = Counter('db_write_batch_fallbacks_total',
+                                'Количество пачек изменений, повторно примененных по одному после ошибки')
+
+
+class PendingWrite:
+    """
+    Изменение, ожидающее группового коммита.
+    """
+    __slots__ = ('operation', 'payload', 'future')
+
+    def __init__(self, operation: Operation, payload: Any, future: asyncio.Future) -> None:
+        self.operation = operation
+        self.payload = payload
+        self.future = future
+
+
+class WriteBatcher:
+    """
+    Групповой коммит изменений задач.
+
+    Изменения, поставленные обработчиками в течение delay секунд (или до накопления max_size изменений),
+    применяются одной транзакцией: изменения одной операции передаются ей пачкой и выполняются
+    многострочными запросами. Каждый вызов submit получает свой результат. Если транзакция пачки
+    завершилась ошибкой, изменения применяются повторно по одному, и ошибку получает только тот вызов,
+    изменение которого её вызвало.
+
+    При delay = 0 групповой коммит отключен: каждое изменение сразу применяется своей транзакцией.
+
+    Аргументы:
+        session_factory (async_sessionmaker): Фабрика сессий основной базы данных.
+        delay (float): Максимальная задержка изменения в ожидании пачки, в секундах.
+        max_size (int): Количество изменений, при котором пачка применяется, не дожидаясь задержки.
+        synchronous_commit (bool): Ждать ли записи журнала на диск при коммите. При False (только PostgreSQL)
+            коммит не ждет сброса WAL: изменения последних миллисекунд могут потеряться при сбое сервера
+            базы данных, но целостность базы сохраняется.
+    """
+
+    def __init__(self, session_factory: async_sessionmaker, delay: float, max_size: int,
+                 synchronous_commit: bool = True) -> None:
+        self.session_factory = session_factory
+        self.delay = delay
+        self.max_size = max_size
+        self.synchronous_commit = synchronous_commit
+        self._pending: list[PendingWrite] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._flushes: set[asyncio.Task] = set()
+
+    async def submit(self, operation: Operation, payload: Any) -> Any:
+        """
+        Ставит изменение в пачку и ждет его применения.
+
+        Аргументы:
+            operation (Operation): Операция записи.
+            payload (Any): Параметры изменения.
+
+        Возвращает:
+            Any: Результат операции для этого изменения.
+
+        Исключения:
+            Exception: Ошибка, с которой завершилось применение этого изменения.
+        """
+        if self.delay <= 0:
+            return (await self._apply([PendingWrite(operation, payload, None)]))[0]
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append(PendingWrite(operation, payload, future))
+        if len(self._pending) >= self.max_size:
+            self._start_flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.delay, self._start_flush)
+        return await future
+
+    def _start_flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        writes, self._pending = self._pending, []
+        if not writes:
+            return
+        # Пачка выполняется в пустом контексте: её запросы не относятся к обновлению, поставившему первое изменение
+        task = asyncio.create_task(self._flush(writes), context=contextvars.Context())
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def _flush(self, writes: list[PendingWrite]) -> None:
+        WRITE_BATCH_SIZE.observe(len(writes))
+        if len(writes) == 1:
+            await self._flush_one(writes[0])
+            return
+        try:
+            results = await self._apply(writes)
+        except Exception:
+            WRITE_BATCH_FALLBACKS.inc()
+            logger.warning('Пачка из %s изменений не применена, изменения применяются по одному', len(writes),
+                           exc_info=True)
+            await asyncio.gather(*(self._flush_one(write) for write in writes))
+            return
+        except BaseException:
+            for write in writes:
+                write.future.cancel()
+            raise
+        for write, result in zip(writes, results):
+            if not write.future.done():
+                write.future.set_result(result)
+
+    async def _flush_one(self, write: PendingWrite) -> None:
+        try:
+            result = (await self._apply([write]))[0]
+        except Exception as error:
+            if not write.future.done():
+                write.future.set_exception(error)
+        except BaseException:
+            write.future.cancel()
+            raise
+        else:
+            if not write.future.done():
+                write.future.set_result(result)
+
+    async def _apply(self, writes: list[PendingWrite]) -> list:
+        # Изменения группируются по операциям в порядке первого появления операции в пачке
+        groups: dict[Operation, list[int]] = {}
+        for position, write in enumerate(writes):
+            groups.setdefault(write.operation, []).append(position)
+
+        results = [None] * len(writes)
+        async with self.session_factory() as session:
+            async with session.begin():
+                if not self.synchronous_commit and session.bind.dialect.name == 'postgresql':
+                    await session.execute(text('SET LOCAL synchronous_commit TO OFF'))
+                for operation, positions in groups.items():
+                    payloads = [writes[position].payload for position in positions]
+                    for position, result in zip(positions, await operation(session, payloads)):
+                        results[position] = result
+        return results
+
+    async def flush(self) -> None:
+        """
+        Немедленно применяет накопленные изменения и ждет завершения всех пачек.
+        """
+        self._start_flush()
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
@@ -2,12 +2,15 @@ from pyrogram import Client, filters
 from pyrogram.types import Message, InlineKeyboardMarkup, InlineKeyboardButton
 from pyrogram_patch.router import Router
 
+from src.tools.outbox import outbox
+
 bot_commands = Router()
 
 
 @bot_commands.on_message(filters.command("about") & filters.private)
 async def about_bot_handler(client: Client, message: Message) -> None:
-    await client.send_message(
+    outbox.send_message(
+        client,
         chat_id=message.chat.id,
         text="👋 Привет! Я ваш персональный менеджер задач. "
              "Моя цель - помочь вам организовать свои дела и упростить управление задачами.\n\n"
@@ -22,7 +25,8 @@ async def about_bot_handler(client: Client, message: Message) -> None:
 
 @bot_commands.on_message(filters.command("code") & filters.private)
 async def code_handler(client: Client, message: Message) -> None:
-    await client.send_message(
+    outbox.send_message(
+        client,
         chat_id=message.chat.id,
         text="Исходный код моего приложения доступен на GitHub. Вы можете ознакомиться с ним по ссылке ниже:",
         reply_markup=InlineKeyboardMarkup([
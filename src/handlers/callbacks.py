@@ -0,0 +1,24 @@
+from pyrogram import Client
+from pyrogram.types import CallbackQuery
+from pyrogram_patch.fsm import State
+from pyrogram_patch.router import Router
+
+from src.tools.callbacks import callback_routes
+import src.handlers.menu  # noqa: F401  регистрирует действия меню
+import src.handlers.tasks  # noqa: F401  регистрирует действия задач
+
+callback_router = Router()
+
+
+@callback_router.on_callback_query()
+async def callback_query_handler(client: Client, callback: CallbackQuery, state: State, user_id: int) -> None:
+    """
+    Единственный обработчик колбэков: передает колбэк в таблицу маршрутов callback_routes.
+
+    Аргументы:
+        client (Client): Клиент Pyrogram.
+        callback (CallbackQuery): Колбэк.
+        state (State): Состояние FSM.
+        user_id (int): Идентификатор пользователя в базе данных или None.
+    """
+    await callback_routes.dispatch(client, callback, state, user_id)
@@ -0,0 +1,60 @@
+from functools import partial
+
+from pyrogram import Client
+from pyrogram.types import InlineQuery, InlineQueryResultArticle, InputTextMessageContent
+from pyrogram_patch.router import Router
+
+from src.config import INLINE_DEBOUNCE, INLINE_CACHE_TIME, INLINE_RESULTS_LIMIT
+from src.database.requests import find_tasks_by_prefix
+from src.tools.debounce import Debouncer
+from src.tools.other import is_done_task
+from src.tools.outbox import outbox
+
+inline_router = Router()
+
+# Inline-запросы приходят на каждое нажатие клавиши; отвечаем только на последний запрос пользователя
+inline_debouncer = Debouncer(INLINE_DEBOUNCE)
+
+
+async def answer_inline_query(inline_query: InlineQuery, user_id: int | None) -> None:
+    """
+    Отвечает на inline-запрос задачами пользователя, название которых соответствует запросу.
+
+    Аргументы:
+        inline_query (InlineQuery): Inline-запрос.
+        user_id (int | None): Идентификатор пользователя в базе данных или None для незарегистрированных.
+    """
+    if user_id is None:
+        outbox.answer_inline_query(inline_query, [], cache_time=INLINE_CACHE_TIME, is_personal=True,
+                                   switch_pm_text='Зарегистрируйтесь, чтобы делиться задачами',
+                                   switch_pm_parameter='start')
+        return
+
+    tasks = await find_tasks_by_prefix(user_id, inline_query.query.strip(), INLINE_RESULTS_LIMIT)
+    results = []
+    for task in tasks:
+        status = await is_done_task(task.is_done)
+        results.append(InlineQueryResultArticle(
+            id=str(task.id),
+            title=f'{status} {task.name}',
+            description=task.description[:100],
+            input_message_content=InputTextMessageContent(f'{status} **{task.name}**\n\n{task.description}'),
+        ))
+    outbox.answer_inline_query(inline_query, results, cache_time=INLINE_CACHE_TIME, is_personal=True)
+
+
+@inline_router.on_inline_query()
+async def inline_query_handler(client: Client, inline_query: InlineQuery, user_id: int) -> None:
+    """
+    Обработчик inline-запросов @bot <запрос>.
+
+    Аргументы:
+        client (Client): Клиент Pyrogram.
+        inline_query (InlineQuery): Inline-запрос.
+        user_id (int): Идентификатор пользователя в базе данных или None.
+
+    Операции:
+        - Откладывает ответ на INLINE_DEBOUNCE секунд; если за это время пользователь продолжил ввод,
+          ответ формируется только для нового запроса.
+    """
+    inline_debouncer.call(inline_query.from_user.id, partial(answer_inline_query, inline_query, user_id))
@@ -1,16 +1,65 @@
 from pyrogram import filters, Client
 from pyrogram.types import Message, CallbackQuery
+from pyrogram_patch.fsm import StatesGroup, StateItem, State
+from pyrogram_patch.fsm.filter import StateFilter
 from pyrogram_patch.router import Router
-from pyrogram.types import InlineKeyboardButton, InlineKeyboardMarkup
 
-from src.tools.keyboards import MAIN_MENU
+from src.config import USER_CACHE_SIZE, TASK_CACHE_TTL
+from src.tools.cache import TTLCache, MISSING
+from src.tools.callbacks import callback_routes
+from src.tools.keyboards import MAIN_MENU, TASK_LIST_STATUSES, get_tasks_page_menu, get_search_page_menu
 from src.tools.filters import is_register_user
-from src.tools.other import is_done_task
+from src.tools.outbox import outbox
 from src.database.requests import (get_all_tasks_list, get_actual_tasks_list, get_completed_tasks_list,
-                                   delete_completed_tasks)
+                                   delete_completed_tasks, search_tasks)
 
 menu_router = Router()
 
+# Статус списка -> функция получения страницы и заголовок списка
+TASK_LISTS = {
+    'actual': (get_actual_tasks_list, 'Ваш список актуальных задач'),
+    'completed': (get_completed_tasks_list, 'Ваш список выполненных задач'),
+    'all': (get_all_tasks_list, 'Все ваши задачи'),
+}
+
+# Максимальная длина поискового запроса
+SEARCH_QUERY_LIMIT = 100
+
+# users.id -> последний поисковый запрос; в callback_data кнопок навигации передается только смещение
+search_queries = TTLCache(maxsize=USER_CACHE_SIZE, ttl=TASK_CACHE_TTL)
+
+
+class SearchTasks(StatesGroup):
+    """
+    Класс для управления состояниями поиска задач.
+
+    Атрибуты:
+        query (StateItem): Состояние для ввода поискового запроса.
+    """
+    query = StateItem()
+
+
+async def show_tasks_page(callback: CallbackQuery, user_id: int, status: str,
+                          after: tuple[bool, int] | None = None, before: tuple[bool, int] | None = None) -> None:
+    """
+    Обновляет сообщение колбэка страницей списка задач.
+
+    Аргументы:
+        callback (CallbackQuery): Колбэк, сообщение которого обновляется.
+        user_id (int): Идентификатор пользователя в базе данных.
+        status (str): Список задач: 'actual', 'completed' или 'all'.
+        after (tuple[bool, int] | None): Курсор, после которого начинается страница.
+        before (tuple[bool, int] | None): Курсор, перед которым заканчивается страница.
+    """
+    get_tasks_list, title = TASK_LISTS[status]
+    page = await get_tasks_list(user_id, after=after, before=before)
+
+    outbox.edit_message_text(
+        callback,
+        text=title,
+        reply_markup=await get_tasks_page_menu(page, status)
+    )
+
 
 @menu_router.on_message(filters.command("start") & filters.private & is_register_user)
 async def main_menu_handler(client: Client, message: Message) -> None:
@@ -24,13 +73,14 @@ async def main_menu_handler(client: Client, message: Message) -> None:
     Операции:
         - Отправляет сообщение с основным меню, используя клавиатуру MAIN_MENU.
     """
-    await message.reply(
+    outbox.reply(
+        message,
         text="Выберите пункт меню",
         reply_markup=MAIN_MENU
     )
 
 
-@menu_router.on_callback_query(filters.regex("main_menu") & is_register_user)
+@callback_routes.action('main_menu')
 async def main_menu_callback_handler(client: Client, callback: CallbackQuery) -> None:
     """
     Обработчик колбэка для главного меню.
@@ -42,103 +92,215 @@ async def main_menu_callback_handler(client: Client, callback: CallbackQuery) ->
     Операции:
         - Обновляет сообщение с главным меню, используя клавиатуру MAIN_MENU.
     """
-    if callback.data == 'main_menu':
-        await callback.edit_message_text(
-            text="Главное меню",
-            reply_markup=MAIN_MENU
-        )
+    outbox.edit_message_text(
+        callback,
+        text="Главное меню",
+        reply_markup=MAIN_MENU
+    )
 
 
-@menu_router.on_callback_query(filters.regex('actual_user_tasks') & is_register_user)
-async def get_actual_tasks_handler(client: Client, callback: CallbackQuery) -> None:
+@callback_routes.action('actual_user_tasks')
+async def get_actual_tasks_handler(client: Client, callback: CallbackQuery, user_id: int) -> None:
     """
     Обработчик колбэка для получения списка актуальных (невыполненных) задач пользователя.
 
     Аргументы:
         client (Client): Клиент Pyrogram.
         callback (CallbackQuery): Колбэк, вызвавший хэндлер.
+        user_id (int): Идентификатор пользователя в базе данных.
 
     Операции:
-        - Получает список актуальных задач пользователя.
-        - Создает клавиатуру с задачами и кнопкой возврата в главное меню.
-        - Обновляет сообщение с разметкой клавиатуры.
+        - Показывает первую страницу актуальных задач пользователя.
     """
-    tasks = await get_actual_tasks_list(callback.from_user.id)
-
-    keyboard = [[InlineKeyboardButton(text=f'{await is_done_task(task.is_done)} - {task.name}',
-                                      callback_data=f'task_{task.id}')] for task in tasks]
-    keyboard.append([InlineKeyboardButton(text="🏠 Главное меню", callback_data='main_menu')])
-
-    await callback.edit_message_text(
-        text='Ваш список актуальных задач',
-        reply_markup=InlineKeyboardMarkup(keyboard)
-    )
+    await show_tasks_page(callback, user_id, 'actual')
 
 
-@menu_router.on_callback_query(filters.regex('completed_user_tasks') & is_register_user)
-async def get_completed_tasks_handler(client: Client, callback: CallbackQuery) -> None:
+@callback_routes.action('completed_user_tasks')
+async def get_completed_tasks_handler(client: Client, callback: CallbackQuery, user_id: int) -> None:
     """
     Обработчик колбэка для получения списка выполненных задач пользователя.
 
     Аргументы:
         client (Client): Клиент Pyrogram.
         callback (CallbackQuery): Колбэк, вызвавший хэндлер.
+        user_id (int): Идентификатор пользователя в базе данных.
 
     Операции:
-        - Получает список выполненных задач пользователя.
-        - Создает клавиатуру с задачами и кнопкой возврата в главное меню.
-        - Обновляет сообщение с разметкой клавиатуры.
+        - Показывает первую страницу выполненных задач пользователя.
     """
-    tasks = await get_completed_tasks_list(callback.from_user.id)
+    await show_tasks_page(callback, user_id, 'completed')
 
-    keyboard = [[InlineKeyboardButton(text=f'{await is_done_task(task.is_done)} - {task.name}',
-                                      callback_data=f'task_{task.id}')] for task in tasks]
-    keyboard.append([InlineKeyboardButton(text="🏠 Главное меню", callback_data='main_menu')])
 
-    await callback.edit_message_text(
-        text='Ваш список выполненных задач',
-        reply_markup=InlineKeyboardMarkup(keyboard)
-    )
-
-
-@menu_router.on_callback_query(filters.regex('all_user_tasks') & is_register_user)
-async def get_all_tasks_handler(client: Client, callback: CallbackQuery) -> None:
+@callback_routes.action('all_user_tasks')
+async def get_all_tasks_handler(client: Client, callback: CallbackQuery, user_id: int) -> None:
     """
     Обработчик колбэка для получения списка всех задач пользователя.
 
     Аргументы:
         client (Client): Клиент Pyrogram.
         callback (CallbackQuery): Колбэк, вызвавший хэндлер.
+        user_id (int): Идентификатор пользователя в базе данных.
 
     Операции:
-        - Получает список всех задач пользователя.
-        - Создает клавиатуру с задачами и кнопкой возврата в главное меню.
-        - Обновляет сообщение с разметкой клавиатуры.
+        - Показывает первую страницу всех задач пользователя.
     """
-    tasks = await get_all_tasks_list(callback.from_user.id)
+    await show_tasks_page(callback, user_id, 'all')
 
-    keyboard = [[InlineKeyboardButton(text=f'{await is_done_task(task.is_done)} - {task.name}',
-                                      callback_data=f'task_{task.id}')] for task in tasks]
-    keyboard.append([InlineKeyboardButton(text="🏠 Главное меню", callback_data='main_menu')])
 
-    await callback.edit_message_text(
-        text='Все ваши задачи',
-        reply_markup=InlineKeyboardMarkup(keyboard)
-    )
+@callback_routes.action('tasks_page', int, int, int, int)
+async def tasks_page_handler(client: Client, callback: CallbackQuery, list_index: int, direction: int,
+                             is_done: int, task_id: int, user_id: int) -> None:
+    """
+    Обработчик колбэка кнопок навигации по страницам списка задач.
 
+    Аргументы:
+        client (Client): Клиент Pyrogram.
+        callback (CallbackQuery): Колбэк, вызвавший хэндлер.
+        list_index (int): Индекс списка задач в TASK_LIST_STATUSES.
+        direction (int): 0 - следующая страница, 1 - предыдущая.
+        is_done (int): Статус задачи-курсора.
+        task_id (int): Идентификатор задачи-курсора.
+        user_id (int): Идентификатор пользователя в базе данных.
 
-@menu_router.on_callback_query(filters.regex('delete_completed_tasks') & is_register_user)
-async def delete_completed_tasks_handler(client: Client, callback: CallbackQuery) -> None:
+    Операции:
+        - Показывает страницу списка задач после или перед задачей-курсором.
+    """
+    if list_index >= len(TASK_LIST_STATUSES):
+        outbox.answer(callback)
+        return
+
+    status = TASK_LIST_STATUSES[list_index]
+    cursor = (bool(is_done), task_id)
+    if direction == 1:
+        await show_tasks_page(callback, user_id, status, before=cursor)
+    else:
+        await show_tasks_page(callback, user_id, status, after=cursor)
+
+
+@callback_routes.action('delete_completed_tasks')
+async def delete_completed_tasks_handler(client: Client, callback: CallbackQuery, user_id: int) -> None:
     """
     Обработчик колбэка для удаления всех выполненных задач пользователя.
 
     Аргументы:
         client (Client): Клиент Pyrogram.
         callback (CallbackQuery): Колбэк, вызвавший хэндлер.
+        user_id (int): Идентификатор пользователя в базе данных.
 
     Операции:
         - Удаляет все выполненные задачи пользователя.
-        - Отправляет уведомление об успешном удалении задач.
+        - Отправляет уведомление с количеством удаленных задач.
+    """
+    deleted = await delete_completed_tasks(user_id)
+    outbox.answer(callback, f"Выполненные задачи удалены ❌\nУдалено задач: {deleted}", show_alert=True)
+
+
+async def get_search_results(user_id: int, query: str, offset: int = 0):
     """
-    await delete_completed_tasks(callback.from_user.id)
-    await callback.answer("Выполненные задачи удалены ❌", show_alert=True)
+    Выполняет поиск задач пользователя и формирует сообщение с результатами.
+
+    Аргументы:
+        user_id (int): Идентификатор пользователя в базе данных.
+        query (str): Поисковый запрос.
+        offset (int): Смещение страницы результатов.
+
+    Возвращает:
+        tuple[str, InlineKeyboardMarkup]: Текст сообщения и клавиатура с найденными задачами.
+    """
+    search_queries.set(user_id, query)
+    page = await search_tasks(user_id, query, offset=offset)
+    if page.tasks:
+        text = f'Результаты поиска «{query}»'
+    else:
+        text = f'По запросу «{query}» ничего не найдено'
+    return text, await get_search_page_menu(page, offset)
+
+
+@menu_router.on_message(filters.command("find") & filters.private & is_register_user)
+async def find_tasks_handler(client: Client, message: Message, state: State, user_id: int) -> None:
+    """
+    Обработчик команды /find <текст> для поиска задач.
+
+    Аргументы:
+        client (Client): Клиент Pyrogram.
+        message (Message): Сообщение, вызвавшее команду.
+        state (State): Состояние FSM.
+        user_id (int): Идентификатор пользователя в базе данных.
+
+    Операции:
+        - Отправляет найденные задачи, если текст запроса указан в команде.
+        - Иначе запрашивает текст запроса и устанавливает состояние на SearchTasks.query.
+    """
+    parts = message.text.split(maxsplit=1)
+    if len(parts) < 2:
+        outbox.reply(message, "Введите текст для поиска задач:")
+        await state.set_state(SearchTasks.query)
+        return
+
+    text, reply_markup = await get_search_results(user_id, parts[1].strip()[:SEARCH_QUERY_LIMIT])
+    outbox.reply(message, text, reply_markup=reply_markup)
+
+
+@menu_router.on_message(filters.private & StateFilter(SearchTasks.query) & is_register_user)
+async def process_search_query(client: Client, message: Message, state: State, user_id: int) -> None:
+    """
+    Обработчик для состояния SearchTasks.query.
+
+    Аргументы:
+        client (Client): Клиент Pyrogram.
+        message (Message): Сообщение с поисковым запросом.
+        state (State): Состояние FSM.
+        user_id (int): Идентификатор пользователя в базе данных.
+
+    Операции:
+        - Отправляет найденные задачи или повторно запрашивает текст, если он пуст.
+    """
+    query = (message.text or '').strip()[:SEARCH_QUERY_LIMIT]
+    if not query:
+        outbox.reply(message, "Введите текст для поиска задач:")
+        return
+
+    await state.finish()
+    text, reply_markup = await get_search_results(user_id, query)
+    outbox.reply(message, text, reply_markup=reply_markup)
+
+
+@callback_routes.action('search_tasks')
+async def search_tasks_handler(client: Client, callback: CallbackQuery, state: State) -> None:
+    """
+    Обработчик колбэка кнопки поиска в главном меню.
+
+    Аргументы:
+        client (Client): Клиент Pyrogram.
+        callback (CallbackQuery): Колбэк, вызвавший хэндлер.
+        state (State): Состояние FSM.
+
+    Операции:
+        - Отправляет сообщение с запросом текста для поиска.
+        - Устанавливает состояние на SearchTasks.query.
+    """
+    outbox.send_message(client, callback.message.chat.id, "Введите текст для поиска задач:")
+    await state.set_state(SearchTasks.query)
+
+
+@callback_routes.action('search_page', int)
+async def search_page_handler(client: Client, callback: CallbackQuery, offset: int, user_id: int) -> None:
+    """
+    Обработчик колбэка кнопок навигации по результатам поиска.
+
+    Аргументы:
+        client (Client): Клиент Pyrogram.
+        callback (CallbackQuery): Колбэк, вызвавший хэндлер.
+        offset (int): Смещение страницы результатов.
+        user_id (int): Идентификатор пользователя в базе данных.
+
+    Операции:
+        - Показывает страницу результатов последнего поиска пользователя.
+    """
+    query = search_queries.get(user_id)
+    if query is MISSING:
+        outbox.answer(callback, "Результаты поиска устарели, повторите поиск: /find", show_alert=True)
+        return
+
+    text, reply_markup = await get_search_results(user_id, query, offset)
+    outbox.edit_message_text(callback, text, reply_markup=reply_markup)
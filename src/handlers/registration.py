@@ -9,6 +9,7 @@ from sqlalchemy.exc import IntegrityError
 
 from src.database.requests import *
 from src.tools.filters import is_unregister_user
+from src.tools.outbox import outbox
 
 reg_router = Router()
 
@@ -62,10 +63,10 @@ async def start_reg_handler(client: Client, message: Message, state: State) -> N
         - Отправляет сообщение с запросом имени пользователя.
         - Устанавливает состояние на Registration.name.
     """
-    await client.send_message(chat_id=message.chat.id,
-                              text='Привет! 🎉 Это твой персональный менеджер задач!\n'
-                                   'Чтобы начать пользоваться ботом,пожалуйста, пройдите небольшую регистрацию. '
-                                   'Это займет меньше минуты. 😊\n\nПожалуйста, введите своё имя:')
+    outbox.send_message(client, chat_id=message.chat.id,
+                        text='Привет! 🎉 Это твой персональный менеджер задач!\n'
+                             'Чтобы начать пользоваться ботом,пожалуйста, пройдите небольшую регистрацию. '
+                             'Это займет меньше минуты. 😊\n\nПожалуйста, введите своё имя:')
     await state.set_state(Registration.name)
 
 
@@ -93,11 +94,11 @@ async def process_name(client: Client, message: Message, state: State) -> None:
             await registration_instance.on_name_set(message.text)
             name_valid = True
         except ValueError as e:
-            await message.reply(str(e))
+            outbox.reply(message, str(e))
             return
 
     await state.set_data({'name': message.text})
-    await client.send_message(message.chat.id, "Пожалуйста, придумайте уникальный никнейм:")
+    outbox.send_message(client, message.chat.id, "Пожалуйста, придумайте уникальный никнейм:")
     await state.set_state(Registration.login)
 
 
@@ -125,7 +126,7 @@ async def process_login(client: Client, message: Message, state: State) -> None:
             await registration_instance.on_login_set(message.text)
             login_valid = True
         except ValueError as e:
-            await message.reply(str(e))
+            outbox.reply(message, str(e))
             return
 
     await state.set_data({'login': message.text})
@@ -134,13 +135,13 @@ async def process_login(client: Client, message: Message, state: State) -> None:
     try:
         await add_user(data)
     except IntegrityError as e:
-        await client.send_message(chat_id=message.chat.id,
-                                  text='Данный никнейм уже занят, попробуйте снова:')
+        outbox.send_message(client, chat_id=message.chat.id,
+                            text='Данный никнейм уже занят, попробуйте снова:')
     else:
-        await client.send_message(chat_id=message.chat.id,
-                                  text=f"Поздравляем, {data['name']}!\n"
-                                       f"Вы успешно зарегистрированы.🎉\n"
-                                       f"Ваш логин: {data['login']}")
+        outbox.send_message(client, chat_id=message.chat.id,
+                            text=f"Поздравляем, {data['name']}!\n"
+                                 f"Вы успешно зарегистрированы.🎉\n"
+                                 f"Ваш логин: {data['login']}")
         await state.finish()
 
 
@@ -156,4 +157,4 @@ async def hint(client: Client, message: Message) -> None:
     Операции:
         - Отправляет подсказку для начала регистрации.
     """
-    await client.send_message(message.from_user.id, "Для начала регистрации введите /start")
+    outbox.send_message(client, message.from_user.id, "Для начала регистрации введите /start")
@@ -1,3 +1,7 @@
+import logging
+from datetime import datetime
+from functools import partial
+
 from pyrogram import Client, filters
 from pyrogram.types import Message, CallbackQuery
 from pyrogram_patch.fsm import StatesGroup, StateItem, State
@@ -5,10 +9,18 @@ from pyrogram_patch.fsm.filter import StateFilter
 from pyrogram_patch.router import Router
 
 from src.database.requests import *
-from src.tools.filters import is_register_user
-from src.tools.other import is_done_task
+from src.tools.callbacks import callback_routes
+from src.tools.filters import is_register_user, is_admin
+from src.tools.other import is_done_task, format_due_at, DUE_AT_FORMAT
 from src.tools.keyboards import get_task_menu
 from src.handlers.menu import main_menu_callback_handler, main_menu_handler
+from src.tools.outbox import outbox, Priority
+from src.tools.reminders import reminder_scheduler
+from src.tools.task_import import iter_text_lines, iter_document_lines, parse_task_line
+from src.tools.task_export import EXPORT_FORMATS, write_tasks_export
+from src.config import IMPORT_CHUNK_SIZE, IMPORT_MAX_TASKS, IMPORT_MAX_FILE_SIZE
+
+logger = logging.getLogger(__name__)
 
 task_router = Router()
 
@@ -20,10 +32,12 @@ class CreateTask(StatesGroup):
     Атрибуты:
         name (StateItem): Состояние для ввода названия задачи.
         description (StateItem): Состояние для ввода описания задачи.
+        due_at (StateItem): Состояние для ввода срока задачи.
         owner_id (StateItem): Состояние для хранения идентификатора владельца задачи.
     """
     name = StateItem()
     description = StateItem()
+    due_at = StateItem()
     owner_id = StateItem()
 
     @staticmethod
@@ -82,8 +96,47 @@ class CreateTask(StatesGroup):
         if not self.validate_description(value):
             raise ValueError("Описание задачи не должно превышать 250 символов.")
 
+    @staticmethod
+    def parse_due_at(value: str) -> datetime | None:
+        """
+        Разбирает срок задачи.
+
+        Аргументы:
+            value (str): Срок задачи в формате DUE_AT_FORMAT или "-", если срок не нужен.
+
+        Возвращает:
+            datetime | None: Срок задачи или None, если срок не указан.
+
+        Исключения:
+            ValueError: Если срок не соответствует формату или уже прошел.
+        """
+        value = value.strip()
+        if value == '-':
+            return None
+        try:
+            due_at = datetime.strptime(value, DUE_AT_FORMAT)
+        except ValueError:
+            raise ValueError("Укажите срок в формате ДД.ММ.ГГГГ ЧЧ:ММ, например 31.12.2024 18:00.")
+        if due_at <= datetime.now():
+            raise ValueError("Срок задачи должен быть в будущем.")
+        return due_at
+
+
+class ImportTasks(StatesGroup):
+    """
+    Класс для управления состояниями импорта задач.
+
+    Атрибуты:
+        lines (StateItem): Состояние для получения списка задач текстом или файлом.
+    """
+    lines = StateItem()
+
+
+IMPORT_HELP = ("Отправьте список задач: по одной задаче в строке в формате «название | описание» "
+               "(описание необязательно) или файл .txt в том же формате либо .csv со столбцами название,описание.")
+
 
-@task_router.on_callback_query(filters.regex('create_new_task'))
+@callback_routes.action('create_new_task')
 async def start_create_task(client: Client, callback: CallbackQuery, state: State) -> None:
     """
     Обработчик колбэка для начала создания новой задачи.
@@ -97,14 +150,14 @@ async def start_create_task(client: Client, callback: CallbackQuery, state: Stat
         - Отправляет сообщение с запросом названия задачи.
         - Устанавливает состояние на CreateTask.name.
     """
-    await client.send_message(chat_id=callback.message.chat.id,
-                              text='Давайте создадим новую задачу! \n'
-                                   'Пожалуйста, введите название задачи:')
+    outbox.send_message(client, chat_id=callback.message.chat.id,
+                        text='Давайте создадим новую задачу! \n'
+                             'Пожалуйста, введите название задачи:')
     await state.set_state(CreateTask.name)
 
 
 @task_router.on_message(filters.private & StateFilter(CreateTask.name) & is_register_user)
-async def process_task_name(client: Client, message: Message, state: State) -> None:
+async def process_task_name(client: Client, message: Message, state: State, user_id: int) -> None:
     """
     Обработчик для состояния CreateTask.name.
 
@@ -112,6 +165,7 @@ async def process_task_name(client: Client, message: Message, state: State) -> N
         client (Client): Клиент Pyrogram.
         message (Message): Сообщение, вызвавшее хэндлер.
         state (State): Состояние FSM.
+        user_id (int): Идентификатор пользователя в базе данных.
 
     Операции:
         - Валидирует название задачи.
@@ -127,13 +181,12 @@ async def process_task_name(client: Client, message: Message, state: State) -> N
             await create_task_inst.on_name_set(message.text)
             name_valid = True
         except ValueError as e:
-            await message.reply(str(e))
+            outbox.reply(message, str(e))
             return
 
-    owner_id = await get_user_id_by_tg_id(message.from_user.id)
-    await state.set_data({'owner_id': owner_id})
+    await state.set_data({'owner_id': user_id})
     await state.set_data({'name': message.text})
-    await client.send_message(message.chat.id, "Пожалуйста, введите описание задачи:")
+    outbox.send_message(client, message.chat.id, "Пожалуйста, введите описание задачи:")
     await state.set_state(CreateTask.description)
 
 
@@ -150,9 +203,8 @@ async def process_task_description(client: Client, message: Message, state: Stat
     Операции:
         - Валидирует описание задачи.
         - Сохраняет описание задачи.
-        - Добавляет задачу в базу данных.
-        - Отправляет сообщение об успешном создании задачи.
-        - Возвращает пользователя в главное меню.
+        - Отправляет сообщение с запросом срока задачи.
+        - Устанавливает состояние на CreateTask.due_at.
     """
     description_valid = False
 
@@ -162,88 +214,350 @@ async def process_task_description(client: Client, message: Message, state: Stat
             await create_task_inst.on_description_set(message.text)
             description_valid = True
         except ValueError as e:
-            print(e)
-            await message.reply(str(e))
+            outbox.reply(message, str(e))
             return
 
     await state.set_data({'description': message.text})
-    data = await state.get_data()
+    outbox.send_message(client, message.chat.id,
+                        "Укажите срок задачи в формате ДД.ММ.ГГГГ ЧЧ:ММ или отправьте «-», если срок не нужен:")
+    await state.set_state(CreateTask.due_at)
+
+
+@task_router.on_message(filters.private & StateFilter(CreateTask.due_at) & is_register_user)
+async def process_task_due_at(client: Client, message: Message, state: State) -> None:
+    """
+    Обработчик для состояния CreateTask.due_at.
+
+    Аргументы:
+        client (Client): Клиент Pyrogram.
+        message (Message): Сообщение, вызвавшее хэндлер.
+        state (State): Состояние FSM.
+
+    Операции:
+        - Разбирает срок задачи.
+        - Добавляет задачу в базу данных и передает её срок планировщику напоминаний.
+        - Завершает состояние FSM только после сохранения задачи; если сохранить не удалось,
+          сообщает об ошибке и оставляет введенные данные, чтобы срок можно было отправить еще раз.
+        - Отправляет сообщение об успешном создании задачи.
+        - Возвращает пользователя в главное меню.
+    """
     try:
-        await add_task(data)
-    except Exception as e:
-        print(e)
+        due_at = CreateTask.parse_due_at(message.text)
+    except ValueError as e:
+        outbox.reply(message, str(e))
+        return
 
-    await client.send_message(chat_id=message.chat.id,
-                              text="Задача успешно создана!")
+    data = await state.get_data()
+    try:
+        task_id = await add_task({**data, 'due_at': due_at})
+    except Exception:
+        logger.exception('Не удалось создать задачу')
+        outbox.reply(message, "Не удалось создать задачу, попробуйте отправить срок еще раз.")
+        return
+    await state.finish()
+    reminder_scheduler.schedule(task_id, due_at)
+
+    outbox.send_message(client, chat_id=message.chat.id,
+                        text="Задача успешно создана!")
     await main_menu_handler(client, message)
 
 
-@task_router.on_callback_query(filters.regex(r'^task_') & is_register_user)
-async def get_task_handler(client: Client, callback: CallbackQuery):
+async def show_task(callback: CallbackQuery, task) -> None:
+    """
+    Обновляет сообщение колбэка карточкой задачи.
+
+    Аргументы:
+        callback (CallbackQuery): Колбэк, сообщение которого обновляется.
+        task (TaskDetail): Задача.
+    """
+    outbox.edit_message_text(
+        callback,
+        text=f'{await is_done_task(task.is_done)} - **{task.name}**\n\nОписание задачи:\n{task.description}'
+             f'\n\nСрок: {await format_due_at(task.due_at)}',
+        reply_markup=await get_task_menu(task.id)
+    )
+
+
+@callback_routes.action('task', int)
+async def get_task_handler(client: Client, callback: CallbackQuery, task_id: int, user_id: int):
     """
     Обработчик колбэка для получения информации о задаче.
 
     Аргументы:
         client (Client): Клиент Pyrogram.
         callback (CallbackQuery): Колбэк, вызвавший хэндлер.
+        task_id (int): Идентификатор задачи.
+        user_id (int): Идентификатор пользователя в базе данных.
 
     Операции:
-        - Извлекает идентификатор задачи из данных колбэка.
-        - Получает задачу из базы данных.
+        - Получает задачу пользователя из базы данных.
         - Обновляет сообщение с информацией о задаче и разметкой клавиатуры.
     """
-    task_id = str(callback.data).split('_')[1]
-    task = await get_task_by_id(int(task_id))
+    task = await get_task_by_id(task_id, user_id)
+    if task is None:
+        outbox.answer(callback, "Задача не найдена", show_alert=True)
+        return
 
-    await callback.edit_message_text(
-        text=f'{await is_done_task(task.is_done)} - **{task.name}**\n\nОписание задачи:\n{task.description}',
-        reply_markup=await get_task_menu(task.id)
-    )
+    await show_task(callback, task)
 
 
-@task_router.on_callback_query(filters.regex(r'^mark_task_done_') & is_register_user)
-async def mark_task_as_complete_handler(client: Client, callback: CallbackQuery):
+@callback_routes.action('mark_task_done', int)
+async def mark_task_as_complete_handler(client: Client, callback: CallbackQuery, task_id: int, user_id: int):
     """
     Обработчик колбэка для пометки задачи как выполненной.
 
     Аргументы:
         client (Client): Клиент Pyrogram.
         callback (CallbackQuery): Колбэк, вызвавший хэндлер.
+        task_id (int): Идентификатор задачи.
+        user_id (int): Идентификатор пользователя в базе данных.
 
     Операции:
-        - Извлекает идентификатор задачи из данных колбэка.
         - Помечает задачу как выполненную в базе данных.
         - Отправляет уведомление об успешном выполнении задачи.
-        - Обновляет информацию о задаче.
+        - Обновляет информацию о задаче по данным, возвращенным запросом.
     """
-    task_id = str(callback.data).split('_')[3]
-    await mark_task_as_complete(int(task_id))
+    task = await mark_task_as_complete(task_id, user_id)
+    if task is None:
+        outbox.answer(callback, "Задача не найдена", show_alert=True)
+        return
 
-    await callback.answer("Задача Выполнена! ✅", show_alert=True)
+    outbox.answer(callback, "Задача Выполнена! ✅", show_alert=True)
+    await show_task(callback, task)
 
-    callback.data = f'task_{task_id}'
-    await get_task_handler(client, callback)
 
-
-@task_router.on_callback_query(filters.regex(r'^delete_task_') & is_register_user)
-async def delete_task_handler(client: Client, callback: CallbackQuery):
+@callback_routes.action('delete_task', int)
+async def delete_task_handler(client: Client, callback: CallbackQuery, task_id: int, user_id: int):
     """
     Обработчик колбэка для удаления задачи.
 
     Аргументы:
         client (Client): Клиент Pyrogram.
         callback (CallbackQuery): Колбэк, вызвавший хэндлер.
+        task_id (int): Идентификатор задачи.
+        user_id (int): Идентификатор пользователя в базе данных.
 
     Операции:
-        - Извлекает идентификатор задачи из данных колбэка.
         - Удаляет задачу из базы данных.
         - Отправляет уведомление об успешном удалении задачи.
         - Возвращает пользователя в главное меню.
     """
-    task_id = str(callback.data).split('_')[2]
-    await delete_task(int(task_id))
-
-    await callback.answer("Задача Удалена ❌", show_alert=True)
+    if not await delete_task(task_id, user_id):
+        outbox.answer(callback, "Задача не найдена", show_alert=True)
+        return
 
-    callback.data = 'main_menu'
+    outbox.answer(callback, "Задача Удалена ❌", show_alert=True)
     await main_menu_callback_handler(client, callback)
+
+
+async def import_tasks(message: Message, user_id: int, lines, csv_format: bool = False) -> None:
+    """
+    Импортирует задачи из потока строк и отправляет итог одним сообщением.
+
+    Строки разбираются по мере чтения и проверяются теми же правилами, что и в CreateTask.
+    Корректные задачи накапливаются в пачки по IMPORT_CHUNK_SIZE, каждая пачка вставляется
+    одной транзакцией функцией add_tasks.
+
+    Аргументы:
+        message (Message): Сообщение, на которое отправляется итог импорта.
+        user_id (int): Идентификатор пользователя в базе данных.
+        lines (AsyncIterable[str]): Строки со списком задач.
+        csv_format (bool): Разбирать ли строки как CSV.
+    """
+    imported = skipped = 0
+    invalid_lines = []
+    truncated = False
+    chunk = []
+    line_number = 0
+    async for line in lines:
+        line_number += 1
+        parsed = parse_task_line(line, csv_format)
+        if parsed is None:
+            continue
+        name, description = parsed
+        if not name or not CreateTask.validate_name(name) or not CreateTask.validate_description(description):
+            skipped += 1
+            if len(invalid_lines) < 10:
+                invalid_lines.append(str(line_number))
+            continue
+        if imported + len(chunk) >= IMPORT_MAX_TASKS:
+            truncated = True
+            break
+        chunk.append({'name': name, 'description': description})
+        if len(chunk) >= IMPORT_CHUNK_SIZE:
+            imported += await add_tasks(user_id, chunk)
+            chunk = []
+    imported += await add_tasks(user_id, chunk)
+
+    text = f"Импортировано задач: {imported}"
+    if skipped:
+        text += (f"\nПропущено строк: {skipped} (пустое или слишком длинное название или описание; "
+                 f"строки {', '.join(invalid_lines)}{'...' if skipped > len(invalid_lines) else ''})")
+    if truncated:
+        text += f"\nЗа один раз можно импортировать не более {IMPORT_MAX_TASKS} задач."
+    outbox.reply(message, text)
+
+
+async def import_tasks_from_message(client: Client, message: Message, user_id: int) -> bool:
+    """
+    Импортирует задачи из файла или текста сообщения.
+
+    Аргументы:
+        client (Client): Клиент Pyrogram.
+        message (Message): Сообщение со списком задач.
+        user_id (int): Идентификатор пользователя в базе данных.
+
+    Возвращает:
+        bool: False, если сообщение не содержит ни файла, ни текста.
+    """
+    document = message.document
+    if document is not None:
+        file_name = (document.file_name or '').lower()
+        if not file_name.endswith(('.txt', '.csv')):
+            outbox.reply(message, "Поддерживаются файлы .txt и .csv.")
+        elif (document.file_size or 0) > IMPORT_MAX_FILE_SIZE:
+            outbox.reply(message, f"Файл слишком большой, максимум {IMPORT_MAX_FILE_SIZE // 1024 // 1024} МБ.")
+        else:
+            await import_tasks(message, user_id, iter_document_lines(client.stream_media(message)),
+                               csv_format=file_name.endswith('.csv'))
+        return True
+
+    if message.text:
+        await import_tasks(message, user_id, iter_text_lines(message.text))
+        return True
+    return False
+
+
+@task_router.on_message(filters.command("import") & filters.private & is_register_user)
+async def import_command_handler(client: Client, message: Message, state: State, user_id: int) -> None:
+    """
+    Обработчик команды /import для массового создания задач.
+
+    Аргументы:
+        client (Client): Клиент Pyrogram.
+        message (Message): Сообщение с командой; список задач может идти в строках после команды
+            или в прикрепленном файле.
+        state (State): Состояние FSM.
+        user_id (int): Идентификатор пользователя в базе данных.
+
+    Операции:
+        - Импортирует задачи из файла или строк после команды.
+        - Если задач в сообщении нет, запрашивает их и устанавливает состояние на ImportTasks.lines.
+    """
+    if message.document is not None:
+        await import_tasks_from_message(client, message, user_id)
+        return
+
+    parts = (message.text or '').split(maxsplit=1)
+    if len(parts) < 2:
+        outbox.reply(message, IMPORT_HELP)
+        await state.set_state(ImportTasks.lines)
+        return
+
+    await import_tasks(message, user_id, iter_text_lines(parts[1]))
+
+
+@task_router.on_message(filters.private & StateFilter(ImportTasks.lines) & is_register_user)
+async def process_import_lines(client: Client, message: Message, state: State, user_id: int) -> None:
+    """
+    Обработчик для состояния ImportTasks.lines.
+
+    Аргументы:
+        client (Client): Клиент Pyrogram.
+        message (Message): Сообщение со списком задач или файлом.
+        state (State): Состояние FSM.
+        user_id (int): Идентификатор пользователя в базе данных.
+
+    Операции:
+        - Импортирует задачи из файла или текста сообщения.
+    """
+    if not await import_tasks_from_message(client, message, user_id):
+        outbox.reply(message, IMPORT_HELP)
+        return
+    await state.finish()
+
+
+# Чаты, в которые сейчас готовится или отправляется файл экспорта
+exports_in_progress = set()
+
+
+async def send_tasks_export(client: Client, message: Message, owner_id: int | None, file_name: str) -> None:
+    """
+    Выгружает задачи в файл и ставит его отправку документом в очередь исходящих сообщений.
+
+    Задачи читаются из серверного курсора пачками и записываются во временный файл по мере чтения,
+    поэтому потребление памяти не зависит от количества задач. Файл закрывается после отправки.
+    В один чат одновременно готовится только один экспорт.
+
+    Аргументы:
+        client (Client): Клиент Pyrogram.
+        message (Message): Сообщение с командой; формат ('csv' или 'json') можно указать после команды.
+        owner_id (int | None): Идентификатор владельца задач; None - задачи всех пользователей.
+        file_name (str): Имя файла без расширения.
+    """
+    parts = (message.text or '').split(maxsplit=1)
+    export_format = parts[1].strip().lower() if len(parts) > 1 else 'csv'
+    if export_format not in EXPORT_FORMATS:
+        outbox.reply(message, f"Поддерживаемые форматы: {', '.join(EXPORT_FORMATS)}.")
+        return
+
+    chat_id = message.chat.id
+    if chat_id in exports_in_progress:
+        outbox.reply(message, "Экспорт уже выполняется, дождитесь файла.")
+        return
+
+    exports_in_progress.add(chat_id)
+    try:
+        file, count = await write_tasks_export(stream_tasks(owner_id), export_format, file_name)
+    except BaseException:
+        exports_in_progress.discard(chat_id)
+        raise
+    if not count:
+        file.close()
+        exports_in_progress.discard(chat_id)
+        outbox.reply(message, "Задач для экспорта нет.")
+        return
+
+    def finish(_) -> None:
+        file.close()
+        exports_in_progress.discard(chat_id)
+
+    future = outbox.submit(chat_id, partial(
+        client.send_document,
+        chat_id=chat_id,
+        document=file,
+        file_name=file.name,
+        caption=f"Экспортировано задач: {count}"
+    ), Priority.BULK)
+    future.add_done_callback(finish)
+
+
+@task_router.on_message(filters.command("export") & filters.private & is_register_user)
+async def export_command_handler(client: Client, message: Message, user_id: int) -> None:
+    """
+    Обработчик команды /export [csv|json] для выгрузки задач пользователя в файл.
+
+    Аргументы:
+        client (Client): Клиент Pyrogram.
+        message (Message): Сообщение, вызвавшее команду.
+        user_id (int): Идентификатор пользователя в базе данных.
+
+    Операции:
+        - Отправляет файл CSV или NDJSON со всеми задачами пользователя.
+    """
+    await send_tasks_export(client, message, user_id, 'tasks')
+
+
+@task_router.on_message(filters.command("export_all") & filters.private & is_admin)
+async def export_all_command_handler(client: Client, message: Message) -> None:
+    """
+    Обработчик команды /export_all [csv|json] для выгрузки задач всех пользователей (только для ADMIN_IDS).
+
+    Аргументы:
+        client (Client): Клиент Pyrogram.
+        message (Message): Сообщение, вызвавшее команду.
+
+    Операции:
+        - Отправляет файл CSV или NDJSON со всеми задачами всех пользователей.
+    """
+    await send_tasks_export(client, message, None, 'all_tasks')
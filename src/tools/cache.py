@@ -0,0 +1,193 @@
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+MISSING = object()
+
+
+class TTLCache:
+    """
+    LRU-кэш с ограниченным временем жизни записей.
+
+    Атрибуты:
+        maxsize (int): Максимальное количество записей; при переполнении вытесняется самая давняя.
+        ttl (float): Время жизни записи по умолчанию в секундах.
+        hits (int): Количество попаданий в кэш.
+        misses (int): Количество промахов.
+
+    Примечание:
+        Кэш рассчитан на работу внутри одного event loop и не использует блокировки.
+        Значение None является допустимым и кэшируется так же, как любое другое,
+        промах обозначается объектом MISSING.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, clock: Callable[[], float] = time.monotonic) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._clock = clock
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable) -> Any:
+        """
+        Возвращает значение по ключу и помечает запись как недавно использованную.
+
+        Аргументы:
+            key (Hashable): Ключ записи.
+
+        Возвращает:
+            Any: Значение записи или MISSING, если записи нет или её срок жизни истек.
+        """
+        item = self._data.get(key)
+        if item is None:
+            self.misses += 1
+            return MISSING
+        expires_at, value = item
+        if expires_at <= self._clock():
+            del self._data[key]
+            self.misses += 1
+            return MISSING
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None) -> None:
+        """
+        Сохраняет значение в кэше, вытесняя самые давние записи при переполнении.
+
+        Аргументы:
+            key (Hashable): Ключ записи.
+            value (Any): Сохраняемое значение.
+            ttl (float | None): Время жизни записи в секундах, по умолчанию self.ttl.
+        """
+        self._data[key] = (self._clock() + (self.ttl if ttl is None else ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        """
+        Удаляет запись из кэша, если она существует.
+
+        Аргументы:
+            key (Hashable): Ключ записи.
+        """
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """
+        Очищает кэш и сбрасывает счетчики.
+        """
+        self._data.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+class GroupedTTLCache:
+    """
+    Кэш, записи которого сгруппированы по ключу группы (например, по пользователю).
+
+    Группы вытесняются по принципу LRU и имеют ограниченное время жизни, внутри группы
+    хранится не более group_size записей. Вся группа сбрасывается одним вызовом invalidate,
+    что позволяет инвалидировать все закэшированные страницы пользователя при изменении его данных.
+
+    Чтобы значение, прочитанное до изменения данных, не попало в кэш после его инвалидации, читающий код
+    запоминает generation(group) перед чтением и передает его в set: если группа за это время была
+    инвалидирована, значение не сохраняется.
+
+    Атрибуты:
+        group_size (int): Максимальное количество записей в группе.
+        hits (int): Количество попаданий в кэш.
+        misses (int): Количество промахов.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, group_size: int,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        self.group_size = group_size
+        self.hits = 0
+        self.misses = 0
+        self._groups = TTLCache(maxsize=maxsize, ttl=ttl, clock=clock)
+        # Номер последней инвалидации группы; счетчик общий, поэтому номера не повторяются
+        self._generation = 0
+        self._invalidated = TTLCache(maxsize=maxsize, ttl=ttl, clock=clock)
+
+    def __len__(self) -> int:
+        return len(self._groups)
+
+    def get(self, group: Hashable, key: Hashable) -> Any:
+        """
+        Возвращает значение записи группы.
+
+        Аргументы:
+            group (Hashable): Ключ группы.
+            key (Hashable): Ключ записи внутри группы.
+
+        Возвращает:
+            Any: Значение записи или MISSING.
+        """
+        items = self._groups.get(group)
+        if items is MISSING or key not in items:
+            self.misses += 1
+            return MISSING
+        items.move_to_end(key)
+        self.hits += 1
+        return items[key]
+
+    def generation(self, group: Hashable) -> int:
+        """
+        Возвращает номер последней инвалидации группы.
+
+        Аргументы:
+            group (Hashable): Ключ группы.
+
+        Возвращает:
+            int: Номер инвалидации; 0, если группа давно не инвалидировалась.
+        """
+        generation = self._invalidated.get(group)
+        return 0 if generation is MISSING else generation
+
+    def set(self, group: Hashable, key: Hashable, value: Any, generation: int | None = None) -> None:
+        """
+        Сохраняет значение записи группы, вытесняя самые давние записи группы при переполнении.
+
+        Аргументы:
+            group (Hashable): Ключ группы.
+            key (Hashable): Ключ записи внутри группы.
+            value (Any): Сохраняемое значение.
+            generation (int | None): Результат generation(group), полученный до чтения значения;
+                если с тех пор группа инвалидирована, значение устарело и не сохраняется.
+        """
+        if generation is not None and generation != self.generation(group):
+            return
+        items = self._groups.get(group)
+        if items is MISSING:
+            items = OrderedDict()
+            self._groups.set(group, items)
+        items[key] = value
+        items.move_to_end(key)
+        while len(items) > self.group_size:
+            items.popitem(last=False)
+
+    def invalidate(self, group: Hashable) -> None:
+        """
+        Удаляет все записи группы.
+
+        Аргументы:
+            group (Hashable): Ключ группы.
+        """
+        self._generation += 1
+        self._invalidated.set(group, self._generation)
+        self._groups.pop(group)
+
+    def clear(self) -> None:
+        """
+        Очищает кэш и сбрасывает счетчики.
+        """
+        self._groups.clear()
+        self._invalidated.clear()
+        self.hits = 0
+        self.misses = 0
@@ -0,0 +1,104 @@
+import base64
+import hashlib
+import hmac
+
+CALLBACK_DATA_VERSION = 1
+MAC_SIZE = 6
+
+
+class CallbackDataError(ValueError):
+    """
+    Ошибка разбора callback_data: неизвестная версия, поврежденные данные или неверная подпись.
+    """
+
+
+def _write_varint(value: int, buffer: bytearray) -> None:
+    if value < 0:
+        raise ValueError('Аргументы callback_data должны быть неотрицательными целыми числами')
+    while value > 0x7F:
+        buffer.append((value & 0x7F) | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def _read_varints(payload: bytes) -> tuple[int, ...]:
+    values = []
+    value = shift = 0
+    for byte in payload:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            if shift > 63:
+                raise CallbackDataError('Слишком длинное число в callback_data')
+        else:
+            values.append(value)
+            value = shift = 0
+    if shift:
+        raise CallbackDataError('Оборванное число в callback_data')
+    return tuple(values)
+
+
+class CallbackCodec:
+    """
+    Компактный подписанный формат callback_data.
+
+    Данные кнопки упаковываются в байты
+    [версия][код действия][аргументы в виде varint...][HMAC-SHA256, первые MAC_SIZE байт]
+    и кодируются в base64url без выравнивания. Например, кнопка задачи с идентификатором
+    до двух миллионов занимает 15 символов из допустимых Telegram 64 байт.
+
+    Разбор - одна проверка версии и подписи, поэтому подделанные данные (например, с чужим
+    идентификатором задачи) отклоняются до обращения к базе данных.
+
+    Аргументы:
+        secret (bytes): Секретный ключ подписи.
+    """
+
+    def __init__(self, secret: bytes) -> None:
+        self.secret = secret
+
+    def _mac(self, body: bytes) -> bytes:
+        return hmac.new(self.secret, body, hashlib.sha256).digest()[:MAC_SIZE]
+
+    def encode(self, code: int, args: tuple[int, ...] = ()) -> str:
+        """
+        Упаковывает код действия и аргументы в callback_data.
+
+        Аргументы:
+            code (int): Код действия, 0-255.
+            args (tuple[int, ...]): Неотрицательные целые аргументы.
+
+        Возвращает:
+            str: callback_data.
+        """
+        body = bytearray((CALLBACK_DATA_VERSION, code))
+        for arg in args:
+            _write_varint(int(arg), body)
+        body += self._mac(bytes(body))
+        return base64.urlsafe_b64encode(body).rstrip(b'=').decode()
+
+    def decode(self, data: str) -> tuple[int, tuple[int, ...]]:
+        """
+        Проверяет подпись callback_data и распаковывает код действия и аргументы.
+
+        Аргументы:
+            data (str): callback_data.
+
+        Возвращает:
+            tuple[int, tuple[int, ...]]: Код действия и аргументы.
+
+        Исключения:
+            CallbackDataError: Если данные повреждены, имеют неизвестную версию или неверную подпись.
+        """
+        try:
+            raw = base64.urlsafe_b64decode(data + '=' * (-len(data) % 4))
+        except ValueError as e:
+            raise CallbackDataError('callback_data не в формате base64url') from e
+        if len(raw) < 2 + MAC_SIZE:
+            raise CallbackDataError('Слишком короткие callback_data')
+        body, mac = raw[:-MAC_SIZE], raw[-MAC_SIZE:]
+        if body[0] != CALLBACK_DATA_VERSION:
+            raise CallbackDataError(f'Неизвестная версия callback_data: {body[0]}')
+        if not hmac.compare_digest(mac, self._mac(body)):
+            raise CallbackDataError('Неверная подпись callback_data')
+        return body[1], _read_varints(body[2:])
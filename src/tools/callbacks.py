@@ -0,0 +1,160 @@
+import logging
+from typing import Callable, NamedTuple
+
+from pyrogram import Client
+from pyrogram.types import CallbackQuery
+
+from src.config import CALLBACK_SECRET
+from src.tools.callback_data import CallbackCodec, CallbackDataError
+from src.tools.metrics import current_update
+from src.tools.outbox import outbox
+
+logger = logging.getLogger(__name__)
+
+# Аргументы, которые диспетчер подставляет в обработчик по имени параметра
+CONTEXT_ARGUMENTS = ('state', 'user_id')
+
+CALLBACK_DATA_LIMIT = 64
+
+# Коды действий в callback_data. Коды попадают в кнопки уже отправленных сообщений,
+# поэтому существующие коды нельзя менять или переиспользовать.
+ACTION_CODES = {
+    'main_menu': 1,
+    'create_new_task': 2,
+    'actual_user_tasks': 3,
+    'completed_user_tasks': 4,
+    'all_user_tasks': 5,
+    'delete_completed_tasks': 6,
+    'tasks_page': 7,
+    'task': 8,
+    'mark_task_done': 9,
+    'delete_task': 10,
+    'search_tasks': 11,
+    'search_page': 12,
+}
+
+
+class CallbackRoute(NamedTuple):
+    """
+    Маршрут колбэка.
+
+    Атрибуты:
+        action (str): Действие.
+        handler (Callable): Асинхронный обработчик.
+        arg_types (tuple[type, ...]): Типы аргументов, следующих за действием.
+        context (tuple[str, ...]): Имена аргументов контекста, которые принимает обработчик.
+        registered (bool): Доступен ли маршрут только зарегистрированным пользователям.
+    """
+    action: str
+    handler: Callable
+    arg_types: tuple[type, ...]
+    context: tuple[str, ...]
+    registered: bool
+
+
+class CallbackRouter:
+    """
+    Таблица маршрутов колбэков.
+
+    callback_data содержит код действия и целочисленные аргументы, упакованные и подписанные
+    CallbackCodec. Данные разбираются один раз, обработчик находится поиском в словаре
+    по коду действия, а аргументы передаются обработчику позиционно после client и callback.
+    Проверка регистрации выполняется один раз на колбэк по user_id, определенному
+    UserContextMiddleware.
+
+    Аргументы:
+        codec (CallbackCodec): Формат callback_data.
+        action_codes (dict[str, int]): Коды действий.
+    """
+
+    def __init__(self, codec: CallbackCodec, action_codes: dict[str, int]) -> None:
+        self.codec = codec
+        self.action_codes = action_codes
+        self._routes: dict[int, CallbackRoute] = {}
+
+    def action(self, action: str, *arg_types: type, registered: bool = True) -> Callable:
+        """
+        Декоратор, регистрирующий обработчик действия.
+
+        Аргументы:
+            action (str): Действие.
+            *arg_types (type): Типы аргументов действия.
+            registered (bool): Доступно ли действие только зарегистрированным пользователям.
+
+        Возвращает:
+            Callable: Декоратор, возвращающий обработчик без изменений.
+        """
+        def decorator(handler: Callable) -> Callable:
+            code = handler.__code__
+            parameters = code.co_varnames[:code.co_argcount + code.co_kwonlyargcount]
+            context = tuple(name for name in CONTEXT_ARGUMENTS if name in parameters)
+            self._routes[self.action_codes[action]] = CallbackRoute(action, handler, arg_types, context, registered)
+            return handler
+        return decorator
+
+    def pack(self, action: str, *args) -> str:
+        """
+        Формирует callback_data для действия.
+
+        Аргументы:
+            action (str): Действие.
+            *args: Аргументы действия.
+
+        Возвращает:
+            str: callback_data.
+        """
+        data = self.codec.encode(self.action_codes[action], args)
+        if len(data) > CALLBACK_DATA_LIMIT:
+            raise ValueError(f"callback_data '{data}' длиннее {CALLBACK_DATA_LIMIT} байт")
+        return data
+
+    def parse(self, data: str) -> tuple[CallbackRoute, tuple] | None:
+        """
+        Разбирает callback_data.
+
+        Аргументы:
+            data (str): callback_data.
+
+        Возвращает:
+            tuple[CallbackRoute, tuple] | None: Маршрут и приведенные аргументы или None,
+            если данные не прошли проверку, действие неизвестно или аргументы некорректны.
+        """
+        try:
+            code, args = self.codec.decode(data)
+        except CallbackDataError as e:
+            logger.warning('Отклонены callback_data %r: %s', data, e)
+            return None
+        route = self._routes.get(code)
+        if route is None or len(args) != len(route.arg_types):
+            return None
+        return route, tuple(arg_type(arg) for arg_type, arg in zip(route.arg_types, args))
+
+    async def dispatch(self, client: Client, callback: CallbackQuery, state=None, user_id: int | None = None) -> None:
+        """
+        Находит маршрут колбэка и вызывает его обработчик.
+
+        Аргументы:
+            client (Client): Клиент Pyrogram.
+            callback (CallbackQuery): Колбэк.
+            state (State): Состояние FSM.
+            user_id (int | None): Идентификатор пользователя в базе данных.
+        """
+        parsed = self.parse(callback.data or '')
+        if parsed is None:
+            outbox.answer(callback, 'Кнопка устарела, откройте меню заново: /start', show_alert=True)
+            return
+
+        route, args = parsed
+        if route.registered and user_id is None:
+            outbox.answer(callback, 'Для начала регистрации введите /start', show_alert=True)
+            return
+
+        stats = current_update.get()
+        if stats is not None:
+            stats.set_handler(route.handler)
+
+        context = {'state': state, 'user_id': user_id}
+        await route.handler(client, callback, *args, **{name: context[name] for name in route.context})
+
+
+callback_routes = CallbackRouter(CallbackCodec(CALLBACK_SECRET.encode()), ACTION_CODES)
@@ -0,0 +1,43 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Hashable
+
+logger = logging.getLogger(__name__)
+
+
+class Debouncer:
+    """
+    Откладывает выполнение вызова и отменяет его, если за время задержки пришел новый вызов с тем же ключом.
+
+    Аргументы:
+        delay (float): Задержка в секундах.
+    """
+
+    def __init__(self, delay: float) -> None:
+        self.delay = delay
+        self._pending: dict[Hashable, asyncio.TimerHandle] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    def call(self, key: Hashable, func: Callable[[], Awaitable]) -> None:
+        """
+        Планирует вызов func через delay секунд, отменяя еще не выполненный вызов с тем же ключом.
+
+        Аргументы:
+            key (Hashable): Ключ, например идентификатор пользователя.
+            func (Callable[[], Awaitable]): Асинхронная функция без аргументов.
+        """
+        handle = self._pending.pop(key, None)
+        if handle is not None:
+            handle.cancel()
+        self._pending[key] = asyncio.get_running_loop().call_later(self.delay, self._run, key, func)
+
+    def _run(self, key: Hashable, func: Callable[[], Awaitable]) -> None:
+        self._pending.pop(key, None)
+        task = asyncio.create_task(func())
+        self._tasks.add(task)
+        task.add_done_callback(self._done)
+
+    def _done(self, task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error('Ошибка отложенного вызова', exc_info=task.exception())
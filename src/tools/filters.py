@@ -1,9 +1,8 @@
 from pyrogram import filters
 from pyrogram.types import Message
-from sqlalchemy import select
 
-from src.database.conn import async_session
-from src.database.models import User
+from src.config import ADMIN_IDS
+from src.database.requests import get_user_id_by_tg_id
 
 
 async def check_register_user(_, __, m: Message) -> bool:
@@ -18,9 +17,7 @@ async def check_register_user(_, __, m: Message) -> bool:
     Возвращает:
         bool: True, если пользователь зарегистрирован, иначе False.
     """
-    async with async_session() as session:
-        user = await session.scalar(select(User).where(User.tg_id == m.from_user.id))
-        return False if not user else True
+    return await get_user_id_by_tg_id(m.from_user.id) is not None
 
 
 async def check_unregister_user(_, __, m: Message) -> bool:
@@ -35,10 +32,24 @@ async def check_unregister_user(_, __, m: Message) -> bool:
     Возвращает:
         bool: True, если пользователь не зарегистрирован, иначе False.
     """
-    async with async_session() as session:
-        user = await session.scalar(select(User).where(User.tg_id == m.from_user.id))
-        return True if not user else False
+    return await get_user_id_by_tg_id(m.from_user.id) is None
+
+
+async def check_admin(_, __, m: Message) -> bool:
+    """
+    Проверяет, является ли пользователь администратором (указан в ADMIN_IDS).
+
+    Аргументы:
+        _ (Any): Игнорируемый аргумент.
+        __ (Any): Игнорируемый аргумент.
+        m (Message): Сообщение, вызвавшее проверку.
+
+    Возвращает:
+        bool: True, если пользователь - администратор, иначе False.
+    """
+    return m.from_user is not None and m.from_user.id in ADMIN_IDS
 
 
 is_register_user = filters.create(check_register_user)
 is_unregister_user = filters.create(check_unregister_user)
+is_admin = filters.create(check_admin)
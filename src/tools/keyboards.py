@@ -1,20 +1,102 @@
 from pyrogram.types import InlineKeyboardButton, InlineKeyboardMarkup
 
+from src.config import TASKS_PAGE_SIZE
+from src.tools.callbacks import callback_routes
+from src.tools.other import is_done_task
+
+# Списки задач; в callback_data список передается индексом в этом кортеже
+TASK_LIST_STATUSES = ('actual', 'completed', 'all')
+
 
 MAIN_MENU = InlineKeyboardMarkup([
-    [InlineKeyboardButton('➕ Добавить задачу', callback_data='create_new_task')],
-    [InlineKeyboardButton('🎯 Актуальные задачи', callback_data='actual_user_tasks')],
-    [InlineKeyboardButton('✅ Выполненные задачи', callback_data='completed_user_tasks')],
-    [InlineKeyboardButton('❌ Удалить выполненное', callback_data='delete_completed_tasks')],
-    [InlineKeyboardButton('📋 Все задачи', callback_data='all_user_tasks')],
+    [InlineKeyboardButton('➕ Добавить задачу', callback_data=callback_routes.pack('create_new_task'))],
+    [InlineKeyboardButton('🎯 Актуальные задачи', callback_data=callback_routes.pack('actual_user_tasks'))],
+    [InlineKeyboardButton('✅ Выполненные задачи', callback_data=callback_routes.pack('completed_user_tasks'))],
+    [InlineKeyboardButton('❌ Удалить выполненное', callback_data=callback_routes.pack('delete_completed_tasks'))],
+    [InlineKeyboardButton('📋 Все задачи', callback_data=callback_routes.pack('all_user_tasks'))],
+    [InlineKeyboardButton('🔍 Найти задачу', callback_data=callback_routes.pack('search_tasks'))],
 ])
 
 
 async def get_task_menu(task_id) -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup([
-        [InlineKeyboardButton('✅ Пометить как выполненную', callback_data=f'mark_task_done_{task_id}')],
-        [InlineKeyboardButton('❌ Удалить задачу', callback_data=f'delete_task_{task_id}')],
-        [InlineKeyboardButton('🏠 Главное меню', callback_data='main_menu')],
+        [InlineKeyboardButton('✅ Пометить как выполненную',
+                              callback_data=callback_routes.pack('mark_task_done', task_id))],
+        [InlineKeyboardButton('❌ Удалить задачу', callback_data=callback_routes.pack('delete_task', task_id))],
+        [InlineKeyboardButton('🏠 Главное меню', callback_data=callback_routes.pack('main_menu'))],
     ])
 
 
+async def get_reminder_menu(task_id) -> InlineKeyboardMarkup:
+    return InlineKeyboardMarkup([
+        [InlineKeyboardButton('📌 Открыть задачу', callback_data=callback_routes.pack('task', task_id))],
+    ])
+
+
+async def get_tasks_page_menu(page, status: str) -> InlineKeyboardMarkup:
+    """
+    Создает клавиатуру страницы списка задач с кнопками навигации.
+
+    Список и курсор соседней страницы передаются в аргументах действия 'tasks_page':
+    индекс списка в TASK_LIST_STATUSES, направление (0 - вперед, 1 - назад), is_done и id задачи-курсора.
+
+    Аргументы:
+        page (TasksPage): Страница задач.
+        status (str): Список задач: 'actual', 'completed' или 'all'.
+
+    Возвращает:
+        InlineKeyboardMarkup: Клавиатура с задачами, навигацией и кнопкой возврата в главное меню.
+    """
+    keyboard = [[InlineKeyboardButton(text=f'{await is_done_task(task.is_done)} - {task.name}',
+                                      callback_data=callback_routes.pack('task', task.id))] for task in page.tasks]
+
+    list_index = TASK_LIST_STATUSES.index(status)
+    navigation = []
+    if page.has_prev and page.tasks:
+        first = page.tasks[0]
+        navigation.append(InlineKeyboardButton(
+            '⬅️ Назад', callback_data=callback_routes.pack('tasks_page', list_index, 1, int(first.is_done), first.id)
+        ))
+    if page.has_next and page.tasks:
+        last = page.tasks[-1]
+        navigation.append(InlineKeyboardButton(
+            'Вперед ➡️', callback_data=callback_routes.pack('tasks_page', list_index, 0, int(last.is_done), last.id)
+        ))
+    if navigation:
+        keyboard.append(navigation)
+
+    keyboard.append([InlineKeyboardButton(text="🏠 Главное меню", callback_data=callback_routes.pack('main_menu'))])
+    return InlineKeyboardMarkup(keyboard)
+
+
+async def get_search_page_menu(page, offset: int) -> InlineKeyboardMarkup:
+    """
+    Создает клавиатуру страницы результатов поиска с кнопками навигации.
+
+    Поисковый запрос хранится на стороне бота, в аргументах действия 'search_page' передается
+    только смещение соседней страницы.
+
+    Аргументы:
+        page (TasksPage): Страница найденных задач.
+        offset (int): Смещение текущей страницы.
+
+    Возвращает:
+        InlineKeyboardMarkup: Клавиатура с задачами, навигацией и кнопкой возврата в главное меню.
+    """
+    keyboard = [[InlineKeyboardButton(text=f'{await is_done_task(task.is_done)} - {task.name}',
+                                      callback_data=callback_routes.pack('task', task.id))] for task in page.tasks]
+
+    navigation = []
+    if page.has_prev:
+        navigation.append(InlineKeyboardButton(
+            '⬅️ Назад', callback_data=callback_routes.pack('search_page', max(offset - TASKS_PAGE_SIZE, 0))
+        ))
+    if page.has_next:
+        navigation.append(InlineKeyboardButton(
+            'Вперед ➡️', callback_data=callback_routes.pack('search_page', offset + len(page.tasks))
+        ))
+    if navigation:
+        keyboard.append(navigation)
+
+    keyboard.append([InlineKeyboardButton(text="🏠 Главное меню", callback_data=callback_routes.pack('main_menu'))])
+    return InlineKeyboardMarkup(keyboard)
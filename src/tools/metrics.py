@@ -0,0 +1,223 @@
+import asyncio
+import bisect
+import time
+from contextvars import ContextVar, Token
+from typing import Callable
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Metric:
+    """
+    Базовый класс метрики в формате Prometheus.
+
+    Атрибуты:
+        name (str): Имя метрики.
+        documentation (str): Описание метрики.
+        labelnames (tuple[str, ...]): Имена меток.
+    """
+    type = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        REGISTRY.append(self)
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(label, '')) for label in self.labelnames)
+
+    def _format_labels(self, key: tuple, extra: dict | None = None) -> str:
+        pairs = list(zip(self.labelnames, key)) + list((extra or {}).items())
+        if not pairs:
+            return ''
+        return '{' + ','.join(f'{name}="{value}"' for name, value in pairs) + '}'
+
+    def samples(self) -> list[str]:
+        return []
+
+    def render(self) -> str:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.type}']
+        lines.extend(self.samples())
+        return '\n'.join(lines)
+
+
+class Counter(Metric):
+    """
+    Монотонно возрастающий счетчик.
+    """
+    type = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.values: dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def get(self, **labels) -> float:
+        return self.values.get(self._key(labels), 0)
+
+    def samples(self) -> list[str]:
+        return [f'{self.name}{self._format_labels(key)} {value}' for key, value in self.values.items()]
+
+
+class Gauge(Metric):
+    """
+    Текущее значение величины. Если передана функция func, значение вычисляется в момент выгрузки метрик.
+    """
+    type = 'gauge'
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = (),
+                 func: Callable[[], float] | None = None) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.values: dict[tuple, float] = {}
+        self.func = func
+
+    def set(self, value: float, **labels) -> None:
+        self.values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def get(self, **labels) -> float:
+        if self.func is not None:
+            return self.func()
+        return self.values.get(self._key(labels), 0)
+
+    def samples(self) -> list[str]:
+        if self.func is not None:
+            return [f'{self.name} {self.func()}']
+        return [f'{self.name}{self._format_labels(key)} {value}' for key, value in self.values.items()]
+
+
+class Histogram(Metric):
+    """
+    Распределение наблюдаемых значений по корзинам.
+    """
+    type = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = (),
+                 buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self.counts: dict[tuple, list[int]] = {}
+        self.sums: dict[tuple, float] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        counts = self.counts.get(key)
+        if counts is None:
+            counts = self.counts[key] = [0] * (len(self.buckets) + 1)
+            self.sums[key] = 0.0
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sums[key] += value
+
+    def count(self, **labels) -> int:
+        return sum(self.counts.get(self._key(labels), ()))
+
+    def sum(self, **labels) -> float:
+        return self.sums.get(self._key(labels), 0.0)
+
+    def samples(self) -> list[str]:
+        lines = []
+        for key, counts in self.counts.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else str(bound)
+                lines.append(f'{self.name}_bucket{self._format_labels(key, {"le": le})} {cumulative}')
+            lines.append(f'{self.name}_sum{self._format_labels(key)} {self.sums[key]}')
+            lines.append(f'{self.name}_count{self._format_labels(key)} {cumulative}')
+        return lines
+
+
+REGISTRY: list[Metric] = []
+
+
+def render_metrics() -> str:
+    """
+    Формирует текстовое представление всех зарегистрированных метрик в формате Prometheus.
+
+    Возвращает:
+        str: Метрики в формате text/plain; version=0.0.4.
+    """
+    return '\n'.join(metric.render() for metric in REGISTRY) + '\n'
+
+
+class UpdateStats:
+    """
+    Статистика обработки одного обновления, которую собирают middleware, обработчик и хуки базы данных.
+
+    Атрибуты:
+        router (str): Модуль маршрутизатора обработчика.
+        handler (str): Имя обработчика.
+        started_at (float): Время начала обработки обновления (time.perf_counter).
+        db_queries (int): Количество SQL-запросов.
+        db_time (float): Суммарное время SQL-запросов в секундах.
+        queries (list[QueryRecord]): Выполненные SQL-запросы.
+        token (Token | None): Токен установки статистики в current_update; по нему значение
+            сбрасывается после обработки обновления.
+    """
+    __slots__ = ('router', 'handler', 'started_at', 'db_queries', 'db_time', 'queries', 'token')
+
+    def __init__(self) -> None:
+        self.router = ''
+        self.handler = ''
+        self.started_at = time.perf_counter()
+        self.db_queries = 0
+        self.db_time = 0.0
+        self.queries = []
+        self.token: Token | None = None
+
+    def set_handler(self, handler: Callable) -> None:
+        """
+        Указывает обработчик, которому принадлежит обновление.
+
+        Аргументы:
+            handler (Callable): Функция обработчика.
+        """
+        self.router = handler.__module__.rpartition('.')[2]
+        self.handler = handler.__name__
+
+
+# Статистика обновления, которое обрабатывается в текущей задаче asyncio
+current_update: ContextVar[UpdateStats | None] = ContextVar('current_update', default=None)
+
+
+async def start_metrics_server(host: str, port: int) -> asyncio.AbstractServer:
+    """
+    Запускает HTTP-сервер, отдающий метрики по адресу /metrics.
+
+    Аргументы:
+        host (str): Адрес, на котором принимаются соединения.
+        port (int): Порт.
+
+    Возвращает:
+        asyncio.AbstractServer: Запущенный сервер.
+    """
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request_line = await reader.readline()
+            while await reader.readline() not in (b'\r\n', b'\n', b''):
+                pass
+            parts = request_line.split()
+            if len(parts) >= 2 and parts[0] == b'GET' and parts[1].split(b'?')[0] == b'/metrics':
+                status, body = '200 OK', render_metrics().encode()
+            else:
+                status, body = '404 Not Found', b'Not Found\n'
+            writer.write(f'HTTP/1.1 {status}\r\n'
+                         f'Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n'
+                         f'Content-Length: {len(body)}\r\n'
+                         f'Connection: close\r\n\r\n'.encode() + body)
+            await writer.drain()
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, host, port)
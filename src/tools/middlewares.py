@@ -0,0 +1,107 @@
+import functools
+import time
+from typing import Callable
+
+from pyrogram import Client
+from pyrogram_patch.middlewares import PatchHelper
+from pyrogram_patch.middlewares.middleware_types import OnUpdateMiddleware
+
+from src.database.profiling import check_query_budget
+from src.database.requests import get_user_id_by_tg_id
+from src.tools.metrics import Counter, Histogram, UpdateStats, current_update
+
+HANDLER_LABELS = ('router', 'handler')
+
+HANDLER_UPDATES = Counter('bot_updates_total', 'Количество обработанных обновлений', HANDLER_LABELS)
+HANDLER_ERRORS = Counter('bot_handler_errors_total', 'Количество обновлений, завершившихся ошибкой', HANDLER_LABELS)
+HANDLER_LATENCY = Histogram('bot_handler_latency_seconds', 'Время обработки обновления', HANDLER_LABELS)
+HANDLER_DB_QUERIES = Histogram('bot_handler_db_queries', 'Количество SQL-запросов на обновление', HANDLER_LABELS,
+                               buckets=(0, 1, 2, 3, 5, 8, 13, 20, 50))
+HANDLER_DB_TIME = Histogram('bot_handler_db_seconds', 'Суммарное время SQL-запросов на обновление', HANDLER_LABELS)
+
+
+class MetricsMiddleware(OnUpdateMiddleware):
+    """
+    Middleware, начинающий сбор статистики обновления.
+
+    Создает UpdateStats в current_update до остальных middleware, поэтому в статистику
+    попадают и их запросы к базе данных. Статистику записывает в метрики и сбрасывает
+    current_update обертка обработчика из instrument_handlers.
+    """
+
+    async def __call__(self, update, client: Client, patch_helper: PatchHelper) -> None:
+        stats = UpdateStats()
+        stats.token = current_update.set(stats)
+
+
+class UserContextMiddleware(OnUpdateMiddleware):
+    """
+    Middleware, определяющий идентификатор пользователя в базе данных один раз на обновление.
+
+    Идентификатор передается обработчикам через аргумент user_id (None для незарегистрированных
+    пользователей), поэтому обработчики и функции запросов работают с users.id напрямую,
+    не обращаясь повторно к таблице users.
+    """
+
+    async def __call__(self, update, client: Client, patch_helper: PatchHelper) -> None:
+        from_user = getattr(update, 'from_user', None)
+        patch_helper.data['user_id'] = await get_user_id_by_tg_id(from_user.id) if from_user else None
+
+
+def instrument_handler(callback: Callable) -> Callable:
+    """
+    Оборачивает обработчик сбором метрик: количество обновлений, ошибок, задержка,
+    количество и время SQL-запросов. Обновления, превысившие бюджет SQL-запросов, записываются в лог.
+
+    pyrogram_patch подставляет state, user_id и patch_helper по именам параметров обработчика,
+    поэтому обертка объявляет их явно и передает обработчику только те, которые он принимает.
+
+    Аргументы:
+        callback (Callable): Асинхронная функция обработчика.
+
+    Возвращает:
+        Callable: Обернутый обработчик.
+    """
+    arguments = callback.__code__.co_varnames[:callback.__code__.co_argcount]
+
+    @functools.wraps(callback)
+    async def handler(client: Client, update, state=None, user_id=None, patch_helper=None):
+        context = {'state': state, 'user_id': user_id, 'patch_helper': patch_helper}
+        stats = current_update.get()
+        if stats is None:
+            stats = UpdateStats()
+            stats.token = current_update.set(stats)
+        stats.set_handler(callback)
+        try:
+            return await callback(client, update, **{name: context[name] for name in context if name in arguments})
+        except Exception:
+            HANDLER_ERRORS.inc(router=stats.router, handler=stats.handler)
+            raise
+        finally:
+            labels = {'router': stats.router, 'handler': stats.handler}
+            HANDLER_UPDATES.inc(**labels)
+            HANDLER_LATENCY.observe(time.perf_counter() - stats.started_at, **labels)
+            HANDLER_DB_QUERIES.observe(stats.db_queries, **labels)
+            HANDLER_DB_TIME.observe(stats.db_time, **labels)
+            check_query_budget(stats)
+            # Запросы, выполненные в этой задаче после обработки обновления, не относятся к нему
+            if stats.token is not None:
+                current_update.reset(stats.token)
+                stats.token = None
+
+    return handler
+
+
+def instrument_handlers(client: Client) -> None:
+    """
+    Оборачивает метриками все обработчики, зарегистрированные в диспетчере клиента.
+
+    Вызывается после запуска клиента, когда маршрутизаторы уже добавили свои обработчики.
+
+    Аргументы:
+        client (Client): Клиент Pyrogram.
+    """
+    for group in client.dispatcher.groups.values():
+        for handler in group:
+            if not hasattr(handler.callback, '__wrapped__'):
+                handler.callback = instrument_handler(handler.callback)
@@ -1,3 +1,9 @@
+from datetime import datetime
+
+# Формат ввода и отображения срока задачи
+DUE_AT_FORMAT = '%d.%m.%Y %H:%M'
+
+
 async def is_done_task(is_done: bool) -> str:
     """
     Возвращает символ состояния задачи.
@@ -11,5 +17,14 @@ async def is_done_task(is_done: bool) -> str:
     return "✅" if is_done else "📌"
 
 
+async def format_due_at(due_at: datetime | None) -> str:
+    """
+    Возвращает срок задачи в формате DUE_AT_FORMAT.
 
+    Аргументы:
+        due_at (datetime | None): Срок задачи.
 
+    Возвращает:
+        str: Отформатированный срок или "без срока", если срок не задан.
+    """
+    return due_at.strftime(DUE_AT_FORMAT) if due_at is not None else "без срока"
@@ -0,0 +1,361 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from enum import IntEnum
+from functools import partial
+from typing import Awaitable, Callable, Hashable
+
+from pyrogram import Client
+from pyrogram.errors import FloodWait
+from pyrogram.types import Message, CallbackQuery, InlineQuery
+
+from src.config import (OUTBOX_WORKERS, OUTBOX_GLOBAL_RATE, OUTBOX_CHAT_RATE, OUTBOX_CHAT_BURST,
+                        OUTBOX_MAX_RETRIES)
+from src.tools.cache import TTLCache, MISSING
+from src.tools.metrics import Counter, Gauge, Histogram, current_update
+
+logger = logging.getLogger(__name__)
+
+
+class Priority(IntEnum):
+    """
+    Очереди исходящих вызовов в порядке убывания приоритета.
+    """
+    ANSWER = 0
+    INTERACTIVE = 1
+    BULK = 2
+
+
+class TokenBucket:
+    """
+    Ограничитель частоты по алгоритму token bucket с резервированием.
+
+    Аргументы:
+        rate (float): Количество токенов, пополняемых в секунду.
+        capacity (float): Максимальное количество накопленных токенов.
+        clock (Callable[[], float]): Источник монотонного времени.
+    """
+
+    def __init__(self, rate: float, capacity: float, clock: Callable[[], float] = time.monotonic) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._tokens = capacity
+        self._updated_at = clock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    def reserve(self) -> float:
+        """
+        Резервирует один токен.
+
+        Возвращает:
+            float: Через сколько секунд зарезервированный токен станет доступен (0 - сразу).
+        """
+        self._refill()
+        self._tokens -= 1
+        return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def block(self, seconds: float) -> None:
+        """
+        Запрещает выдачу токенов на заданное время (например, после FloodWait).
+
+        Аргументы:
+            seconds (float): Время блокировки в секундах.
+        """
+        self._refill()
+        self._tokens = min(self._tokens, 0) - seconds * self.rate
+
+
+class OutboundCall:
+    """
+    Исходящий вызов API Telegram в очереди.
+    """
+    __slots__ = ('priority', 'seq', 'chat_id', 'call', 'rate_limited', 'future', 'created_at', 'retries', 'reserved',
+                 'ready_at', 'router', 'handler')
+
+    def __init__(self, priority: Priority, seq: int, chat_id: Hashable, call: Callable[[], Awaitable],
+                 rate_limited: bool, future: asyncio.Future) -> None:
+        self.priority = priority
+        self.seq = seq
+        self.chat_id = chat_id
+        self.call = call
+        self.rate_limited = rate_limited
+        self.future = future
+        self.created_at = time.perf_counter()
+        self.retries = 0
+        self.reserved = False
+        # Время цикла событий, когда становится доступен зарезервированный токен чата
+        self.ready_at = 0.0
+        # Обработчик, поставивший вызов в очередь, для метрики времени вызовов API по обработчикам
+        stats = current_update.get()
+        self.router = stats.router if stats is not None else ''
+        self.handler = stats.handler if stats is not None else ''
+
+    def __lt__(self, other: "OutboundCall") -> bool:
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+OUTBOX_QUEUE_DEPTH = Gauge('outbox_queue_depth', 'Количество исходящих вызовов в очереди',
+                           func=lambda: outbox.pending)
+OUTBOX_SEND_LATENCY = Histogram('outbox_send_latency_seconds',
+                                'Время от постановки исходящего вызова в очередь до его завершения',
+                                labelnames=('priority',))
+OUTBOX_CALL_TIME = Histogram('bot_handler_api_call_seconds', 'Время исходящих вызовов API по обработчикам',
+                             labelnames=('router', 'handler'))
+OUTBOX_FLOOD_WAITS = Counter('outbox_flood_waits_total', 'Количество ответов FloodWait')
+OUTBOX_ERRORS = Counter('outbox_errors_total', 'Количество исходящих вызовов, завершившихся ошибкой')
+
+
+class Outbox:
+    """
+    Очередь исходящих вызовов API Telegram.
+
+    Обработчики ставят вызовы в очередь и не ждут сети. Вызовы одного чата выполняются
+    строго по очереди (внутри чата - по приоритету, затем в порядке постановки), разные чаты
+    обслуживаются параллельно несколькими воркерами. Частота ограничивается общим token bucket
+    и token bucket каждого чата; FloodWait блокирует чат на указанное Telegram время,
+    после чего вызов повторяется.
+
+    Пока вызов ждет токен чата или окончания FloodWait, чат не занят воркером: вызовы без ограничения
+    частоты (ответы на колбэки и inline-запросы) выполняются сразу, не дожидаясь окончания паузы.
+
+    Аргументы:
+        workers (int): Количество воркеров.
+        global_rate (float): Максимальное количество вызовов в секунду для всего бота.
+        chat_rate (float): Максимальное количество сообщений в секунду в один чат.
+        chat_burst (int): Количество сообщений в чат, которое можно отправить без ожидания.
+        max_retries (int): Максимальное количество повторов после FloodWait.
+    """
+
+    def __init__(self, workers: int, global_rate: float, chat_rate: float, chat_burst: int,
+                 max_retries: int) -> None:
+        self.workers = workers
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.max_retries = max_retries
+        self.pending = 0
+        self._global_bucket = TokenBucket(global_rate, global_rate)
+        self._chat_buckets = TTLCache(maxsize=100_000, ttl=max(chat_burst / chat_rate, 60))
+        self._seq = itertools.count()
+        self._lanes: dict[Hashable, list[OutboundCall]] = {}
+        self._owned: set[Hashable] = set()
+        self._timers: dict[Hashable, asyncio.TimerHandle] = {}
+        self._inflight: dict[Hashable, OutboundCall] = {}
+        self._ready = asyncio.PriorityQueue()
+        self._tasks: list[asyncio.Task] = []
+
+    def set_global_rate(self, rate: float) -> None:
+        """
+        Изменяет общий лимит вызовов в секунду, например, чтобы разделить лимит бота между процессами.
+
+        Аргументы:
+            rate (float): Максимальное количество вызовов в секунду.
+        """
+        self._global_bucket = TokenBucket(rate, rate)
+
+    async def start(self) -> None:
+        """
+        Запускает воркеры очереди.
+        """
+        if self._tasks:
+            return
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        """
+        Останавливает воркеры очереди. Неотправленные вызовы отменяются.
+        """
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        for timer in self._timers.values():
+            timer.cancel()
+        self._timers.clear()
+        for lane in self._lanes.values():
+            for item in lane:
+                item.future.cancel()
+        self._lanes.clear()
+        self._owned.clear()
+        self.pending = 0
+
+    def submit(self, chat_id: Hashable, call: Callable[[], Awaitable], priority: Priority = Priority.INTERACTIVE,
+               rate_limited: bool = True) -> asyncio.Future:
+        """
+        Ставит исходящий вызов в очередь. Вызовы выполняются после запуска воркеров методом start.
+
+        Аргументы:
+            chat_id (Hashable): Чат, к которому относится вызов.
+            call (Callable[[], Awaitable]): Функция, выполняющая вызов API.
+            priority (Priority): Приоритет вызова.
+            rate_limited (bool): Учитывать ли вызов в ограничении частоты сообщений чата.
+
+        Возвращает:
+            asyncio.Future: Результат вызова. Ждать его не обязательно.
+        """
+        future = asyncio.get_running_loop().create_future()
+        future.add_done_callback(_consume_exception)
+        item = OutboundCall(priority, next(self._seq), chat_id, call, rate_limited, future)
+        lane = self._lanes.setdefault(chat_id, [])
+        heapq.heappush(lane, item)
+        self.pending += 1
+        if chat_id not in self._owned and lane[0] is item:
+            self._ready.put_nowait((item.priority, item.seq, chat_id))
+        return future
+
+    async def flush(self, chat_id: Hashable) -> None:
+        """
+        Ждет завершения всех вызовов, поставленных в очередь для чата.
+
+        Аргументы:
+            chat_id (Hashable): Чат.
+        """
+        while True:
+            items = list(self._lanes.get(chat_id, ()))
+            if chat_id in self._inflight:
+                items.append(self._inflight[chat_id])
+            if not items:
+                return
+            await asyncio.gather(*(item.future for item in items), return_exceptions=True)
+
+    def _chat_bucket(self, chat_id: Hashable) -> TokenBucket:
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is MISSING:
+            bucket = TokenBucket(self.chat_rate, self.chat_burst)
+            self._chat_buckets.set(chat_id, bucket)
+        return bucket
+
+    def _release(self, chat_id: Hashable) -> None:
+        self._owned.discard(chat_id)
+        lane = self._lanes.get(chat_id)
+        if lane:
+            self._ready.put_nowait((lane[0].priority, lane[0].seq, chat_id))
+        else:
+            self._lanes.pop(chat_id, None)
+
+    def _wake(self, chat_id: Hashable) -> None:
+        self._timers.pop(chat_id, None)
+        lane = self._lanes.get(chat_id)
+        # Занятый чат снова встанет в очередь после завершения текущего вызова
+        if lane and chat_id not in self._owned:
+            self._ready.put_nowait((lane[0].priority, lane[0].seq, chat_id))
+
+    async def _worker(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            _, _, chat_id = await self._ready.get()
+            lane = self._lanes.get(chat_id)
+            if chat_id in self._owned or not lane:
+                continue
+
+            item = lane[0]
+            if item.rate_limited:
+                if not item.reserved:
+                    item.reserved = True
+                    item.ready_at = loop.time() + self._chat_bucket(chat_id).reserve()
+                delay = item.ready_at - loop.time()
+                if delay > 0:
+                    # Чат ждет токен, не занимая воркер: вызов без ограничения частоты, поставленный
+                    # за это время, окажется первым в очереди чата и будет выполнен сразу
+                    if chat_id not in self._timers:
+                        self._timers[chat_id] = loop.call_later(delay, self._wake, chat_id)
+                    continue
+
+            self._owned.add(chat_id)
+            heapq.heappop(lane)
+            self._inflight[chat_id] = item
+            try:
+                await self._send(item)
+            finally:
+                del self._inflight[chat_id]
+                self._release(chat_id)
+
+    async def _send(self, item: OutboundCall) -> None:
+        delay = self._global_bucket.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        start = time.perf_counter()
+        try:
+            result = await item.call()
+        except FloodWait as e:
+            OUTBOX_FLOOD_WAITS.inc()
+            if item.retries < self.max_retries:
+                logger.warning('FloodWait %s с в чате %s, повтор вызова', e.value, item.chat_id)
+                item.retries += 1
+                item.reserved = False
+                bucket = self._chat_bucket(item.chat_id)
+                bucket.block(e.value)
+                self._chat_buckets.set(item.chat_id, bucket, ttl=e.value + self._chat_buckets.ttl)
+                heapq.heappush(self._lanes.setdefault(item.chat_id, []), item)
+                return
+            self._finish(item, error=e)
+        except Exception as e:
+            self._finish(item, error=e)
+        else:
+            self._finish(item, result=result)
+        finally:
+            OUTBOX_CALL_TIME.observe(time.perf_counter() - start, router=item.router, handler=item.handler)
+
+    def _finish(self, item: OutboundCall, result=None, error: Exception | None = None) -> None:
+        self.pending -= 1
+        OUTBOX_SEND_LATENCY.observe(time.perf_counter() - item.created_at, priority=item.priority.name.lower())
+        if item.future.done():
+            return
+        if error is not None:
+            OUTBOX_ERRORS.inc()
+            logger.error('Ошибка исходящего вызова в чате %s: %r', item.chat_id, error)
+            item.future.set_exception(error)
+        else:
+            item.future.set_result(result)
+
+    def send_message(self, client: Client, chat_id: int, text: str,
+                     priority: Priority = Priority.INTERACTIVE, **kwargs) -> asyncio.Future:
+        """
+        Ставит в очередь отправку сообщения (client.send_message).
+        """
+        return self.submit(chat_id, partial(client.send_message, chat_id=chat_id, text=text, **kwargs), priority)
+
+    def reply(self, message: Message, text: str, **kwargs) -> asyncio.Future:
+        """
+        Ставит в очередь ответ на сообщение (message.reply).
+        """
+        return self.submit(message.chat.id, partial(message.reply, text=text, **kwargs))
+
+    def edit_message_text(self, callback: CallbackQuery, text: str, **kwargs) -> asyncio.Future:
+        """
+        Ставит в очередь изменение сообщения колбэка (callback.edit_message_text).
+        """
+        return self.submit(callback.from_user.id, partial(callback.edit_message_text, text=text, **kwargs))
+
+    def answer(self, callback: CallbackQuery, text: str = None, **kwargs) -> asyncio.Future:
+        """
+        Ставит в очередь ответ на колбэк (callback.answer) с наивысшим приоритетом.
+        Ответы на колбэки не расходуют лимит сообщений чата.
+        """
+        return self.submit(callback.from_user.id, partial(callback.answer, text, **kwargs),
+                           Priority.ANSWER, rate_limited=False)
+
+    def answer_inline_query(self, inline_query: InlineQuery, results: list, **kwargs) -> asyncio.Future:
+        """
+        Ставит в очередь ответ на inline-запрос (inline_query.answer) с наивысшим приоритетом.
+        Ответы на inline-запросы не расходуют лимит сообщений чата.
+        """
+        return self.submit(inline_query.from_user.id, partial(inline_query.answer, results, **kwargs),
+                           Priority.ANSWER, rate_limited=False)
+
+
+def _consume_exception(future: asyncio.Future) -> None:
+    # Ошибка уже записана в лог в Outbox._finish; помечаем её полученной,
+    # чтобы asyncio не предупреждал о необработанном исключении для вызовов без ожидания.
+    if not future.cancelled():
+        future.exception()
+
+
+outbox = Outbox(workers=OUTBOX_WORKERS, global_rate=OUTBOX_GLOBAL_RATE, chat_rate=OUTBOX_CHAT_RATE,
+                chat_burst=OUTBOX_CHAT_BURST, max_retries=OUTBOX_MAX_RETRIES)
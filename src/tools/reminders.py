@@ -0,0 +1,164 @@
+import asyncio
+import heapq
+import logging
+from datetime import datetime, timedelta
+from typing import Callable
+
+from pyrogram import Client
+
+from src.config import REMINDER_WINDOW, REMINDER_PREFETCH, REMINDER_BATCH_SIZE
+from src.database.requests import get_upcoming_reminders, claim_reminders
+from src.tools.keyboards import get_reminder_menu
+from src.tools.metrics import Counter
+from src.tools.other import format_due_at
+from src.tools.outbox import outbox, Priority
+
+logger = logging.getLogger(__name__)
+
+# Пауза перед повтором после ошибки обращения к базе данных, в секундах
+RETRY_DELAY = 5
+
+REMINDERS_SENT = Counter('reminders_sent_total', 'Количество отправленных напоминаний о сроках задач')
+
+
+class ReminderScheduler:
+    """
+    Планировщик напоминаний о сроках задач.
+
+    Ближайшие напоминания хранятся в min-heap по сроку. Куча заполняется одним запросом
+    по индексу idx_tasks_due_reminder на окно [сейчас, сейчас + window]; граница загруженного окна
+    хранится в horizon, и следующий запрос выполняется только когда время доходит до неё.
+    Между запросами планировщик спит до ближайшего срока или до вызова schedule.
+
+    Наступившие напоминания отправляются пачками: каждая пачка сначала помечается отправленной
+    запросом claim_reminders, поэтому после перезапуска бота или при нескольких копиях
+    напоминание не отправляется повторно.
+
+    Аргументы:
+        window (timedelta): Окно предзагрузки напоминаний.
+        prefetch (int): Максимальное количество напоминаний, загружаемых одним запросом.
+        batch_size (int): Количество напоминаний в одной пачке отправки.
+        clock (Callable[[], datetime]): Источник текущего времени; в тестах подменяется поддельными часами.
+    """
+
+    def __init__(self, window: timedelta, prefetch: int, batch_size: int,
+                 clock: Callable[[], datetime] = datetime.now) -> None:
+        self.window = window
+        self.prefetch = prefetch
+        self.batch_size = batch_size
+        self._clock = clock
+        self._heap: list[tuple[datetime, int]] = []
+        self._queued: set[int] = set()
+        self._horizon: datetime | None = None
+        self._wake = asyncio.Event()
+        self._client: Client | None = None
+        self._shard: tuple[int, int] | None = None
+        self._task: asyncio.Task | None = None
+
+    def start(self, client: Client, shard: tuple[int, int] | None = None) -> None:
+        """
+        Запускает планировщик в фоновой задаче.
+
+        Аргументы:
+            client (Client): Клиент Pyrogram, от имени которого отправляются напоминания.
+            shard (tuple[int, int] | None): Номер процесса и количество процессов бота; планировщик
+                обрабатывает только задачи пользователей своего процесса. None - задачи всех пользователей.
+        """
+        self._client = client
+        self._shard = shard
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        """
+        Останавливает планировщик.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def schedule(self, task_id: int, due_at: datetime | None) -> None:
+        """
+        Сообщает планировщику о новой задаче со сроком.
+
+        Задачи в пределах загруженного окна сразу добавляются в кучу, остальные
+        будут загружены запросом при сдвиге окна.
+
+        Аргументы:
+            task_id (int): Идентификатор задачи.
+            due_at (datetime | None): Срок задачи.
+        """
+        if due_at is None or self._horizon is None or due_at > self._horizon or task_id in self._queued:
+            return
+        heapq.heappush(self._heap, (due_at, task_id))
+        self._queued.add(task_id)
+        self._wake.set()
+
+    async def run(self) -> None:
+        """
+        Основной цикл планировщика: обрабатывает наступившие напоминания и спит до следующего.
+        """
+        while True:
+            self._wake.clear()
+            try:
+                wake_at = await self.tick()
+                timeout = max((wake_at - self._clock()).total_seconds(), 0)
+            except Exception:
+                logger.exception('Ошибка планировщика напоминаний')
+                timeout = RETRY_DELAY
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def tick(self) -> datetime:
+        """
+        Отправляет все напоминания, срок которых наступил к текущему времени.
+
+        Возвращает:
+            datetime: Время, к которому нужно снова вызвать tick.
+        """
+        now = self._clock()
+        if self._horizon is None or now >= self._horizon:
+            await self._refill(now)
+
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            _, task_id = heapq.heappop(self._heap)
+            self._queued.discard(task_id)
+            due.append(task_id)
+        for start in range(0, len(due), self.batch_size):
+            await self._fire(due[start:start + self.batch_size], now)
+
+        if self._heap:
+            return min(self._heap[0][0], self._horizon)
+        return self._horizon
+
+    async def _refill(self, now: datetime) -> None:
+        until = now + self.window
+        rows = await get_upcoming_reminders(until, self.prefetch, self._shard)
+        for row in rows:
+            if row.id not in self._queued:
+                heapq.heappush(self._heap, (row.due_at, row.id))
+                self._queued.add(row.id)
+        # Если загружены не все задачи окна, окно заканчивается перед последним загруженным сроком
+        if len(rows) >= self.prefetch:
+            self._horizon = rows[-1].due_at - timedelta(microseconds=1)
+        else:
+            self._horizon = until
+
+    async def _fire(self, task_ids: list[int], now: datetime) -> None:
+        for task in await claim_reminders(task_ids, now):
+            outbox.send_message(
+                self._client,
+                task.tg_id,
+                f'⏰ Напоминание о задаче **{task.name}**\nСрок: {await format_due_at(task.due_at)}',
+                priority=Priority.BULK,
+                reply_markup=await get_reminder_menu(task.id)
+            )
+            REMINDERS_SENT.inc()
+
+
+reminder_scheduler = ReminderScheduler(window=timedelta(seconds=REMINDER_WINDOW), prefetch=REMINDER_PREFETCH,
+                                       batch_size=REMINDER_BATCH_SIZE)
@@ -0,0 +1,154 @@
+import asyncio
+import logging
+import struct
+from io import BytesIO
+
+from pyrogram import Client
+from pyrogram.raw.core import TLObject, Vector, Int
+
+from src.config import SHARD_IPC_BUFFER
+from src.tools.metrics import Counter
+from src.tools.update_queue import update_sender_id
+
+logger = logging.getLogger(__name__)
+
+# Заголовок кадра канала: длина тела в байтах
+_FRAME_HEADER = struct.Struct('!I')
+
+SHARD_UPDATES_FORWARDED = Counter('shard_updates_forwarded_total', 'Количество обновлений, переданных процессам',
+                                  ('shard',))
+SHARD_UPDATES_DROPPED = Counter('shard_updates_dropped_total',
+                                'Количество обновлений, отброшенных из-за переполнения канала процесса', ('shard',))
+
+
+def shard_for(tg_id: int | None, shards: int) -> int:
+    """
+    Определяет процесс, обрабатывающий обновления пользователя.
+
+    То же правило (tg_id % shards) используется в SQL-запросах, выбирающих данные пользователей процесса.
+
+    Аргументы:
+        tg_id (int | None): Telegram-идентификатор пользователя; обновления без пользователя обрабатывает процесс 0.
+        shards (int): Количество процессов.
+
+    Возвращает:
+        int: Номер процесса.
+    """
+    return tg_id % shards if tg_id is not None else 0
+
+
+def encode_packet(packet: tuple) -> bytes:
+    """
+    Сериализует обновление вместе с пользователями и чатами в формате TL.
+
+    Аргументы:
+        packet (tuple): Обновление, словари пользователей и чатов (как в dispatcher.updates_queue).
+
+    Возвращает:
+        bytes: Тело кадра.
+    """
+    update, users, chats = packet
+    return update.write() + Vector(list(users.values())) + Vector(list(chats.values()))
+
+
+def decode_packet(data: bytes) -> tuple:
+    """
+    Восстанавливает обновление, сериализованное encode_packet.
+
+    Аргументы:
+        data (bytes): Тело кадра.
+
+    Возвращает:
+        tuple: Обновление, словари пользователей и чатов.
+    """
+    stream = BytesIO(data)
+    update = TLObject.read(stream)
+    Int.read(stream)
+    users = Vector.read(stream, TLObject)
+    Int.read(stream)
+    chats = Vector.read(stream, TLObject)
+    return update, {user.id: user for user in users}, {chat.id: chat for chat in chats}
+
+
+class UpdateForwarder:
+    """
+    Очередь обновлений процесса, принимающего обновления: вместо обработки передает каждое обновление
+    процессу, которому принадлежит пользователь, по локальному каналу (Unix socket).
+
+    Если процесс не успевает читать и буфер его канала превышает max_buffer байт, обновления отбрасываются.
+
+    Аргументы:
+        writers (list[asyncio.StreamWriter]): Каналы процессов-обработчиков в порядке номеров.
+        max_buffer (int): Максимальный размер буфера канала в байтах.
+    """
+
+    def __init__(self, writers: list[asyncio.StreamWriter], max_buffer: int = SHARD_IPC_BUFFER) -> None:
+        self.writers = writers
+        self.max_buffer = max_buffer
+        self._stop = asyncio.Queue()
+
+    def install(self, client: Client) -> None:
+        """
+        Подключает очередь к диспетчеру клиента вместо стандартной.
+
+        Аргументы:
+            client (Client): Клиент Pyrogram, принимающий обновления.
+        """
+        client.dispatcher.updates_queue = self
+
+    def put_nowait(self, packet) -> None:
+        if packet is None:
+            self._stop.put_nowait(None)
+            return
+        shard = shard_for(update_sender_id(packet[0]), len(self.writers))
+        writer = self.writers[shard]
+        if writer.is_closing() or writer.transport.get_write_buffer_size() > self.max_buffer:
+            SHARD_UPDATES_DROPPED.inc(shard=shard)
+            logger.warning('Канал процесса %s переполнен, обновление %s отброшено', shard, type(packet[0]).__name__)
+            return
+        body = encode_packet(packet)
+        writer.write(_FRAME_HEADER.pack(len(body)) + body)
+        SHARD_UPDATES_FORWARDED.inc(shard=shard)
+
+    async def get(self):
+        # Воркеры диспетчера принимающего процесса не обрабатывают обновления и только ждут остановки
+        return await self._stop.get()
+
+
+async def receive_updates(client: Client, reader: asyncio.StreamReader) -> None:
+    """
+    Читает обновления из канала и ставит их в очередь диспетчера клиента процесса-обработчика.
+
+    Пользователи и чаты обновления сохраняются в хранилище клиента, как это делает Client.handle_updates,
+    чтобы обработчики могли отправлять сообщения по идентификаторам. Возвращается, когда канал закрыт.
+
+    Аргументы:
+        client (Client): Клиент Pyrogram процесса-обработчика.
+        reader (asyncio.StreamReader): Канал от принимающего процесса.
+    """
+    while True:
+        try:
+            header = await reader.readexactly(_FRAME_HEADER.size)
+            body = await reader.readexactly(_FRAME_HEADER.unpack(header)[0])
+        except asyncio.IncompleteReadError:
+            return
+        packet = decode_packet(body)
+        await client.fetch_peers([*packet[1].values(), *packet[2].values()])
+        client.dispatcher.updates_queue.put_nowait(packet)
+
+
+def start_handler_workers(client: Client) -> None:
+    """
+    Запускает воркеры диспетчера клиента, созданного с no_updates=True.
+
+    Такой клиент не получает обновлений от Telegram (процесс-обработчик получает их по каналу),
+    и Pyrogram не запускает для него воркеры обработчиков.
+
+    Аргументы:
+        client (Client): Клиент Pyrogram.
+    """
+    dispatcher = client.dispatcher
+    for _ in range(client.workers):
+        lock = asyncio.Lock()
+        dispatcher.locks_list.append(lock)
+        dispatcher.handler_worker_tasks.append(asyncio.create_task(dispatcher.handler_worker(lock)))
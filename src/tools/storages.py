@@ -0,0 +1,80 @@
+import json
+
+from pyrogram_patch.fsm import State
+from pyrogram_patch.fsm.base_storage import BaseStorage
+from redis.asyncio import Redis
+
+
+class RedisStorage(BaseStorage):
+    """
+    Хранилище состояний FSM в Redis.
+
+    Состояние пользователя хранится в строковом ключе, данные - в хэше, где каждое
+    поле сериализовано в JSON. Благодаря этому set_data дополняет данные одной
+    командой HSET без предварительного чтения, а все операции над ключом выполняются
+    одним конвейером (pipeline). Оба ключа получают общий срок жизни, поэтому
+    брошенные на середине сценарии регистрации и создания задач удаляются сами.
+
+    Аргументы:
+        redis (Redis): Асинхронный клиент Redis.
+        ttl (int): Срок жизни состояния в секундах; 0 отключает истечение.
+        prefix (str): Префикс ключей в Redis.
+    """
+
+    def __init__(self, redis: Redis, ttl: int = 0, prefix: str = 'fsm') -> None:
+        self.redis = redis
+        self.ttl = ttl
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url: str, ttl: int = 0, prefix: str = 'fsm') -> "RedisStorage":
+        """
+        Создает хранилище по URL подключения к Redis.
+
+        Аргументы:
+            url (str): URL вида redis://host:port/db.
+            ttl (int): Срок жизни состояния в секундах.
+            prefix (str): Префикс ключей в Redis.
+
+        Возвращает:
+            RedisStorage: Хранилище состояний.
+        """
+        return cls(Redis.from_url(url), ttl=ttl, prefix=prefix)
+
+    def _state_key(self, key: str) -> str:
+        return f'{self.prefix}:{key}:state'
+
+    def _data_key(self, key: str) -> str:
+        return f'{self.prefix}:{key}:data'
+
+    def _expire(self, pipe, key: str) -> None:
+        if self.ttl:
+            pipe.expire(self._state_key(key), self.ttl)
+            pipe.expire(self._data_key(key), self.ttl)
+
+    async def checkup(self, key: str) -> State:
+        state = await self.redis.get(self._state_key(key))
+        if state is None:
+            return State('*', self, key)
+        return State(state.decode(), self, key)
+
+    async def set_state(self, state: str, key: str) -> None:
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.set(self._state_key(key), state)
+            self._expire(pipe, key)
+            await pipe.execute()
+
+    async def set_data(self, data: dict, key: str) -> None:
+        if not data:
+            return
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.hset(self._data_key(key), mapping={field: json.dumps(value) for field, value in data.items()})
+            self._expire(pipe, key)
+            await pipe.execute()
+
+    async def get_data(self, key: str) -> dict:
+        data = await self.redis.hgetall(self._data_key(key))
+        return {field.decode(): json.loads(value) for field, value in data.items()}
+
+    async def finish_state(self, key: str) -> None:
+        await self.redis.delete(self._state_key(key), self._data_key(key))
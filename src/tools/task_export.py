@@ -0,0 +1,105 @@
+import csv
+import io
+import json
+import tempfile
+from contextlib import aclosing
+from datetime import datetime
+from typing import AsyncIterator
+
+from src.config import EXPORT_SPOOL_SIZE
+
+# Формат -> расширение файла
+EXPORT_FORMATS = {
+    'csv': 'csv',
+    'json': 'ndjson',
+}
+
+
+def _export_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat(sep=' ', timespec='seconds')
+    return value
+
+
+def _encode_csv(batch: list, header: bool) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(batch[0]._fields)
+    writer.writerows([_export_value(value) for value in row] for row in batch)
+    return buffer.getvalue().encode('utf-8')
+
+
+def _encode_ndjson(batch: list, header: bool) -> bytes:
+    return ''.join(
+        json.dumps({key: _export_value(value) for key, value in row._asdict().items()}, ensure_ascii=False) + '\n'
+        for row in batch
+    ).encode('utf-8')
+
+
+_ENCODERS = {
+    'csv': _encode_csv,
+    'json': _encode_ndjson,
+}
+
+
+class ExportFile(tempfile.SpooledTemporaryFile):
+    """
+    Временный файл экспорта с именем для загрузки в Telegram.
+
+    Pyrogram передает fp.name загружаемого файла в InputFile, а у SpooledTemporaryFile имя равно None,
+    пока файл в памяти, и номеру дескриптора после переноса на диск.
+
+    Аргументы:
+        name (str): Имя файла с расширением.
+        max_size (int): Размер файла в байтах, после которого он переносится на диск.
+    """
+
+    def __init__(self, name: str, max_size: int) -> None:
+        super().__init__(max_size=max_size, mode='w+b')
+        self._export_name = name
+
+    @property
+    def name(self) -> str:
+        return self._export_name
+
+
+async def write_tasks_export(batches: AsyncIterator[list], export_format: str, file_name: str = 'tasks',
+                             spool_size: int = EXPORT_SPOOL_SIZE) -> tuple[ExportFile, int]:
+    """
+    Записывает задачи во временный файл по мере чтения пачек.
+
+    Каждая пачка кодируется и записывается отдельно, поэтому в памяти одновременно находится
+    не больше одной пачки; файл хранится в памяти, пока не превысит spool_size байт, а затем переносится на диск.
+    CSV начинается с BOM и строки заголовка, NDJSON содержит по одному JSON-объекту в строке.
+
+    Аргументы:
+        batches (AsyncIterator[list[Row]]): Пачки задач (например, stream_tasks).
+        export_format (str): Формат файла: 'csv' или 'json'.
+        file_name (str): Имя файла без расширения.
+        spool_size (int): Размер файла в байтах, после которого он переносится на диск.
+
+    Возвращает:
+        tuple[ExportFile, int]: Файл с именем file_name.<расширение>, установленный на начало,
+        и количество задач.
+        Закрыть файл должен вызывающий код.
+
+    Исключения:
+        KeyError: Если формат не поддерживается.
+    """
+    encode = _ENCODERS[export_format]
+    file = ExportFile(f'{file_name}.{EXPORT_FORMATS[export_format]}', spool_size)
+    count = 0
+    try:
+        if export_format == 'csv':
+            file.write(b'\xef\xbb\xbf')
+        async with aclosing(batches):
+            async for batch in batches:
+                if batch:
+                    file.write(encode(batch, header=count == 0))
+                    count += len(batch)
+    except BaseException:
+        file.close()
+        raise
+    file.seek(0)
+    return file, count
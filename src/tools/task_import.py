@@ -0,0 +1,68 @@
+import codecs
+import csv
+from typing import AsyncIterable, AsyncIterator
+
+# Разделитель названия и описания задачи в текстовом формате
+TEXT_SEPARATOR = '|'
+
+
+async def iter_text_lines(text: str) -> AsyncIterator[str]:
+    """
+    Возвращает строки текста сообщения.
+
+    Аргументы:
+        text (str): Текст.
+
+    Возвращает:
+        AsyncIterator[str]: Строки текста.
+    """
+    for line in text.splitlines():
+        yield line
+
+
+async def iter_document_lines(chunks: AsyncIterable[bytes], encoding: str = 'utf-8') -> AsyncIterator[str]:
+    """
+    Декодирует поток байтов файла в строки по мере получения частей файла, не загружая файл целиком.
+
+    Аргументы:
+        chunks (AsyncIterable[bytes]): Части файла (например, client.stream_media).
+        encoding (str): Кодировка файла; BOM в начале файла пропускается.
+
+    Возвращает:
+        AsyncIterator[str]: Строки файла.
+    """
+    decoder = codecs.getincrementaldecoder('utf-8-sig' if encoding == 'utf-8' else encoding)(errors='replace')
+    tail = ''
+    async for chunk in chunks:
+        lines = (tail + decoder.decode(chunk)).split('\n')
+        tail = lines.pop()
+        for line in lines:
+            yield line.rstrip('\r')
+    tail += decoder.decode(b'', final=True)
+    if tail:
+        yield tail.rstrip('\r')
+
+
+def parse_task_line(line: str, csv_format: bool = False) -> tuple[str, str] | None:
+    """
+    Разбирает строку импорта задач.
+
+    В текстовом формате строка имеет вид "название | описание", в формате CSV - "название,описание".
+    Описание необязательно.
+
+    Аргументы:
+        line (str): Строка.
+        csv_format (bool): Разбирать ли строку как CSV.
+
+    Возвращает:
+        tuple[str, str] | None: Название и описание задачи или None для пустой строки.
+    """
+    if not line.strip():
+        return None
+    if csv_format:
+        fields = next(csv.reader([line]), [])
+    else:
+        fields = line.split(TEXT_SEPARATOR, 1)
+    name = fields[0].strip() if fields else ''
+    description = fields[1].strip() if len(fields) > 1 else ''
+    return name, description
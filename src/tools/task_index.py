@@ -0,0 +1,164 @@
+import bisect
+import re
+from typing import NamedTuple
+
+from src.tools.cache import TTLCache, MISSING
+
+_TOKEN = re.compile(r'\w+')
+
+
+class IndexedTask(NamedTuple):
+    """
+    Задача в префиксном индексе.
+
+    Атрибуты:
+        id (int): Идентификатор задачи.
+        name (str): Название задачи.
+        description (str): Описание задачи.
+        is_done (bool): Статус выполнения задачи.
+    """
+    id: int
+    name: str
+    description: str
+    is_done: bool
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    Разбивает текст на слова в нижнем регистре.
+
+    Аргументы:
+        text (str): Текст.
+
+    Возвращает:
+        list[str]: Слова текста.
+    """
+    return _TOKEN.findall(text.lower())
+
+
+class UserTaskIndex:
+    """
+    Префиксный индекс названий задач одного пользователя: отсортированный список пар (слово, id задачи).
+
+    Упорядоченный список всех задач (ответ на пустой запрос) кэшируется до следующего изменения индекса.
+    """
+    __slots__ = ('tasks', 'tokens', '_ordered')
+
+    def __init__(self, tasks: list[IndexedTask]) -> None:
+        self.tasks = {task.id: task for task in tasks}
+        self.tokens = sorted((token, task.id) for task in tasks for token in set(tokenize(task.name)))
+        self._ordered: list[IndexedTask] | None = None
+
+    def add(self, task: IndexedTask) -> None:
+        self.remove(task.id)
+        self.tasks[task.id] = task
+        self._ordered = None
+        for token in set(tokenize(task.name)):
+            bisect.insort(self.tokens, (token, task.id))
+
+    def set_done(self, task_id: int) -> None:
+        task = self.tasks.get(task_id)
+        if task is not None:
+            self.tasks[task_id] = task._replace(is_done=True)
+            self._ordered = None
+
+    def remove(self, task_id: int) -> None:
+        task = self.tasks.pop(task_id, None)
+        if task is None:
+            return
+        self._ordered = None
+        for token in set(tokenize(task.name)):
+            position = bisect.bisect_left(self.tokens, (token, task_id))
+            if position < len(self.tokens) and self.tokens[position] == (token, task_id):
+                del self.tokens[position]
+
+    def _prefix_ids(self, prefix: str) -> set[int]:
+        # Перебор по позиции без копирования хвоста списка: просматриваются только слова с префиксом
+        tokens = self.tokens
+        position = bisect.bisect_left(tokens, (prefix,))
+        ids = set()
+        while position < len(tokens) and tokens[position][0].startswith(prefix):
+            ids.add(tokens[position][1])
+            position += 1
+        return ids
+
+    @staticmethod
+    def _order(tasks) -> list[IndexedTask]:
+        return sorted(tasks, key=lambda task: (task.is_done, -task.id))
+
+    def search(self, query: str, limit: int) -> list[IndexedTask]:
+        """
+        Ищет задачи, в названии которых для каждого слова запроса есть слово, начинающееся с него.
+
+        Аргументы:
+            query (str): Запрос; пустой запрос возвращает все задачи.
+            limit (int): Максимальное количество задач.
+
+        Возвращает:
+            list[IndexedTask]: Задачи: сначала невыполненные, внутри - от новых к старым.
+        """
+        prefixes = set(tokenize(query))
+        if not prefixes:
+            if self._ordered is None:
+                self._ordered = self._order(self.tasks.values())
+            return self._ordered[:limit]
+
+        ids = None
+        for prefix in sorted(prefixes, key=len, reverse=True):
+            matched = self._prefix_ids(prefix)
+            ids = matched if ids is None else ids & matched
+            if not ids:
+                return []
+        return self._order(self.tasks[task_id] for task_id in ids)[:limit]
+
+
+class TaskPrefixIndex:
+    """
+    Префиксные индексы названий задач, загруженные для активных пользователей.
+
+    Индекс пользователя загружается из базы данных один раз и затем обновляется теми же функциями
+    requests.py, которые изменяют задачи; если индекс пользователя не загружен, изменения пропускаются.
+
+    Аргументы:
+        maxsize (int): Максимальное количество пользователей в кэше.
+        ttl (float): Время жизни индекса пользователя в секундах.
+    """
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self._indexes = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def get(self, user_id: int) -> UserTaskIndex | None:
+        index = self._indexes.get(user_id)
+        return None if index is MISSING else index
+
+    def load(self, user_id: int, tasks: list[IndexedTask]) -> UserTaskIndex:
+        index = UserTaskIndex(tasks)
+        self._indexes.set(user_id, index)
+        return index
+
+    def add(self, user_id: int, task: IndexedTask) -> None:
+        index = self.get(user_id)
+        if index is not None:
+            index.add(task)
+
+    def set_done(self, user_id: int, task_id: int) -> None:
+        index = self.get(user_id)
+        if index is not None:
+            index.set_done(task_id)
+
+    def remove(self, user_id: int, task_id: int) -> None:
+        index = self.get(user_id)
+        if index is not None:
+            index.remove(task_id)
+
+    def remove_completed(self, user_id: int) -> None:
+        index = self.get(user_id)
+        if index is not None:
+            for task_id in [task.id for task in index.tasks.values() if task.is_done]:
+                index.remove(task_id)
+
+    def discard(self, user_id: int) -> None:
+        self._indexes.pop(user_id)
+
+    def clear(self) -> None:
+        self._indexes.clear()
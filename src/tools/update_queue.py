@@ -0,0 +1,193 @@
+import asyncio
+import logging
+from collections import deque
+from functools import partial
+from typing import Hashable
+
+from pyrogram import Client, raw
+
+from src.config import UPDATE_QUEUE_SIZE
+from src.tools.metrics import Counter, Gauge
+from src.tools.outbox import outbox, Priority
+
+logger = logging.getLogger(__name__)
+
+# Ответ на колбэк, отброшенный из-за переполнения очереди пользователя
+SHED_CALLBACK_TEXT = 'Слишком много запросов, подождите немного'
+
+
+def update_sender_id(update) -> int | None:
+    """
+    Определяет Telegram-идентификатор пользователя, от которого пришло обновление.
+
+    Аргументы:
+        update (TLObject): Обновление MTProto.
+
+    Возвращает:
+        int | None: Идентификатор пользователя или None для обновлений без пользователя.
+    """
+    user_id = getattr(update, 'user_id', None)
+    if user_id is not None:
+        return user_id
+    message = getattr(update, 'message', None)
+    peer = getattr(message, 'from_id', None) or getattr(message, 'peer_id', None)
+    return getattr(peer, 'user_id', None)
+
+
+def update_user_id(update) -> int | None:
+    """
+    Определяет пользователя, обновления которого обрабатываются по порядку.
+
+    Аргументы:
+        update (TLObject): Обновление MTProto.
+
+    Возвращает:
+        int | None: Идентификатор пользователя; None для inline-запросов и обновлений без пользователя,
+        которые обрабатываются без упорядочивания.
+    """
+    if isinstance(update, (raw.types.UpdateBotInlineQuery, raw.types.UpdateBotInlineSend)):
+        return None
+    return update_sender_id(update)
+
+
+def _callback_key(update) -> tuple | None:
+    if isinstance(update, raw.types.UpdateBotCallbackQuery):
+        return update.msg_id, update.data
+    return None
+
+
+class UserLane:
+    """
+    Обновления одного пользователя: обрабатываемое сейчас и ожидающие в порядке поступления.
+    """
+    __slots__ = ('active', 'pending')
+
+    def __init__(self, active) -> None:
+        self.active = active
+        self.pending = deque()
+
+    def has_callback(self, key: tuple) -> bool:
+        return any(_callback_key(packet[0]) == key for packet in (self.active, *self.pending))
+
+
+class UserUpdateQueue:
+    """
+    Очередь входящих обновлений, обрабатывающая обновления одного пользователя по одному
+    в порядке поступления, а обновления разных пользователей - параллельно.
+
+    Заменяет dispatcher.updates_queue клиента. Воркеры диспетчера (Client(workers=...)) берут обновления
+    методом get; следующее обновление пользователя становится доступным только после того, как воркер,
+    обрабатывавший предыдущее, запросит новое, то есть завершит обработку. Поэтому двойное нажатие кнопки
+    или быстрое второе сообщение не обрабатываются одновременно с первым и не гонятся за состоянием FSM
+    и строками базы данных.
+
+    Если у пользователя уже max_pending ожидающих обновлений, новые отбрасываются. Повторное нажатие
+    той же кнопки того же сообщения, пока предыдущее нажатие ждет или обрабатывается, схлопывается.
+    На отброшенные колбэки бот сразу отвечает, чтобы у пользователя не висел индикатор загрузки.
+
+    Аргументы:
+        max_pending (int): Максимальное количество ожидающих обновлений одного пользователя.
+    """
+
+    def __init__(self, max_pending: int = UPDATE_QUEUE_SIZE) -> None:
+        self.max_pending = max_pending
+        self.client: Client | None = None
+        self.pending = 0
+        self._lanes: dict[Hashable, UserLane] = {}
+        self._ready = asyncio.Queue()
+        self._workers: dict[asyncio.Task, Hashable] = {}
+
+    def install(self, client: Client) -> None:
+        """
+        Подключает очередь к диспетчеру клиента. Вызывается после patch(client) и до client.start().
+
+        Аргументы:
+            client (Client): Клиент Pyrogram.
+        """
+        self.client = client
+        client.dispatcher.updates_queue = self
+
+    @property
+    def users(self) -> int:
+        return len(self._lanes)
+
+    def qsize(self) -> int:
+        return self._ready.qsize() + self.pending
+
+    def put_nowait(self, packet) -> None:
+        """
+        Принимает обновление от клиента.
+
+        Аргументы:
+            packet (tuple | None): Обновление, пользователи и чаты; None останавливает один воркер.
+        """
+        user_id = update_user_id(packet[0]) if packet is not None else None
+        if user_id is None:
+            self._ready.put_nowait((None, packet))
+            return
+
+        lane = self._lanes.get(user_id)
+        if lane is None:
+            self._lanes[user_id] = UserLane(packet)
+            self._ready.put_nowait((user_id, packet))
+            return
+
+        update = packet[0]
+        key = _callback_key(update)
+        if key is not None and lane.has_callback(key):
+            UPDATES_COLLAPSED.inc()
+            self._answer_callback(update)
+            return
+        if len(lane.pending) >= self.max_pending:
+            UPDATES_SHED.inc(type=type(update).__name__)
+            logger.warning('Очередь обновлений пользователя %s переполнена, обновление %s отброшено',
+                           user_id, type(update).__name__)
+            self._answer_callback(update, SHED_CALLBACK_TEXT)
+            return
+        lane.pending.append(packet)
+        self.pending += 1
+
+    async def get(self):
+        """
+        Возвращает следующее обновление воркеру диспетчера.
+
+        Вызов означает, что воркер завершил обработку предыдущего обновления, поэтому сначала
+        становится доступным следующее обновление того же пользователя.
+        """
+        task = asyncio.current_task()
+        self._release(task)
+        user_id, packet = await self._ready.get()
+        if user_id is not None:
+            self._workers[task] = user_id
+        return packet
+
+    def _release(self, task: asyncio.Task) -> None:
+        user_id = self._workers.pop(task, None)
+        if user_id is None:
+            return
+        lane = self._lanes[user_id]
+        if not lane.pending:
+            del self._lanes[user_id]
+            return
+        lane.active = lane.pending.popleft()
+        self.pending -= 1
+        self._ready.put_nowait((user_id, lane.active))
+
+    def _answer_callback(self, update, text: str | None = None) -> None:
+        if self.client is None or not isinstance(update, raw.types.UpdateBotCallbackQuery):
+            return
+        outbox.submit(update.user_id, partial(
+            self.client.invoke,
+            raw.functions.messages.SetBotCallbackAnswer(query_id=update.query_id, cache_time=0, message=text)
+        ), Priority.ANSWER, rate_limited=False)
+
+
+update_queue = UserUpdateQueue()
+
+UPDATE_QUEUE_USERS = Gauge('bot_update_queue_users', 'Количество пользователей с обновлениями в обработке',
+                           func=lambda: update_queue.users)
+UPDATE_QUEUE_DEPTH = Gauge('bot_update_queue_depth', 'Количество обновлений, ожидающих в очередях пользователей',
+                           func=lambda: update_queue.pending)
+UPDATES_SHED = Counter('bot_updates_shed_total', 'Количество обновлений, отброшенных из-за переполнения очереди',
+                       ('type',))
+UPDATES_COLLAPSED = Counter('bot_updates_collapsed_total', 'Количество схлопнутых повторных нажатий кнопок')
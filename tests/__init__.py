@@ -0,0 +1,16 @@
+"""
+Тесты бота. Используется временная база SQLite (нужен пакет aiosqlite), другую базу можно указать
+через переменную DB_URL.
+
+Запуск:
+    python -m unittest discover tests
+"""
+import os
+import tempfile
+
+os.environ.setdefault('API_ID', '0')
+os.environ.setdefault('API_HASH', 'test')
+os.environ.setdefault('TG_TOKEN', '0:test')
+for _name in ('POSTGRES_USER', 'POSTGRES_PASSWORD', 'POSTGRES_DATABASE', 'POSTGRES_HOST', 'POSTGRES_PORT'):
+    os.environ.setdefault(_name, '')
+os.environ.setdefault('DB_URL', f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(), 'test.db')}")
@@ -0,0 +1,30 @@
+import unittest
+
+from src.database.conn import engine, read_engine
+from src.database.models import create_bd_tables
+from src.database.requests import add_user, get_user_id_by_tg_id
+
+
+class DatabaseTestCase(unittest.IsolatedAsyncioTestCase):
+    """
+    Базовый класс тестов с базой данных: создает таблицы перед каждым тестом и закрывает соединения после него,
+    потому что каждый тест выполняется в своем цикле событий.
+    """
+
+    async def asyncSetUp(self) -> None:
+        await create_bd_tables()
+
+    async def asyncTearDown(self) -> None:
+        await engine.dispose()
+        if read_engine is not engine:
+            await read_engine.dispose()
+
+    async def create_user(self, tg_id: int) -> int:
+        """
+        Возвращает идентификатор пользователя с tg_id, при необходимости создавая его.
+        """
+        user_id = await get_user_id_by_tg_id(tg_id)
+        if user_id is None:
+            await add_user({'tg_id': tg_id, 'name': 'test', 'login': f'test{tg_id}'})
+            user_id = await get_user_id_by_tg_id(tg_id)
+        return user_id
@@ -0,0 +1,31 @@
+"""
+Проверка кэша списков задач: значение, прочитанное до инвалидации, не сохраняется после неё.
+"""
+import unittest
+
+from src.tools.cache import GroupedTTLCache, MISSING
+
+
+class GroupedTTLCacheGenerationTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.now = 0.0
+        self.cache = GroupedTTLCache(maxsize=10, ttl=60, group_size=4, clock=lambda: self.now)
+
+    def test_set_skipped_after_concurrent_invalidate(self) -> None:
+        generation = self.cache.generation(1)
+        # Изменение задач пользователя завершилось, пока страница читалась
+        self.cache.invalidate(1)
+        self.cache.set(1, 'page', 'stale', generation)
+        self.assertIs(self.cache.get(1, 'page'), MISSING)
+
+    def test_set_kept_without_invalidate(self) -> None:
+        generation = self.cache.generation(1)
+        self.cache.invalidate(2)
+        self.cache.set(1, 'page', 'fresh', generation)
+        self.assertEqual(self.cache.get(1, 'page'), 'fresh')
+
+    def test_read_after_invalidate_is_cached(self) -> None:
+        self.cache.invalidate(1)
+        generation = self.cache.generation(1)
+        self.cache.set(1, 'page', 'fresh', generation)
+        self.assertEqual(self.cache.get(1, 'page'), 'fresh')
@@ -0,0 +1,62 @@
+"""
+Проверка очереди исходящих вызовов: ответ на колбэк не ждет паузы чата по лимиту частоты или FloodWait.
+"""
+import asyncio
+import time
+import unittest
+
+from pyrogram.errors import FloodWait
+
+from src.tools.outbox import Outbox, Priority
+
+CHAT_ID = 30_000_501
+
+
+class OutboxAnswerLaneTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.outbox = Outbox(workers=4, global_rate=1000, chat_rate=1, chat_burst=1, max_retries=3)
+        await self.outbox.start()
+        self.sent = []
+
+    async def asyncTearDown(self) -> None:
+        await self.outbox.stop()
+
+    def call(self, name: str):
+        async def send():
+            self.sent.append(name)
+            return name
+        return send
+
+    async def answer_delay(self) -> float:
+        start = time.perf_counter()
+        await asyncio.wait_for(self.outbox.submit(CHAT_ID, self.call('answer'), Priority.ANSWER,
+                                                  rate_limited=False), 0.5)
+        return time.perf_counter() - start
+
+    async def test_answer_not_blocked_by_chat_rate(self) -> None:
+        await self.outbox.submit(CHAT_ID, self.call('first'))
+        # Второе сообщение ждет токен чата около секунды
+        second = self.outbox.submit(CHAT_ID, self.call('second'))
+        await asyncio.sleep(0.05)
+
+        self.assertLess(await self.answer_delay(), 0.2)
+        self.assertFalse(second.done())
+        self.assertEqual(await second, 'second')
+        self.assertEqual(self.sent, ['first', 'answer', 'second'])
+
+    async def test_answer_not_blocked_by_flood_wait(self) -> None:
+        attempts = []
+
+        async def flooded():
+            attempts.append(time.perf_counter())
+            if len(attempts) == 1:
+                raise FloodWait(value=1)
+            return 'retried'
+
+        message = self.outbox.submit(CHAT_ID, flooded)
+        await asyncio.sleep(0.05)
+
+        self.assertLess(await self.answer_delay(), 0.2)
+        self.assertFalse(message.done())
+        self.assertEqual(await message, 'retried')
+        self.assertGreaterEqual(attempts[1] - attempts[0], 0.9)
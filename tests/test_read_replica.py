@@ -0,0 +1,66 @@
+"""
+Проверка разделения чтения и записи на двух файлах SQLite: основная база и реплика.
+
+Реплика не получает изменений основной базы, поэтому по содержимому ответа видно, из какой базы он прочитан.
+"""
+import os
+import tempfile
+from unittest import mock
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from src.config import DB_READ_AFTER_WRITE
+from src.database import requests
+from src.database.conn import create_engine
+from src.database.models import Base, User, Task
+from src.tools.cache import TTLCache
+from tests.base import DatabaseTestCase
+
+
+class ReadReplicaRoutingTest(DatabaseTestCase):
+    async def asyncSetUp(self) -> None:
+        await super().asyncSetUp()
+        self.user_id = await self.create_user(30_000_301)
+        self.other_id = await self.create_user(30_000_302)
+        self.task_id = await requests.add_task({'name': 'primary', 'description': '', 'owner_id': self.user_id})
+
+        self.replica = create_engine(f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(), 'replica.db')}")
+        async with self.replica.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with async_sessionmaker(self.replica)() as session:
+            session.add(User(id=self.user_id, tg_id=30_000_301, name='test', login='replica'))
+            session.add(Task(id=self.task_id, name='replica', description='', owner_id=self.user_id))
+            await session.commit()
+
+        self.now = 0.0
+        patches = [
+            mock.patch.object(requests, 'read_session', async_sessionmaker(self.replica)),
+            mock.patch.object(requests, 'recent_writers',
+                              TTLCache(maxsize=100, ttl=DB_READ_AFTER_WRITE, clock=lambda: self.now)),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    async def asyncTearDown(self) -> None:
+        await self.replica.dispose()
+        await super().asyncTearDown()
+
+    async def read_name(self) -> str:
+        return (await requests.get_task_by_id(self.task_id, self.user_id)).name
+
+    async def test_reads_go_to_replica(self) -> None:
+        self.assertEqual(await self.read_name(), 'replica')
+
+    async def test_writer_reads_primary_inside_window(self) -> None:
+        await requests.add_task({'name': 'new', 'description': '', 'owner_id': self.user_id})
+        self.assertEqual(await self.read_name(), 'primary')
+        # Окно действует только для пользователя, изменившего свои задачи
+        await requests.add_task({'name': 'other', 'description': '', 'owner_id': self.other_id})
+        self.now += DB_READ_AFTER_WRITE / 2
+        self.assertEqual(await self.read_name(), 'primary')
+
+    async def test_writer_returns_to_replica_after_window(self) -> None:
+        await requests.add_task({'name': 'new', 'description': '', 'owner_id': self.user_id})
+        self.now += DB_READ_AFTER_WRITE + 1
+        self.assertEqual(await self.read_name(), 'replica')
@@ -0,0 +1,104 @@
+"""
+Проверка планировщика напоминаний на поддельных часах: окно предзагрузки, отправка и пометка напоминаний.
+"""
+from datetime import datetime, timedelta
+from unittest import mock
+
+from sqlalchemy import delete, select
+
+from src.database.conn import async_session
+from src.database.models import Task
+from src.database.requests import add_task
+from src.tools.reminders import ReminderScheduler
+from tests.base import DatabaseTestCase
+
+START = datetime(2100, 1, 1, 12, 0)
+
+
+class FakeClock:
+    def __init__(self, now: datetime) -> None:
+        self.now = now
+
+    def __call__(self) -> datetime:
+        return self.now
+
+    def advance(self, **kwargs) -> None:
+        self.now += timedelta(**kwargs)
+
+
+class ReminderSchedulerTest(DatabaseTestCase):
+    async def asyncSetUp(self) -> None:
+        await super().asyncSetUp()
+        async with async_session() as session:
+            await session.execute(delete(Task).where(Task.due_at.is_not(None)))
+            await session.commit()
+        self.user_id = await self.create_user(30_000_201)
+        self.clock = FakeClock(START)
+        self.sent = []
+        outbox = mock.patch('src.tools.reminders.outbox')
+        self.outbox = outbox.start()
+        self.outbox.send_message.side_effect = lambda client, chat_id, text, **kwargs: self.sent.append(text)
+        self.addCleanup(outbox.stop)
+
+    async def add_due_task(self, name: str, seconds: int) -> int:
+        return await add_task({'name': name, 'description': '', 'owner_id': self.user_id,
+                               'due_at': START + timedelta(seconds=seconds)})
+
+    def scheduler(self, prefetch: int = 100) -> ReminderScheduler:
+        return ReminderScheduler(window=timedelta(seconds=60), prefetch=prefetch, batch_size=10, clock=self.clock)
+
+    async def test_tick_follows_window_and_due_dates(self) -> None:
+        await self.add_due_task('first', 10)
+        await self.add_due_task('second', 100)
+        scheduler = self.scheduler()
+
+        # Загружается только окно [сейчас, сейчас + 60 с]; спать до ближайшего срока
+        self.assertEqual(await scheduler.tick(), START + timedelta(seconds=10))
+        self.assertEqual(self.sent, [])
+
+        self.clock.advance(seconds=10)
+        self.assertEqual(await scheduler.tick(), START + timedelta(seconds=60))
+        self.assertEqual(len(self.sent), 1)
+        self.assertIn('first', self.sent[0])
+
+        # На границе окна загружается следующее окно
+        self.clock.advance(seconds=50)
+        self.assertEqual(await scheduler.tick(), START + timedelta(seconds=100))
+        self.clock.advance(seconds=40)
+        await scheduler.tick()
+        self.assertEqual(len(self.sent), 2)
+        self.assertIn('second', self.sent[1])
+
+    async def test_schedule_adds_task_inside_window(self) -> None:
+        scheduler = self.scheduler()
+        self.assertEqual(await scheduler.tick(), START + timedelta(seconds=60))
+        task_id = await self.add_due_task('late', 30)
+        scheduler.schedule(task_id, START + timedelta(seconds=30))
+        self.assertEqual(await scheduler.tick(), START + timedelta(seconds=30))
+
+    async def test_horizon_stops_before_last_prefetched_due_date(self) -> None:
+        for seconds in (10, 20, 30):
+            await self.add_due_task(f'task {seconds}', seconds)
+        scheduler = self.scheduler(prefetch=2)
+        await scheduler.tick()
+        self.assertEqual(scheduler._horizon, START + timedelta(seconds=20, microseconds=-1))
+
+        # Время пробуждения уже наступило: run сразу вызывает tick снова, и он догружает оставшуюся задачу
+        self.clock.advance(seconds=30)
+        self.assertLessEqual(await scheduler.tick(), self.clock.now)
+        self.assertEqual(len(self.sent), 2)
+        await scheduler.tick()
+        self.assertEqual(len(self.sent), 3)
+
+    async def test_claim_sends_reminder_once(self) -> None:
+        task_id = await self.add_due_task('shared', 10)
+        first, second = self.scheduler(), self.scheduler()
+        await first.tick()
+        await second.tick()
+        self.clock.advance(seconds=10)
+        await first.tick()
+        await second.tick()
+        self.assertEqual(len(self.sent), 1)
+        async with async_session() as session:
+            reminded_at = await session.scalar(select(Task.reminded_at).where(Task.id == task_id))
+        self.assertEqual(reminded_at, self.clock.now)
@@ -0,0 +1,62 @@
+"""
+Проверка хранилища состояний FSM в Redis на fakeredis (Redis в памяти процесса).
+"""
+import asyncio
+import unittest
+
+from fakeredis import FakeAsyncRedis
+
+from src.tools.storages import RedisStorage
+
+KEY = '30000401_30000401'
+
+
+class RedisStorageTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.redis = FakeAsyncRedis()
+        self.storage = RedisStorage(self.redis, ttl=60, prefix='test')
+
+    async def asyncTearDown(self) -> None:
+        await self.redis.aclose()
+
+    async def test_state_set_get_finish(self) -> None:
+        state = await self.storage.checkup(KEY)
+        self.assertIsNone(await self.redis.get('test:30000401_30000401:state'))
+
+        await state.set_state('Registration:name')
+        self.assertEqual(await self.redis.get('test:30000401_30000401:state'), b'Registration:name')
+
+        await state.finish()
+        self.assertIsNone(await self.redis.get('test:30000401_30000401:state'))
+
+    async def test_data_merges_and_finishes(self) -> None:
+        state = await self.storage.checkup(KEY)
+        await state.set_data({'name': 'Иван', 'due_at': None})
+        await state.set_data({'login': 'ivan', 'count': 2})
+        self.assertEqual(await state.get_data(), {'name': 'Иван', 'due_at': None, 'login': 'ivan', 'count': 2})
+
+        await state.finish()
+        self.assertEqual(await state.get_data(), {})
+
+    async def test_keys_get_ttl(self) -> None:
+        await self.storage.set_state('CreateTask:name', KEY)
+        await self.storage.set_data({'name': 'task'}, KEY)
+        self.assertTrue(0 < await self.redis.ttl('test:30000401_30000401:state') <= 60)
+        self.assertTrue(0 < await self.redis.ttl('test:30000401_30000401:data') <= 60)
+
+    async def test_state_and_data_expire(self) -> None:
+        storage = RedisStorage(self.redis, ttl=1, prefix='test')
+        await storage.set_state('CreateTask:name', KEY)
+        await storage.set_data({'name': 'task'}, KEY)
+        await asyncio.sleep(1.1)
+        self.assertIsNone(await self.redis.get('test:30000401_30000401:state'))
+        self.assertEqual(await storage.get_data(KEY), {})
+
+    async def test_zero_ttl_does_not_expire(self) -> None:
+        storage = RedisStorage(self.redis, ttl=0, prefix='test')
+        await storage.set_state('CreateTask:name', KEY)
+        self.assertEqual(await self.redis.ttl('test:30000401_30000401:state'), -1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,34 @@
+"""
+Проверка файла экспорта: Pyrogram загружает его как InputFile с именем fp.name.
+"""
+from io import BytesIO
+
+from pyrogram import raw
+
+from src.database.requests import add_tasks, stream_tasks
+from src.tools.task_export import write_tasks_export
+from tests.base import DatabaseTestCase
+
+
+class TaskExportFileTest(DatabaseTestCase):
+    async def asyncSetUp(self) -> None:
+        await super().asyncSetUp()
+        self.user_id = await self.create_user(30_000_101)
+        await add_tasks(self.user_id, [{'name': f'Задача {number}', 'description': 'Описание'}
+                                       for number in range(50)])
+
+    async def _assert_uploadable(self, export_format: str, spool_size: int) -> None:
+        file, count = await write_tasks_export(stream_tasks(self.user_id), export_format, 'tasks', spool_size)
+        with file:
+            self.assertGreaterEqual(count, 50)
+            self.assertTrue(file.read())
+            # Как Client.save_file: имя файла берется из fp.name
+            input_file = raw.types.InputFile(id=1, parts=1, name=getattr(file, 'name', 'file.jpg'), md5_checksum='')
+            restored = raw.types.InputFile.read(BytesIO(input_file.write()[4:]))
+            self.assertEqual(restored.name, f"tasks.{'csv' if export_format == 'csv' else 'ndjson'}")
+
+    async def test_in_memory_csv(self) -> None:
+        await self._assert_uploadable('csv', spool_size=1 << 20)
+
+    async def test_rolled_over_ndjson(self) -> None:
+        await self._assert_uploadable('json', spool_size=64)
@@ -0,0 +1,46 @@
+"""
+Проверка префиксного индекса inline-режима: задача, созданная во время загрузки индекса, не теряется.
+"""
+from unittest import mock
+
+from src.database import requests
+from tests.base import DatabaseTestCase
+
+
+class TaskIndexLoadTest(DatabaseTestCase):
+    async def asyncSetUp(self) -> None:
+        await super().asyncSetUp()
+        self.user_id = await self.create_user(30_000_601)
+        requests.task_index.discard(self.user_id)
+        await requests.add_task({'name': 'молоко', 'description': '', 'owner_id': self.user_id})
+
+    async def test_write_during_load_is_not_lost(self) -> None:
+        read_session = requests._read_session
+        user_id = self.user_id
+
+        class WriteDuringLoad:
+            # Сессия, после запроса которой задачу создает параллельный обработчик
+            def __init__(self, *args) -> None:
+                self.context = read_session(*args)
+
+            async def __aenter__(self):
+                session = await self.context.__aenter__()
+                execute = session.execute
+
+                async def execute_then_write(*args, **kwargs):
+                    result = await execute(*args, **kwargs)
+                    await requests.add_task({'name': 'молоток', 'description': '', 'owner_id': user_id})
+                    return result
+
+                session.execute = execute_then_write
+                return session
+
+            async def __aexit__(self, *exc_info):
+                return await self.context.__aexit__(*exc_info)
+
+        with mock.patch.object(requests, '_read_session', WriteDuringLoad):
+            loaded = await requests.find_tasks_by_prefix(self.user_id, 'мол', 10)
+        self.assertEqual([task.name for task in loaded], ['молоко'])
+
+        tasks = await requests.find_tasks_by_prefix(self.user_id, 'мол', 10)
+        self.assertEqual([task.name for task in tasks], ['молоток', 'молоко'])
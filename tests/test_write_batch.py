@@ -0,0 +1,41 @@
+"""
+Проверка группового коммита: запросы разных пользователей к одной задаче в одной пачке.
+"""
+import asyncio
+
+from src.database import requests
+from tests.base import DatabaseTestCase
+
+
+class WriteBatchOwnershipTest(DatabaseTestCase):
+    async def asyncSetUp(self) -> None:
+        await super().asyncSetUp()
+        self.owner_id = await self.create_user(30_000_001)
+        self.other_id = await self.create_user(30_000_002)
+        self.task_id = await requests.add_task({'name': 'secret', 'description': 'A private',
+                                                'owner_id': self.owner_id})
+
+        # Запросы, поставленные в течение задержки, применяются одной пачкой
+        self.delay = requests.write_batcher.delay
+        requests.write_batcher.delay = 0.05
+
+    async def asyncTearDown(self) -> None:
+        requests.write_batcher.delay = self.delay
+        await super().asyncTearDown()
+
+    async def test_complete_same_task_two_owners(self) -> None:
+        owner_task, other_task = await asyncio.gather(
+            requests.mark_task_as_complete(self.task_id, self.owner_id),
+            requests.mark_task_as_complete(self.task_id, self.other_id),
+        )
+        self.assertEqual(owner_task.id, self.task_id)
+        self.assertTrue(owner_task.is_done)
+        self.assertIsNone(other_task)
+
+    async def test_delete_same_task_two_owners(self) -> None:
+        other_deleted, owner_deleted = await asyncio.gather(
+            requests.delete_task(self.task_id, self.other_id),
+            requests.delete_task(self.task_id, self.owner_id),
+        )
+        self.assertFalse(other_deleted)
+        self.assertTrue(owner_deleted)